@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Order, OrderItem
+from .models import Customer, DailySales, ItemSales, Order, OrderItem
 from apps.inventory.models import InventoryItem  
 
 class OrderItemInline(admin.TabularInline):
@@ -17,7 +17,19 @@ class OrderAdmin(admin.ModelAdmin):
         """
         obj.save()  # This triggers overridden save() with status check
 
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ['day', 'status', 'orders', 'units', 'revenue']
+    list_filter = ['status']
+    date_hierarchy = 'day'
+
+class ItemSalesAdmin(admin.ModelAdmin):
+    list_display = ['item', 'status', 'units', 'revenue']
+    list_filter = ['status']
+    list_select_related = ['item']
+
 admin.site.register(Customer)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(OrderItem)
 admin.site.register(InventoryItem)
+admin.site.register(DailySales, DailySalesAdmin)
+admin.site.register(ItemSales, ItemSalesAdmin)
@@ -5,3 +5,6 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     label = 'core' 
+
+    def ready(self):
+        from . import rollups  # noqa: F401  connects the rollup delete receivers
@@ -0,0 +1,42 @@
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from common.export import SENT_SMS, Dataset
+
+from .models import Order, OrderItem
+
+ORDERS = Dataset(
+    'orders',
+    lambda: Order.objects.all(),
+    [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('status', 'status'),
+        ('customer_id', 'customer_id'),
+        ('customer_code', 'customer__code'),
+        ('customer_name', 'customer__name'),
+        ('total', 'total'),
+    ],
+    date_field='timestamp',
+)
+
+ORDER_ITEMS = Dataset(
+    'order-items',
+    lambda: OrderItem.objects.annotate(line_total=ExpressionWrapper(
+        F('quantity') * F('price_at_order'), output_field=DecimalField(max_digits=12, decimal_places=2),
+    )),
+    [
+        ('id', 'id'),
+        ('order_id', 'order_id'),
+        ('order_timestamp', 'order__timestamp'),
+        ('order_status', 'order__status'),
+        ('customer_code', 'order__customer__code'),
+        ('item_id', 'item_id'),
+        ('item_name', 'item__name'),
+        ('quantity', 'quantity'),
+        ('price_at_order', 'price_at_order'),
+        ('line_total', 'line_total'),
+    ],
+    date_field='order__timestamp',
+)
+
+DATASETS = {dataset.name: dataset for dataset in (ORDERS, ORDER_ITEMS, SENT_SMS)}
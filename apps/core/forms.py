@@ -1,6 +1,6 @@
 from django import forms
 from common.models import CustomUser
-from .models import Customer
+from .models import Customer, Order
 import re
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
@@ -17,6 +17,19 @@ ITEM_CHOICES = [
 
 User = get_user_model()
 
+def normalize_phone_number(number):
+    """
+    Converts 07XX... to +2547XX... and accepts full +254 numbers.
+    Raises ValidationError for anything else.
+    """
+    number = (number or "").strip()
+    if number.startswith("07"):
+        return "+254" + number[1:]  # Convert 07XX... → +2547XX...
+    elif number.startswith("+254") and len(number) == 13:
+        return number
+    else:
+        raise forms.ValidationError("Enter phone number starting with 07 or +254")
+
 class CustomerRegistrationForm(forms.Form):
     first_name = forms.CharField(max_length=30)
     last_name = forms.CharField(max_length=30)
@@ -55,13 +68,7 @@ class CustomerRegistrationForm(forms.Form):
 
 
     def clean_phone_number(self):
-        number = self.cleaned_data['phone_number'].strip()
-        if number.startswith("07"):
-            return "+254" + number[1:]  # Convert 07XX... → +2547XX...
-        elif number.startswith("+254") and len(number) == 13:
-            return number
-        else:
-            raise forms.ValidationError("Enter phone number starting with 07 or +254")
+        return normalize_phone_number(self.cleaned_data['phone_number'])
 
     def save(self, user=None):
         data = self.cleaned_data
@@ -96,3 +103,54 @@ class OrderForm(forms.Form):
         label="Select Item",
     )
 
+
+class OrderFilterForm(forms.Form):
+    """
+    Query parameters accepted by the orders API. Every filter maps onto the
+    (status, timestamp) or (customer, timestamp) index.
+    """
+    status = forms.CharField(required=False, help_text="One status or a comma-separated list.")
+    timestamp_after = forms.DateTimeField(required=False)
+    timestamp_before = forms.DateTimeField(required=False)
+    customer = forms.IntegerField(required=False, min_value=1)
+    customer_code = forms.CharField(required=False, max_length=6)
+    phone = forms.CharField(required=False, max_length=15)
+
+    def clean_status(self):
+        raw = self.cleaned_data["status"]
+        statuses = [value.strip().upper() for value in raw.split(",") if value.strip()]
+        unknown = [value for value in statuses if value not in Order.Status.values]
+        if unknown:
+            raise ValidationError(f"Unknown status: {', '.join(unknown)}")
+        return statuses
+
+    def clean_phone(self):
+        phone = self.cleaned_data["phone"]
+        return normalize_phone_number(phone) if phone else ""
+
+    def clean(self):
+        cleaned_data = super().clean()
+        after = cleaned_data.get("timestamp_after")
+        before = cleaned_data.get("timestamp_before")
+        if after and before and after > before:
+            raise ValidationError("timestamp_after must not be later than timestamp_before.")
+        return cleaned_data
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if len(data["status"]) == 1:
+            queryset = queryset.filter(status=data["status"][0])
+        elif data["status"]:
+            queryset = queryset.filter(status__in=data["status"])
+        if data["timestamp_after"]:
+            queryset = queryset.filter(timestamp__gte=data["timestamp_after"])
+        if data["timestamp_before"]:
+            queryset = queryset.filter(timestamp__lt=data["timestamp_before"])
+        if data["customer"]:
+            queryset = queryset.filter(customer_id=data["customer"])
+        # Both are unique on Customer, so the join stays a single index lookup
+        if data["customer_code"]:
+            queryset = queryset.filter(customer__code=data["customer_code"])
+        if data["phone"]:
+            queryset = queryset.filter(customer__phone_number=data["phone"])
+        return queryset
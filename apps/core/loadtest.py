@@ -0,0 +1,275 @@
+"""
+Load testing against a running server (`manage.py load_test`).
+
+Each simulated customer registers, then repeatedly opens the order form,
+checks out a few of the stocked items, finds the new order through the orders
+API and downloads its receipt twice (the second time with the ETag, which
+should be a 304). Every request is timed under a route label and the run
+is summarised as req/s and p50/p95/p99 per route.
+"""
+
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from apps.inventory.models import InventoryItem
+
+from .models import Customer, Order, OrderItem
+from .sequences import allocate_customer_codes
+
+ITEM_PREFIX = "Load test item"
+CUSTOMER_PREFIX = "Load test customer"
+SEED_PHONE = "+25470{:07d}"           # seeded customers
+USER_PHONE = "078{run:03d}{number:04d}"  # registered during a run, normalised to +25478...
+MAX_USERS = 10_000
+
+
+class StepFailed(Exception):
+    """A request failed; the rest of that user's journey depends on it."""
+
+
+class Recorder:
+    """Thread-safe request timings and failures, by route label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)                      # route -> [seconds]
+        self.errors = defaultdict(lambda: defaultdict(int))   # route -> {status or exception: count}
+
+    def record(self, route, seconds, error=None):
+        with self._lock:
+            self.timings[route].append(seconds)
+            if error is not None:
+                self.errors[route][str(error)] += 1
+
+
+class SimulatedUser:
+    def __init__(self, base_url, recorder, run, number, rng, think_time=0.0, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+        self.timeout = timeout
+        self.username = f"load{run:03d}u{number:04d}"
+        self.phone = USER_PHONE.format(run=run, number=number)
+        self.session = requests.Session()
+
+    def request(self, route, method, path, expect=(200,), **kwargs):
+        if method == "POST":
+            kwargs.setdefault("headers", {})["X-CSRFToken"] = self.session.cookies.get("csrftoken", "")
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, timeout=self.timeout, allow_redirects=False, **kwargs
+            )
+        except requests.RequestException as exc:
+            self.recorder.record(route, time.perf_counter() - started, type(exc).__name__)
+            raise StepFailed(route) from exc
+        ok = response.status_code in expect
+        self.recorder.record(route, time.perf_counter() - started, None if ok else response.status_code)
+        if not ok:
+            raise StepFailed(route)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        return response
+
+    def run(self, iterations, items):
+        try:
+            self.register()
+            for _ in range(iterations):
+                self.request("GET /create-order/", "GET", "/create-order/")
+                self.checkout(items)
+                self.receipt(self.latest_order_id())
+        except StepFailed:
+            pass
+        finally:
+            self.session.close()
+
+    def register(self):
+        self.request("GET /register/", "GET", "/register/")
+        self.request("POST /register/", "POST", "/register/", expect=(302,), data={
+            "first_name": "Load", "last_name": f"User {self.username}", "username": self.username,
+            "phone_number": self.phone, "password1": "load-test-Pa55", "password2": "load-test-Pa55",
+        })
+
+    def checkout(self, items):
+        cart = [
+            {"id": item_id, "qty": self.rng.randint(1, 3)}
+            for item_id in self.rng.sample(items, min(len(items), self.rng.randint(1, 4)))
+        ]
+        # 200 renders the success page; a redirect back to the form means nothing was ordered
+        self.request("POST /create-order/", "POST", "/create-order/", data={"cart_data": json.dumps(cart)})
+
+    def latest_order_id(self):
+        response = self.request("GET /api/orders/", "GET", "/api/orders/", params={"phone": self.phone, "page_size": 1})
+        return response.json()["results"][0]["id"]
+
+    def receipt(self, order_id):
+        path = f"/orders/{order_id}/receipt/"
+        response = self.request("GET /orders/<id>/receipt/", "GET", path)
+        self.request("GET /orders/<id>/receipt/ (revalidate)", "GET", path, expect=(304,),
+                     headers={"If-None-Match": response.headers.get("ETag", "")})
+
+
+def free_run_number():
+    """A run number whose registration phones are not taken yet."""
+    for run in range(1000):
+        if not Customer.objects.filter(phone_number__startswith=f"+25478{run:03d}").exists():
+            return run
+    raise RuntimeError("Every load test run number is in use; delete old load test customers.")
+
+
+def run_load(base_url, users, iterations, rng, think_time=0.0):
+    """Runs `users` simulated customers concurrently. Returns (recorder, wall seconds)."""
+    if not 1 <= users <= MAX_USERS:
+        raise ValueError(f"users must be between 1 and {MAX_USERS}")
+    # Picked from what the order form lists; customers cannot use the (staff only) inventory API
+    stocked = InventoryItem.objects.filter(on_hand__gt=0).values_list("id", flat=True)
+    items = list(stocked.filter(name__startswith=ITEM_PREFIX)) or list(stocked)
+    if not items:
+        raise RuntimeError("No inventory item is in stock; seed some first.")
+    recorder = Recorder()
+    run = free_run_number()
+    simulated = [
+        SimulatedUser(base_url, recorder, run, number, rng=random.Random(rng.random()), think_time=think_time)
+        for number in range(users)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for future in [pool.submit(user.run, iterations, items) for user in simulated]:
+            future.result()
+    return recorder, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(1, math.ceil(pct / 100 * len(sorted_values))) - 1]
+
+
+def summarize(recorder, wall_seconds):
+    routes = {}
+    for route, timings in recorder.timings.items():
+        timings = sorted(timings)
+        errors = dict(recorder.errors.get(route, {}))
+        routes[route] = {
+            "requests": len(timings),
+            "errors": sum(errors.values()),
+            "error_kinds": errors,
+            "rps": round(len(timings) / wall_seconds, 2) if wall_seconds else None,
+            "mean_ms": round(sum(timings) / len(timings) * 1000, 1),
+            "p50_ms": round(percentile(timings, 50) * 1000, 1),
+            "p95_ms": round(percentile(timings, 95) * 1000, 1),
+            "p99_ms": round(percentile(timings, 99) * 1000, 1),
+            "max_ms": round(timings[-1] * 1000, 1),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "requests": total,
+        "errors": sum(route["errors"] for route in routes.values()),
+        "rps": round(total / wall_seconds, 2) if wall_seconds else None,
+        "routes": routes,
+    }
+
+
+def seed_dataset(items, customers, orders, rng):
+    """
+    Tops the load test rows up to the requested counts: inventory items with
+    effectively unlimited stock, customers, and a background order history
+    over the last 90 days. Rows from earlier runs are reused. Returns the
+    number of rows created per model.
+    """
+    created = {"items": 0, "customers": 0, "orders": 0, "order_items": 0}
+
+    existing = InventoryItem.objects.filter(name__startswith=ITEM_PREFIX)
+    # No stock-low alerts or sold-out items in the middle of a run
+    existing.update(on_hand=10 ** 6, warn_limit=0)
+    have = existing.count()
+    new_items = InventoryItem.objects.bulk_create([
+        InventoryItem(name=f"{ITEM_PREFIX} {n}", price=Decimal(rng.randrange(5000, 500000)) / 100,
+                      on_hand=10 ** 6, warn_limit=0)
+        for n in range(have, items)
+    ])
+    created["items"] = len(new_items)
+
+    have = Customer.objects.filter(name__startswith=CUSTOMER_PREFIX).count()
+    missing = max(customers - have, 0)
+    Customer.objects.bulk_create([
+        Customer(name=f"{CUSTOMER_PREFIX} {n}", phone_number=SEED_PHONE.format(n), code=code)
+        for n, code in zip(range(have, customers), allocate_customer_codes(missing))
+    ])
+    created["customers"] = missing
+
+    customer_ids = list(Customer.objects.filter(name__startswith=CUSTOMER_PREFIX).values_list("id", flat=True))
+    priced = list(InventoryItem.objects.filter(name__startswith=ITEM_PREFIX).values_list("id", "price"))
+    have = Order.objects.filter(customer__name__startswith=CUSTOMER_PREFIX).count()
+    missing = max(orders - have, 0) if customer_ids and priced else 0
+    now = timezone.now()
+    statuses = Order.Status.values
+    for start in range(0, missing, 1000):
+        batch = Order.objects.bulk_create([
+            Order(customer_id=rng.choice(customer_ids), status=rng.choice(statuses),
+                  timestamp=now - timedelta(seconds=rng.randrange(90 * 24 * 3600)))
+            for _ in range(min(1000, missing - start))
+        ])
+        lines = [
+            OrderItem(order=order, item_id=item_id, quantity=rng.randint(1, 5), price_at_order=price)
+            for order in batch
+            for item_id, price in rng.sample(priced, min(len(priced), rng.randint(1, 4)))
+        ]
+        OrderItem.objects.bulk_create(lines)
+        created["orders"] += len(batch)
+        created["order_items"] += len(lines)
+    return created
+
+
+@contextmanager
+def dev_server(port, startup_timeout=30):
+    """
+    Runs `manage.py runserver` on 127.0.0.1:`port` with SMS going to the
+    in-process fake gateway, and yields its base URL once it answers.
+    """
+    env = {**os.environ, "SMS_GATEWAY": "fake", "SMS_USE_OUTBOX": "False"}
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(
+            [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if process.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"Dev server exited:\n{log.read().decode(errors='replace')}")
+                try:
+                    requests.get(base_url + "/", timeout=1)
+                    break
+                except requests.ConnectionError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"Dev server did not answer on {base_url} in {startup_timeout}s")
+                    time.sleep(0.2)
+            yield base_url
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
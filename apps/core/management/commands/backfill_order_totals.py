@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Max, Min
+
+from apps.core.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Sets Order.total from the order lines for existing orders, one id range per transaction. "
+        "With --check, only counts the orders whose stored total differs from their lines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Order ids per UPDATE.")
+        parser.add_argument("--check", action="store_true", help="Report drifted totals without writing.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        bounds = Order.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            self.stdout.write("No orders.")
+            return
+
+        started = time.monotonic()
+        done = 0
+        for low in range(bounds["low"], bounds["high"] + 1, chunk_size):
+            orders = Order.objects.filter(id__gte=low, id__lt=low + chunk_size)
+            if options["check"]:
+                done += orders.with_totals().exclude(total=F("items_total")).count()
+                continue
+            with transaction.atomic():
+                done += orders.recalculate_totals()
+            self.stdout.write(f"  up to id {min(low + chunk_size - 1, bounds['high'])}: {done} orders", ending="\r")
+
+        elapsed = time.monotonic() - started
+        if options["check"]:
+            style = self.style.SUCCESS if not done else self.style.WARNING
+            self.stdout.write(style(f"{done} orders have a stored total that differs from their lines."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nRecalculated {done} order totals in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f}/s)."
+            ))
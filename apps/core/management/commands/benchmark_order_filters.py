@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.forms import OrderFilterForm
+from apps.core.models import Customer, Order
+from apps.core.sequences import allocate_customer_codes
+
+# Roughly what the live table looks like: most orders end up delivered
+STATUS_WEIGHTS = {
+    Order.Status.DELIVERED: 70,
+    Order.Status.APPROVED: 12,
+    Order.Status.CANCELLED: 8,
+    Order.Status.PENDING: 6,
+    Order.Status.CREATED: 4,
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds orders and prints the query plan and timing of each orders API filter, "
+        "to check they use the composite indexes. Seeded rows are rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Orders to seed (0 uses existing data).")
+        parser.add_argument("--customers", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=365, help="Spread timestamps over this many days.")
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per filter.")
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded rows.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        if options["rows"] > 0 and (options["customers"] < 1 or options["days"] < 1):
+            raise CommandError("--customers and --days must be at least 1 when seeding rows.")
+        try:
+            with transaction.atomic():
+                customers = self.seed(options)
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"ANALYZE {Order._meta.db_table}")
+                self.run_filters(customers, options)
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Seeded rows rolled back.")
+
+    def seed(self, options):
+        if options["rows"] <= 0:
+            customers = list(Customer.objects.order_by("?")[:1])
+            if not customers:
+                raise CommandError("No customers to benchmark against; seed some rows first.")
+            return customers
+
+        started = time.monotonic()
+        count = options["customers"]
+        codes = allocate_customer_codes(count)
+        prefix = random.randint(10, 99)
+        customers = Customer.objects.bulk_create([
+            Customer(name=f"Benchmark {n}", code=code, phone_number=f"+2547{prefix}{n:06d}")
+            for n, code in enumerate(codes)
+        ])
+
+        now = timezone.now()
+        span = options["days"] * 86400
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        remaining = options["rows"]
+        while remaining:
+            size = min(options["chunk_size"], remaining)
+            Order.objects.bulk_create([
+                Order(
+                    # A few customers place most of the orders
+                    customer=customers[min(int(random.paretovariate(1.2)) - 1, count - 1)],
+                    status=random.choices(statuses, weights)[0],
+                    timestamp=now - timedelta(seconds=random.randrange(span)),
+                )
+                for _ in range(size)
+            ])
+            remaining -= size
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Seeded {options['rows']} orders for {count} customers in {elapsed:.1f}s "
+            f"({options['rows'] / elapsed:.0f} rows/s)."
+        )
+        return customers
+
+    def scenarios(self, customer):
+        week_ago = (timezone.now() - timedelta(days=7)).isoformat()
+        month_ago = (timezone.now() - timedelta(days=30)).isoformat()
+        return [
+            ("status", {"status": "PENDING"}),
+            ("status + range", {"status": "APPROVED", "timestamp_after": month_ago}),
+            ("range", {"timestamp_after": week_ago}),
+            ("customer", {"customer": customer.id}),
+            ("customer + range", {"customer": customer.id, "timestamp_after": month_ago}),
+            ("customer code", {"customer_code": customer.code}),
+            ("phone", {"phone": customer.phone_number}),
+        ]
+
+    def run_filters(self, customers, options):
+        for name, params in self.scenarios(customers[0]):
+            form = OrderFilterForm(params)
+            if not form.is_valid():
+                raise CommandError(f"{name}: {form.errors.as_text()}")
+            # The same query the API runs for its first page
+            queryset = form.filter(Order.objects.all()).order_by("-timestamp", "-id")[:51]
+
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                list(queryset.all())  # fresh clone, no result cache
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}: {params}"))
+            self.stdout.write(queryset.explain())
+            self.stdout.write(f"best {min(timings):.2f} ms, median {sorted(timings)[len(timings) // 2]:.2f} ms")
@@ -0,0 +1,88 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from weasyprint import HTML
+
+from apps.core import pdf
+from apps.core.models import Customer, Order, OrderItem
+from apps.core.receipts import STYLESHEET, render_receipt_html
+from apps.inventory.models import InventoryItem
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times one receipt render the old way (inline CSS, fresh font setup per call) against the "
+        "cached renderer in apps.core.pdf. Uses --order, else the latest order, else a sample order "
+        "that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, help="Order id to render.")
+        parser.add_argument("--repeat", type=int, default=20, help="Renders timed per variant.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        try:
+            with transaction.atomic():
+                html = render_receipt_html(self.get_order(options["order"]))
+                self.run(html, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def get_order(self, order_id):
+        orders = Order.objects.select_related("customer").with_items()
+        if order_id:
+            try:
+                return orders.get(id=order_id)
+            except Order.DoesNotExist:
+                raise CommandError(f"No order with id {order_id}.")
+        order = orders.order_by("-id").first()
+        if order:
+            return order
+
+        customer = Customer.objects.create(name="Benchmark", phone_number="+254799999999")
+        order = Order.objects.create(customer=customer)
+        for n in range(5):
+            item = InventoryItem.objects.create(name=f"Item {n}", price=Decimal("1500.00"), on_hand=100)
+            OrderItem.objects.create(order=order, item=item, quantity=n + 1, price_at_order=item.price)
+        return orders.get(id=order.id)
+
+    def time_renders(self, render, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label:<28} median {statistics.median(timings):8.2f} ms   "
+            f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms"
+        )
+
+    def run(self, html, repeat):
+        # What order_receipt_pdf used to do: CSS inline, parsed and font-configured per call
+        with open(pdf.stylesheet_path(STYLESHEET)) as source:
+            inline = html.replace("</head>", f"<style>{source.read()}</style></head>", 1)
+        before = self.time_renders(lambda: HTML(string=inline).write_pdf(), repeat)
+
+        warm_up = pdf.warm_up()
+        after = self.time_renders(lambda: pdf.render_pdf(html, stylesheets=[STYLESHEET]), repeat)
+
+        self.stdout.write(f"Receipt render, {repeat} runs each (warm-up took {warm_up * 1000:.0f} ms):")
+        self.report("before (inline CSS)", before)
+        self.report("after (cached CSS + fonts)", after)
+        if statistics.median(after):
+            self.stdout.write(self.style.SUCCESS(
+                f"Speed-up: {statistics.median(before) / statistics.median(after):.2f}x per receipt"
+            ))
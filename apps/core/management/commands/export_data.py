@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.exports import DATASETS
+from common.export import DEFAULT_CHUNK_SIZE, ExportForm, stream_export
+
+
+class Command(BaseCommand):
+    help = "Streams orders, order-items or sms to a CSV/NDJSON file (optionally gzipped) with flat memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", default="csv", choices=["csv", "ndjson"])
+        parser.add_argument("--after", help="Only rows on or after this date/datetime.")
+        parser.add_argument("--before", help="Only rows before this date/datetime.")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Rows fetched from the database per round trip.")
+        parser.add_argument("-o", "--output", default="-", help="File to write, or - for stdout.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        form = ExportForm({
+            "format": options["format"],
+            "after": options["after"],
+            "before": options["before"],
+            "gzip": options["gzip"],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        data = form.cleaned_data
+
+        chunks = stream_export(
+            DATASETS[options["dataset"]], data["format"], after=data["after"], before=data["before"],
+            gzip=data["gzip"], chunk_size=options["chunk_size"],
+        )
+        started = time.monotonic()
+        written = 0
+        to_stdout = options["output"] == "-"
+        output = sys.stdout.buffer if to_stdout else open(options["output"], "wb")
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if not to_stdout:
+                output.close()
+
+        if not to_stdout:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {written / 1024:.1f} KB to {options['output']} in {time.monotonic() - started:.2f}s."
+            ))
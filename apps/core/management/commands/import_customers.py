@@ -0,0 +1,169 @@
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import RegexValidator
+from django.db import transaction
+
+from apps.core.forms import normalize_phone_number
+from apps.core.models import Customer
+from apps.core.sequences import allocate_customer_codes
+from common.models import CustomUser
+
+# normalize_phone_number only checks the prefix of 07 numbers; rows must
+# end up as +254 and nine digits to fit Customer.phone_number
+imported_phone_validator = RegexValidator(regex=r'^\+254\d{9}$')
+
+
+def _init_hasher():
+    # Needed when the pool spawns instead of forking
+    django.setup()
+
+
+def _hash_password(password):
+    # No password in the file: the account needs a reset before first login
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports customers from a CSV (username, first_name, last_name, phone_number, password). "
+        "Passwords are hashed in a process pool; users and customers are written with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="Rows hashed and written per transaction.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Password hashing processes (1 hashes in this process).")
+        parser.add_argument("--encoding", default="utf-8-sig")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        self.stats = {"read": 0, "imported": 0, "invalid_phone": 0, "missing_username": 0, "duplicate": 0}
+        self.seen_usernames = set()
+        self.seen_phones = set()
+        self.hash_seconds = 0.0
+        started = time.monotonic()
+
+        pool = None
+        if options["workers"] > 1:
+            pool = ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_hasher)
+
+        try:
+            with open(options["csv_path"], newline="", encoding=options["encoding"]) as handle:
+                reader = csv.DictReader(handle)
+                while True:
+                    chunk = list(itertools.islice(reader, chunk_size))
+                    if not chunk:
+                        break
+                    self.import_chunk(chunk, pool, options["workers"], chunk_size)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f"{self.stats['read']} rows read, {self.stats['imported']} imported "
+                        f"({self.stats['imported'] / elapsed:.1f} customers/s)"
+                    )
+        except FileNotFoundError:
+            raise CommandError(f"No such file: {options['csv_path']}")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        skipped = self.stats["read"] - self.stats["imported"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['imported']} of {self.stats['read']} rows in {elapsed:.2f}s "
+            f"({self.stats['imported'] / elapsed if elapsed else 0:.1f} customers/s, "
+            f"{self.hash_seconds:.2f}s hashing with {options['workers']} worker(s))."
+        ))
+        if skipped:
+            self.stdout.write(
+                f"Skipped {skipped}: {self.stats['invalid_phone']} invalid phone, "
+                f"{self.stats['missing_username']} missing username, {self.stats['duplicate']} duplicate."
+            )
+
+    def clean_rows(self, chunk):
+        rows = []
+        for raw in chunk:
+            self.stats["read"] += 1
+            username = (raw.get("username") or "").strip()
+            if not username:
+                self.stats["missing_username"] += 1
+                continue
+            try:
+                phone_number = normalize_phone_number(raw.get("phone_number"))
+                imported_phone_validator(phone_number)
+            except ValidationError:
+                self.stats["invalid_phone"] += 1
+                continue
+            if username in self.seen_usernames or phone_number in self.seen_phones:
+                self.stats["duplicate"] += 1
+                continue
+            self.seen_usernames.add(username)
+            self.seen_phones.add(phone_number)
+            rows.append({
+                "username": username,
+                "first_name": (raw.get("first_name") or "").strip(),
+                "last_name": (raw.get("last_name") or "").strip(),
+                "phone_number": phone_number,
+                "password": raw.get("password") or "",
+            })
+
+        # One query each for rows that already exist in the database
+        taken_usernames = set(CustomUser.objects.filter(
+            username__in=[row["username"] for row in rows]).values_list("username", flat=True))
+        taken_phones = set(Customer.objects.filter(
+            phone_number__in=[row["phone_number"] for row in rows]).values_list("phone_number", flat=True))
+        fresh = [
+            row for row in rows
+            if row["username"] not in taken_usernames and row["phone_number"] not in taken_phones
+        ]
+        self.stats["duplicate"] += len(rows) - len(fresh)
+        return fresh
+
+    def import_chunk(self, chunk, pool, workers, chunk_size):
+        rows = self.clean_rows(chunk)
+        if not rows:
+            return
+
+        hash_started = time.monotonic()
+        passwords = [row["password"] for row in rows]
+        if pool:
+            per_task = max(1, len(passwords) // (workers * 4))
+            hashes = list(pool.map(_hash_password, passwords, chunksize=per_task))
+        else:
+            hashes = [_hash_password(password) for password in passwords]
+        self.hash_seconds += time.monotonic() - hash_started
+
+        with transaction.atomic():
+            users = CustomUser.objects.bulk_create([
+                CustomUser(
+                    username=row["username"],
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    phone_number=row["phone_number"],
+                    password=password,
+                )
+                for row, password in zip(rows, hashes)
+            ], batch_size=chunk_size)
+            codes = allocate_customer_codes(len(rows))
+            Customer.objects.bulk_create([
+                Customer(
+                    user=user,
+                    name=f"{row['first_name']} {row['last_name']}".strip(),
+                    phone_number=row["phone_number"],
+                    code=code,
+                )
+                for row, user, code in zip(rows, users, codes)
+            ], batch_size=chunk_size)
+        self.stats["imported"] += len(rows)
@@ -0,0 +1,95 @@
+import json
+import random
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.loadtest import MAX_USERS, dev_server, run_load, seed_dataset, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds load test data, then drives concurrent simulated customers through register, browse, "
+        "checkout and receipt against a live server and reports req/s and p50/p95/p99 per route. "
+        "Starts `runserver` with the fake SMS gateway unless --url is given; a server passed with "
+        "--url should run with SMS_GATEWAY=fake."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of an already running server.")
+        parser.add_argument("--port", type=int, default=8765, help="Port for the dev server started without --url.")
+        parser.add_argument("--users", type=int, default=10, help="Concurrent simulated customers.")
+        parser.add_argument("--iterations", type=int, default=5, help="Checkouts per customer.")
+        parser.add_argument("--think-time", type=float, default=0.0,
+                            help="Mean seconds a customer pauses between requests.")
+        parser.add_argument("--items", type=int, default=50, help="Inventory items to seed.")
+        parser.add_argument("--customers", type=int, default=200, help="Background customers to seed.")
+        parser.add_argument("--orders", type=int, default=5000, help="Background orders to seed.")
+        parser.add_argument("--no-seed", action="store_true", help="Use the data already in the database.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for repeatable runs.")
+        parser.add_argument("-o", "--output", help="JSON results file (default load_test_<timestamp>.json).")
+        parser.add_argument("--compare", help="Earlier JSON results to show the change against.")
+
+    def handle(self, *args, **options):
+        if not 1 <= options["users"] <= MAX_USERS or options["iterations"] < 1:
+            raise CommandError(f"--users must be 1-{MAX_USERS} and --iterations at least 1.")
+        baseline = self.load_baseline(options["compare"])
+        rng = random.Random(options["seed"])
+
+        if not options["no_seed"]:
+            created = seed_dataset(options["items"], options["customers"], options["orders"], rng)
+            self.stdout.write("Seeded " + ", ".join(f"{count} {name}" for name, count in created.items()))
+
+        server = nullcontext(options["url"]) if options["url"] else dev_server(options["port"])
+        try:
+            with server as base_url:
+                self.stdout.write(f"{options['users']} users x {options['iterations']} checkouts against {base_url}")
+                recorder, wall_seconds = run_load(
+                    base_url, options["users"], options["iterations"], rng, think_time=options["think_time"],
+                )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        results = {
+            "started": timezone.now().isoformat(),
+            "config": {key: options[key] for key in ("users", "iterations", "think_time", "items", "customers",
+                                                     "orders", "seed")},
+            **summarize(recorder, wall_seconds),
+        }
+        self.report(results, baseline)
+
+        output = Path(options["output"] or f"load_test_{timezone.now():%Y%m%d-%H%M%S}.json")
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {output}")
+        if results["errors"]:
+            self.stderr.write(f"{results['errors']} of {results['requests']} requests failed.")
+
+    def load_baseline(self, path):
+        if not path:
+            return None
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read --compare file: {exc}")
+
+    def report(self, results, baseline):
+        self.stdout.write(
+            f"\n{'route':<42}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for route, stats in results["routes"].items():
+            line = (
+                f"{route:<42}{stats['requests']:>7}{stats['errors']:>6}{stats['rps']:>9.1f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}"
+            )
+            previous = (baseline or {}).get("routes", {}).get(route)
+            if previous:
+                line += f"   p95 {stats['p95_ms'] - previous['p95_ms']:+.1f} ms, req/s {stats['rps'] - previous['rps']:+.1f}"
+            self.stdout.write(line)
+            if stats["error_kinds"]:
+                self.stdout.write(f"{'':<4}failures: {stats['error_kinds']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{results['requests']} requests in {results['wall_seconds']:.2f}s: {results['rps']:.1f} req/s, "
+            f"{results['errors']} errors"
+        ))
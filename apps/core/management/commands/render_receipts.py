@@ -0,0 +1,130 @@
+import os
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import django
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.forms import OrderFilterForm
+from apps.core.models import Order
+from apps.core.receipts import cached_receipt, render_pdf
+
+
+def _init_renderer():
+    # Needed when the pool spawns instead of forking
+    django.setup()
+
+
+def _render(order_id, html):
+    started = time.perf_counter()
+    pdf = render_pdf(html)
+    return order_id, pdf, time.perf_counter() - started, os.getpid()
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders receipt PDFs for the selected orders across a process pool and writes them to a "
+        "directory or a zip. Receipts already in the receipt cache are reused; new ones are stored."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--dir", help="Write order_<id>_receipt.pdf files here.")
+        target.add_argument("--zip", help="Write the receipts into this zip file as they finish.")
+        parser.add_argument("--after", help="Orders on or after this date/datetime.")
+        parser.add_argument("--before", help="Orders before this date/datetime.")
+        parser.add_argument("--status", help="One status or a comma-separated list.")
+        parser.add_argument("--customer", help="Customer id.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Rendering processes (1 renders in this process).")
+        parser.add_argument("--batch-size", type=int, default=200,
+                            help="Orders loaded (with their items) per round of queries.")
+        parser.add_argument("--force", action="store_true", help="Re-render receipts that are already cached.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be at least 1.")
+        form = OrderFilterForm({
+            "timestamp_after": options["after"],
+            "timestamp_before": options["before"],
+            "status": options["status"] or "",
+            "customer": options["customer"],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        orders = (
+            form.filter(Order.objects.select_related("customer").with_items())
+            .order_by("id")
+            .iterator(chunk_size=options["batch_size"])  # items are prefetched per chunk
+        )
+
+        self.force = options["force"]
+        self.stats = {"rendered": 0, "cached": 0}
+        self.per_worker = defaultdict(lambda: [0, 0.0])
+        started = time.monotonic()
+
+        if options["zip"]:
+            # PDFs are already compressed; storing them keeps the zip cheap to write
+            with zipfile.ZipFile(options["zip"], "w", compression=zipfile.ZIP_STORED) as archive:
+                self.render_all(orders, options["workers"], lambda name, pdf: archive.writestr(name, pdf))
+        else:
+            directory = Path(options["dir"])
+            directory.mkdir(parents=True, exist_ok=True)
+            self.render_all(orders, options["workers"], lambda name, pdf: (directory / name).write_bytes(pdf))
+
+        elapsed = time.monotonic() - started
+        total = self.stats["rendered"] + self.stats["cached"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {total} receipts in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.1f}/s): "
+            f"{self.stats['rendered']} rendered, {self.stats['cached']} from cache."
+        ))
+        for pid, (count, seconds) in sorted(self.per_worker.items()):
+            self.stdout.write(
+                f"  worker {pid}: {count} receipts, {seconds:.2f}s rendering "
+                f"({count / seconds if seconds else 0:.1f}/s, {seconds / count * 1000:.0f} ms each)"
+            )
+
+    def render_all(self, orders, workers, write):
+        receipts = {}
+
+        def finish(order_id, pdf, seconds, pid):
+            receipt = receipts.pop(order_id)
+            if not receipt.storage.exists(receipt.path):
+                receipt.storage.save(receipt.path, ContentFile(pdf))
+            write(f"order_{order_id}_receipt.pdf", pdf)
+            self.stats["rendered"] += 1
+            self.per_worker[pid][0] += 1
+            self.per_worker[pid][1] += seconds
+
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_renderer) if workers > 1 else None
+        pending = set()
+        try:
+            for order in orders:
+                receipt = cached_receipt(order)
+                if not self.force and receipt.modified_time() is not None:
+                    pdf, _ = receipt.pdf()
+                    write(f"order_{order.id}_receipt.pdf", pdf)
+                    self.stats["cached"] += 1
+                    continue
+
+                receipts[order.id] = receipt
+                if pool is None:
+                    finish(*_render(order.id, receipt.html))
+                    continue
+
+                pending.add(pool.submit(_render, order.id, receipt.html))
+                # Bounded queue: rendered PDFs are written out as they arrive
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(*future.result())
+
+            for future in wait(pending).done:
+                finish(*future.result())
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
@@ -0,0 +1,182 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.management.commands.benchmark_order_filters import STATUS_WEIGHTS
+from apps.core.models import Customer, DailySales, ItemSales, Order, OrderItem
+from apps.core.sequences import allocate_customer_codes
+from apps.inventory.models import InventoryItem
+from common.models import SentSMS
+
+MAX_CUSTOMERS = 1_000_000  # six phone digits per run prefix
+
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative weights where rank n is picked in proportion to 1 / n**exponent."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates customers, inventory items, orders, order items and SentSMS history at scale with "
+        "chunked bulk_create. A few customers and items take most of the orders (Zipf). Rows skip "
+        "save(): customer codes are reserved per chunk and no SMS is sent. Reports rows/s per table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=20_000)
+        parser.add_argument("--items", type=int, default=1_000)
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--max-lines", type=int, default=5, help="Order items per order, 1 to this.")
+        parser.add_argument("--sms-rate", type=float, default=0.9,
+                            help="Share of orders with a confirmation SMS in the history.")
+        parser.add_argument("--days", type=int, default=365, help="Spread orders over this many days.")
+        parser.add_argument("--item-skew", type=float, default=1.1, help="Zipf exponent of item popularity.")
+        parser.add_argument("--customer-skew", type=float, default=0.8, help="Zipf exponent of orders per customer.")
+        parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per bulk INSERT.")
+        parser.add_argument("--seed", type=int, help="Random seed, for repeatable data.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1 or options["max_lines"] < 1 or options["days"] < 1:
+            raise CommandError("--chunk-size, --max-lines and --days must be at least 1.")
+        if not 1 <= options["customers"] <= MAX_CUSTOMERS or options["items"] < 1 or options["orders"] < 0:
+            raise CommandError(f"--customers must be 1-{MAX_CUSTOMERS}, --items at least 1, --orders at least 0.")
+        if not 0 <= options["sms_rate"] <= 1:
+            raise CommandError("--sms-rate must be between 0 and 1.")
+
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.created = {}
+        started = time.monotonic()
+
+        # A fresh +2547XX block; it also tags the item names so reruns never collide
+        self.prefix = self.free_prefix()
+        customer_ids = self.seed_customers(options["customers"])
+        items = self.seed_items(options["items"])
+        self.seed_orders(customer_ids, items, options)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Customer, InventoryItem, Order, OrderItem, SentSMS, DailySales, ItemSales):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        elapsed = time.monotonic() - started
+        for table, (rows, seconds) in self.created.items():
+            self.stdout.write(f"{table:<12}{rows:>12,} rows  {seconds:8.1f}s  {rows / seconds if seconds else 0:>10,.0f} rows/s")
+        total = sum(rows for rows, _ in self.created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
+
+    def timed(self, table, rows, seconds):
+        done, spent = self.created.get(table, (0, 0.0))
+        self.created[table] = (done + rows, spent + seconds)
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield start, min(self.chunk_size, total - start)
+
+    def free_prefix(self):
+        for prefix in self.rng.sample(range(100), 100):
+            if not Customer.objects.filter(phone_number__startswith=f"+2547{prefix:02d}").exists():
+                return prefix
+        raise CommandError("No free +2547XX phone block left for seeded customers.")
+
+    def seed_customers(self, count):
+        prefix = self.prefix
+        ids = []
+        self.customers = {}  # id -> (name, phone) for the SMS history
+        for start, size in self.chunks(count):
+            began = time.monotonic()
+            with transaction.atomic():
+                codes = allocate_customer_codes(size)  # one UPDATE instead of one per save()
+                created = Customer.objects.bulk_create([
+                    Customer(name=f"Scale customer {prefix:02d}-{n}", code=code, phone_number=f"+2547{prefix:02d}{n:06d}")
+                    for n, code in zip(range(start, start + size), codes)
+                ])
+            for customer in created:
+                ids.append(customer.id)
+                self.customers[customer.id] = (customer.name, customer.phone_number)
+            self.timed("customers", size, time.monotonic() - began)
+        self.rng.shuffle(ids)  # popularity rank independent of id
+        return ids
+
+    def seed_items(self, count):
+        items = []
+        for start, size in self.chunks(count):
+            began = time.monotonic()
+            created = InventoryItem.objects.bulk_create([
+                InventoryItem(
+                    name=f"Scale item {self.prefix:02d}-{n}", price=Decimal(self.rng.randrange(1000, 1_000_000)) / 100,
+                    on_hand=self.rng.randrange(0, 5000), warn_limit=self.rng.choice((0, 5, 10, 25)),
+                )
+                for n in range(start, start + size)
+            ])
+            items += [(item.id, item.price) for item in created]
+            self.timed("items", size, time.monotonic() - began)
+        self.rng.shuffle(items)
+        return items
+
+    def seed_orders(self, customer_ids, items, options):
+        rng = self.rng
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        customer_weights = zipf_cum_weights(len(customer_ids), options["customer_skew"])
+        item_weights = zipf_cum_weights(len(items), options["item_skew"])
+
+        # Chunks go oldest to newest so ids follow timestamps, as in production
+        span = options["days"] * 86400
+        end = timezone.now()
+        start_at = end - timedelta(seconds=span)
+        total = options["orders"]
+        for start, size in self.chunks(total):
+            window_start = start_at + timedelta(seconds=span * start / total)
+            window = span * size / total
+            offsets = sorted(rng.uniform(0, window) for _ in range(size))
+
+            began = time.monotonic()
+            with transaction.atomic():
+                orders = Order.objects.bulk_create([
+                    Order(customer_id=customer_id, status=status, timestamp=window_start + timedelta(seconds=offset))
+                    for customer_id, status, offset in zip(
+                        rng.choices(customer_ids, cum_weights=customer_weights, k=size),
+                        rng.choices(statuses, status_weights, k=size),
+                        offsets,
+                    )
+                ])
+                self.timed("orders", size, time.monotonic() - began)
+
+                began = time.monotonic()
+                lines = []
+                for order in orders:
+                    picked = dict(rng.choices(items, cum_weights=item_weights, k=rng.randint(1, options["max_lines"])))
+                    lines += [
+                        OrderItem(order=order, item_id=item_id, quantity=rng.choices((1, 2, 3, 5), (60, 25, 10, 5))[0],
+                                  price_at_order=price)
+                        for item_id, price in picked.items()
+                    ]
+                for offset in range(0, len(lines), self.chunk_size):
+                    OrderItem.objects.bulk_create(lines[offset:offset + self.chunk_size])
+                self.timed("order items", len(lines), time.monotonic() - began)
+
+                began = time.monotonic()
+                messages = [
+                    SentSMS(
+                        phone_number=self.customers[order.customer_id][1],
+                        message=f"Hi {self.customers[order.customer_id][0]}, your order #{order.id} has been received.",
+                        sent_at=order.timestamp + timedelta(seconds=rng.uniform(1, 30)),
+                        status="Success" if rng.random() < 0.97 else "InvalidPhoneNumber",
+                    )
+                    for order in orders
+                    if rng.random() < options["sms_rate"]
+                ]
+                SentSMS.objects.bulk_create(messages)
+                self.timed("sms", len(messages), time.monotonic() - began)
+            self.stdout.write(f"  {start + size:,}/{total:,} orders", ending="\r")
+        if total:
+            self.stdout.write("")
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+def seed_customer_codes(apps, schema_editor):
+    Customer = apps.get_model('core', 'Customer')
+    CodeSequence = apps.get_model('core', 'CodeSequence')
+    codes = Customer.objects.values_list('code', flat=True)
+    last = max((int(code) for code in codes.iterator() if code and code.isdigit()), default=0)
+    CodeSequence.objects.update_or_create(name='customer_code', defaults={'next_value': last + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_customer_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_codesequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['timestamp', 'id'], name='order_timestamp_id_idx'),
+        ),
+    ]
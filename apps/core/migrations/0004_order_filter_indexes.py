@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_order_timestamp_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'timestamp'], name='order_status_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'timestamp'], name='order_customer_timestamp_idx'),
+        ),
+    ]
@@ -2,13 +2,27 @@
 Defining models for the database
 """
 
-from django.db import models
+from decimal import Decimal
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Prefetch, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from common.models import CustomUser
+from common.mixins import DirtyFieldsMixin
 from django.utils import timezone
 from apps.inventory.models import InventoryItem
 from django.core.exceptions import ValidationError
 from django.conf import settings
 
+# Counters backing generated codes (see apps.core.sequences)
+class CodeSequence(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 # For customers
 class Customer(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, null=True, blank=True)
@@ -27,18 +41,101 @@ class Customer(models.Model):
         if validate:
             self.full_clean()
 
+        from .sequences import next_customer_code, advance_customer_codes
         if not self.code:
-            last = Customer.objects.order_by("-id").first()
-            last_code = int(last.code or "000000") if last else 0
-            self.code = f"{last_code + 1:06d}"
+            self.code = next_customer_code()
+        elif self._state.adding:
+            # Keep the allocator from handing out an explicitly set code again
+            advance_customer_codes(self.code)
 
         super().save(*args, **kwargs)
         
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+# Orders per UPDATE when shifting or recalculating totals; keeps the CASE and IN lists bounded
+TOTALS_BATCH_SIZE = 500
+
+
+def line_totals_subquery():
+    """Sum of the order's lines, for use against an outer Order queryset."""
+    return Subquery(
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(total=Sum(F('quantity') * F('price_at_order'), output_field=MONEY))
+        .values('total'),
+        output_field=MONEY,
+    )
+
+
+class OrderQuerySet(models.QuerySet):
+
+    def with_totals(self):
+        """
+        Annotates `items_total`, the order total computed from its lines in
+        SQL (0 for orders without items). `Order.total` is the stored
+        copy; this is what it is checked and backfilled against.
+        """
+        return self.annotate(
+            items_total=Coalesce(line_totals_subquery(), Value(Decimal('0.00')), output_field=MONEY)
+        )
+
+    def recalculate_totals(self):
+        """Sets `total` from the order lines in one UPDATE. Returns the row count."""
+        return self.update(total=Coalesce(line_totals_subquery(), Value(Decimal('0.00')), output_field=MONEY))
+
+    def shift_totals(self, deltas):
+        """
+        Adds {order_id: amount} to the stored totals in the database, one
+        UPDATE per TOTALS_BATCH_SIZE orders. The addition happens in SQL,
+        so concurrent writers to the same order cannot lose an update.
+        """
+        deltas = [(pk, delta) for pk, delta in deltas.items() if pk is not None and delta]
+        for start in range(0, len(deltas), TOTALS_BATCH_SIZE):
+            batch = deltas[start:start + TOTALS_BATCH_SIZE]
+            shift = Case(
+                *[When(pk=pk, then=Value(delta, output_field=MONEY)) for pk, delta in batch],
+                default=Value(Decimal('0.00'), output_field=MONEY),
+                output_field=MONEY,
+            )
+            self.filter(pk__in=[pk for pk, _ in batch]).update(total=F('total') + shift)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .rollups import SalesDeltas
+        objs = super().bulk_create(objs, *args, **kwargs)
+        sales = SalesDeltas()
+        for order in objs:
+            sales.add_order(order.timestamp, order.status)
+        sales.apply(using=self.db)
+        return objs
+
+    def update(self, **kwargs):
+        if not {'status', 'timestamp'} & kwargs.keys():
+            return super().update(**kwargs)
+        from .rollups import SalesDeltas
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = sorted(self.values_list('pk', flat=True))
+            batches = [pks[start:start + TOTALS_BATCH_SIZE] for start in range(0, len(pks), TOTALS_BATCH_SIZE)]
+            sales = SalesDeltas()
+            for batch in batches:
+                sales.add_orders(Order.objects.using(self.db).filter(pk__in=batch), sign=-1)
+            rows = super().update(**kwargs)
+            for batch in batches:
+                sales.add_orders(Order.objects.using(self.db).filter(pk__in=batch))
+            sales.apply(using=self.db)
+        return rows
+
+    def with_items(self):
+        """
+        Prefetches items together with their inventory item.
+        """
+        return self.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('item').order_by('id'))
+        )
+
 # For orders
-class Order(models.Model):
+class Order(DirtyFieldsMixin, models.Model):
 
     class Status(models.TextChoices):
         CREATED = 'CREATED', 'Created'
@@ -52,38 +149,238 @@ class Order(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)  # deprecated
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.CREATED)
     timestamp = models.DateTimeField(default=timezone.now)
+    # Sum of the order's lines, kept in step by OrderItem and OrderItemQuerySet writes
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (timestamp, id)
+            models.Index(fields=['timestamp', 'id'], name='order_timestamp_id_idx'),
+            # Orders API filters, see OrderFilterForm
+            models.Index(fields=['status', 'timestamp'], name='order_status_timestamp_idx'),
+            models.Index(fields=['customer', 'timestamp'], name='order_customer_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer.name} | {self.status}"
 
     @property
     def total_price(self):
-        return sum(item.quantity * item.price_at_order for item in self.items.all())
+        return self.total
 
-    def save(self, *args, **kwargs):
-        status_changed = False
+    def _sales_key(self):
+        """(timestamp, status) as stored, which is what the sales rollups are keyed on."""
+        loaded = self.__dict__.get('_loaded_values') or {}
+        return loaded.get('timestamp', self.timestamp), loaded.get('status', self.status)
 
-        if self.pk:
-            previous = Order.objects.filter(pk=self.pk).first()
-            if previous and previous.status != self.status:
-                status_changed = True
+    def _shift_total(self, delta):
+        """Applies a change already written in SQL to this instance, without marking it dirty."""
+        if 'total' not in self.__dict__:
+            return  # deferred; the next read gets the stored value
+        self.total += delta
+        loaded = self.__dict__.get('_loaded_values')
+        if loaded is not None and 'total' in loaded:
+            loaded['total'] = self.total
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        from .rollups import SalesDeltas
+        adding = self._state.adding
+        # Compared against the loaded value; no extra SELECT
+        status_changed = not adding and self.has_changed('status')
+        moved = None
+        if not adding and (status_changed or self.has_changed('timestamp')):
+            loaded = self.__dict__.get('_loaded_values') or {}
+            if {'timestamp', 'status'} <= loaded.keys():
+                moved = (loaded['timestamp'], loaded['status'])
+            else:
+                moved = Order.objects.filter(pk=self.pk).values_list('timestamp', 'status').first()
+
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+            sales = SalesDeltas()
+            if adding:
+                sales.add_order(self.timestamp, self.status)
+            elif moved and (timezone.localdate(moved[0]), moved[1]) != (timezone.localdate(self.timestamp), self.status):
+                sales.move_order(self.pk, moved, (self.timestamp, self.status))
+            sales.apply(using=kwargs.get('using'))
 
         if status_changed:
+            from .receipts import invalidate_receipts
+            invalidate_receipts(self.pk)
+
             from common.utils import send_order_status_sms  
             send_order_status_sms(self)
 
+
+class OrderItemQuerySet(models.QuerySet):
+    """
+    Bulk writes that keep `Order.total` and the sales rollups correct.
+    bulk_create shifts the totals by the new lines; update and delete
+    recalculate the affected orders from their lines, and update moves the
+    lines' rollup contribution from what they were to what they are
+    (deletes are tracked by the receivers in apps.core.rollups). Django's
+    bulk_update goes through update() one batch at a time.
+    """
+
+    TOTAL_FIELDS = {'order', 'order_id', 'quantity', 'price_at_order'}
+    SALES_FIELDS = TOTAL_FIELDS | {'item', 'item_id'}
+
+    def bulk_create(self, objs, *args, update_totals=True, **kwargs):
+        """
+        Pass update_totals=False when the orders were created with these
+        lines' sum already in `total`, to skip the extra UPDATE.
+        """
+        from .rollups import SalesDeltas
+        objs = super().bulk_create(objs, *args, **kwargs)
+        sales = SalesDeltas()
+        for obj in objs:
+            sales.add_line(obj.order_id, obj.item_id, obj.quantity, obj.price_at_order)
+        sales.apply(known_orders=[obj._cached_order() for obj in objs], using=self.db)
+        if not update_totals:
+            return objs
+        deltas = defaultdict(Decimal)
+        for obj in objs:
+            deltas[obj.order_id] += obj.total_price
+        Order.objects.using(self.db).shift_totals(deltas)
+        for obj in objs:
+            obj._shift_cached_order({obj.order_id: obj.total_price})
+        return objs
+
+    def update(self, **kwargs):
+        if not self.SALES_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        from .rollups import SalesDeltas
+        with transaction.atomic(using=self.db, savepoint=False):
+            stored = sorted(self.values_list('pk', 'order_id'))
+            pks = [pk for pk, _ in stored]
+            order_ids = {order_id for _, order_id in stored}
+            batches = [pks[start:start + TOTALS_BATCH_SIZE] for start in range(0, len(pks), TOTALS_BATCH_SIZE)]
+            lines = self.model.objects.using(self.db)
+            sales = SalesDeltas()
+            for batch in batches:
+                sales.add_lines(lines.filter(pk__in=batch), sign=-1)
+            rows = super().update(**kwargs)
+            for batch in batches:
+                sales.add_lines(lines.filter(pk__in=batch))
+                if {'order', 'order_id'} & kwargs.keys():
+                    order_ids.update(lines.filter(pk__in=batch).values_list('order_id', flat=True))
+            recalculate_order_totals(order_ids, using=self.db)
+            sales.apply(using=self.db)
+        return rows
+
+    def delete(self):
+        # The rollups are moved by the delete receivers in apps.core.rollups
+        with transaction.atomic(using=self.db, savepoint=False):
+            order_ids = set(self.values_list('order_id', flat=True))
+            result = super().delete()
+            recalculate_order_totals(order_ids, using=self.db)
+        return result
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+def recalculate_order_totals(order_ids, using=None):
+    order_ids = sorted(order_ids)
+    orders = Order.objects.using(using) if using else Order.objects
+    for start in range(0, len(order_ids), TOTALS_BATCH_SIZE):
+        orders.filter(pk__in=order_ids[start:start + TOTALS_BATCH_SIZE]).recalculate_totals()
+
+
 # Ordered items
-class OrderItem(models.Model):
+class OrderItem(DirtyFieldsMixin, models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField()
     price_at_order = models.DecimalField(max_digits=10, decimal_places=2)
 
+    objects = OrderItemQuerySet.as_manager()
+
+    STORED_FIELDS = ('order_id', 'item_id', 'quantity', 'price_at_order')
+
     def __str__(self):
         return f"{self.item.name} x {self.quantity}"
 
     @property
     def total_price(self):
         return self.quantity * self.price_at_order
+
+    def _stored_line(self):
+        """
+        The line as last loaded or saved, {order_id, item_id, quantity,
+        price_at_order}; read from the database when it was not loaded
+        through the ORM, None if it is not there.
+        """
+        loaded = self.__dict__.get('_loaded_values') or {}
+        if set(self.STORED_FIELDS) <= loaded.keys():
+            return {name: loaded[name] for name in self.STORED_FIELDS}
+        return OrderItem.objects.filter(pk=self.pk).values(*self.STORED_FIELDS).first()
+
+    def _cached_order(self):
+        field = self._meta.get_field('order')
+        return field.get_cached_value(self) if field.is_cached(self) else None
+
+    def _shift_cached_order(self, deltas):
+        order = self._cached_order()
+        if order is not None and order.pk in deltas:
+            order._shift_total(deltas[order.pk])
+
+    def _write(self, stored, current, track_sales=True):
+        """Shifts totals and rollups from the `stored` line to the `current` one (either may be None)."""
+        from .rollups import SalesDeltas
+        deltas = defaultdict(Decimal)
+        sales = SalesDeltas()
+        for line, sign in ((stored, -1), (current, 1)):
+            if line is not None:
+                deltas[line['order_id']] += sign * line['quantity'] * line['price_at_order']
+                sales.add_line(line['order_id'], line['item_id'], line['quantity'], line['price_at_order'], sign)
+        Order.objects.shift_totals(deltas)
+        if track_sales:
+            sales.apply(known_orders=[self._cached_order()])
+        return deltas
+
+    def save(self, *args, **kwargs):
+        stored = None if self._state.adding else self._stored_line()
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+            deltas = self._write(stored, {name: getattr(self, name) for name in self.STORED_FIELDS})
+        self._shift_cached_order(deltas)
+
+    def delete(self, *args, **kwargs):
+        stored = self._stored_line()
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            result = super().delete(*args, **kwargs)
+            deltas = self._write(stored, None, track_sales=False)  # the delete receivers move the rollups
+        self._shift_cached_order(deltas)
+        return result
+
+
+# Sales rollups, kept up to date by the writes above (see apps.core.rollups)
+class DailySales(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    orders = models.IntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day', 'status'], name='dailysales_day_status_uniq')]
+        verbose_name_plural = 'daily sales'
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.orders} orders, Ksh {self.revenue}"
+
+
+class ItemSales(models.Model):
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['item', 'status'], name='itemsales_item_status_uniq')]
+        verbose_name_plural = 'item sales'
+
+    def __str__(self):
+        return f"{self.item_id} {self.status}: {self.units} units, Ksh {self.revenue}"
@@ -0,0 +1,84 @@
+"""
+WeasyPrint rendering with per-process caches.
+
+Parsing a stylesheet and setting up fonts costs more than laying out a
+short document, so both are done once per worker: stylesheets live in
+static files (core/pdf/*.css), are parsed on first use and kept, and
+every render shares one FontConfiguration. `warm_up` does all of that
+(plus one throwaway render) before a worker takes traffic; see
+gunicorn.conf.py. WeasyPrint itself is only imported on first use, so
+processes that never render a PDF don't pay for loading it.
+"""
+
+import hashlib
+import time
+
+from django.contrib.staticfiles import finders
+
+from common.metrics import PDF_RENDER_SECONDS
+from common.profiling import span
+
+STYLESHEETS = ('receipt', 'statement')
+
+_font_config = None
+_stylesheets = {}
+_versions = {}
+
+
+def font_config():
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def stylesheet_path(name):
+    path = finders.find(f"core/pdf/{name}.css")
+    if path is None:
+        raise LookupError(f"No PDF stylesheet named {name}")
+    return path
+
+
+def stylesheet(name):
+    """The parsed core/pdf/<name>.css, cached for the life of the process."""
+    if name not in _stylesheets:
+        from weasyprint import CSS
+        _stylesheets[name] = CSS(filename=stylesheet_path(name), font_config=font_config())
+    return _stylesheets[name]
+
+
+def stylesheet_version(name):
+    """Short hash of the stylesheet's source, for cache keys."""
+    if name not in _versions:
+        with open(stylesheet_path(name), 'rb') as source:
+            _versions[name] = hashlib.sha256(source.read()).hexdigest()[:12]
+    return _versions[name]
+
+
+def render_pdf(html, stylesheets=(), target=None):
+    """
+    Lays out `html` once with the named cached stylesheets. Returns the PDF
+    bytes, or writes them to `target` (a path or file object).
+    """
+    from weasyprint import HTML
+    document = stylesheets[0] if stylesheets else "other"
+    with span("pdf"), PDF_RENDER_SECONDS.labels(document=document).time():
+        return HTML(string=html).write_pdf(
+            target,
+            stylesheets=[stylesheet(name) for name in stylesheets],
+            font_config=font_config(),
+        )
+
+
+def warm_up():
+    """
+    Parses every stylesheet and runs one small render so fonts are loaded
+    before the first real request. Returns the seconds it took.
+    """
+    started = time.perf_counter()
+    for name in STYLESHEETS:
+        stylesheet(name)
+        stylesheet_version(name)
+    render_pdf("<p>warm-up</p>", stylesheets=STYLESHEETS)
+    return time.perf_counter() - started
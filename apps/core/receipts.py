@@ -0,0 +1,91 @@
+"""
+Receipt PDFs, cached by content.
+
+A receipt is keyed by a hash of its rendered HTML and stylesheet, so any
+change to the order, its items, the template or the CSS gives a new key
+and a fresh PDF, while repeat downloads reuse the stored file. Files live in the "receipts"
+storage (settings.STORAGES) under order_<id>/<key>.pdf; storing a new key
+deletes the order's older ones, which no download can ask for again. The key doubles
+as the HTTP ETag. Rendering goes through apps.core.pdf, which keeps the
+receipt stylesheet parsed and the font configuration loaded.
+"""
+
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.template.loader import render_to_string
+
+from . import pdf
+
+TEMPLATE = "core/order_receipt.html"
+STYLESHEET = "receipt"
+
+
+def receipt_storage():
+    return storages["receipts"]
+
+
+def render_receipt_html(order):
+    return render_to_string(TEMPLATE, {"order": order})
+
+
+def render_pdf(html):
+    return pdf.render_pdf(html, stylesheets=[STYLESHEET])
+
+
+class CachedReceipt:
+    """
+    The receipt for one rendered order. Rendering the HTML is cheap; the
+    PDF layout is only run by `pdf()` when the file is not stored yet.
+    """
+
+    def __init__(self, order_id, html):
+        self.order_id = order_id
+        self.html = html
+        digest = hashlib.sha256(html.encode("utf-8"))
+        digest.update(pdf.stylesheet_version(STYLESHEET).encode())  # restyled receipts are new receipts
+        self.key = digest.hexdigest()[:32]
+        self.path = f"order_{order_id}/{self.key}.pdf"
+        self.storage = receipt_storage()
+
+    @property
+    def etag(self):
+        return f'"{self.key}"'
+
+    def modified_time(self):
+        """When the stored PDF was rendered, or None if it is not stored."""
+        try:
+            return self.storage.get_modified_time(self.path)
+        except (FileNotFoundError, NotImplementedError):
+            return None
+
+    def pdf(self):
+        """Returns (pdf bytes, modified time), rendering and storing on a miss."""
+        try:
+            with self.storage.open(self.path, "rb") as stored:
+                return stored.read(), self.storage.get_modified_time(self.path)
+        except FileNotFoundError:
+            pass
+        content = render_pdf(self.html)
+        # A concurrent render of the same key wrote identical bytes; keep theirs
+        if not self.storage.exists(self.path):
+            self.storage.save(self.path, ContentFile(content))
+            invalidate_receipts(self.order_id, keep=f"{self.key}.pdf")
+        return content, self.storage.get_modified_time(self.path)
+
+
+def cached_receipt(order):
+    return CachedReceipt(order.id, render_receipt_html(order))
+
+
+def invalidate_receipts(order_id, keep=None):
+    """Deletes every stored receipt for the order, except the file named `keep`."""
+    storage = receipt_storage()
+    try:
+        _, files = storage.listdir(f"order_{order_id}")
+    except FileNotFoundError:
+        return
+    for name in files:
+        if name != keep:
+            storage.delete(f"order_{order_id}/{name}")
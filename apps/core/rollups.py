@@ -0,0 +1,303 @@
+"""
+Sales rollups: DailySales (per local day and order status) and ItemSales
+(per inventory item and order status), each with units and revenue, plus
+the order count per day.
+
+The order and order item write paths collect signed changes in a
+SalesDeltas and `apply()` them; the changes are written when the current
+transaction commits, so no transaction holds the lock on today's hot
+DailySales row while it does other work, and changes made in a rolled
+back savepoint are dropped with it. Inside a `batch()` block the
+changes that commit are merged and written once, so a checkout's order
+and lines cost one upsert per table. The upserts are INSERT ... ON
+CONFLICT DO UPDATE, so concurrent checkouts add to the same row without
+reading it first. A write that still fails after WRITE_ATTEMPTS raises
+to whoever committed; the orders are committed by then, and the drift
+is left for the rebuild command.
+Deletes, including cascades from a deleted customer, are tracked by the
+pre_delete/post_delete receivers below. Raw SQL is not tracked; `manage.py
+rebuild_sales_rollups` recomputes everything from the orders.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+
+from django.db import OperationalError, connections, router, transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import MONEY, TOTALS_BATCH_SIZE, DailySales, ItemSales, Order, OrderItem
+
+ZERO = Decimal('0.00')
+WRITE_ATTEMPTS = 3
+
+
+class _Registry(threading.local):
+    """Per-thread state, keyed by database alias."""
+
+    def __init__(self):
+        self.batches = defaultdict(int)  # open batch() blocks
+        self.committed = {}              # SalesDeltas committed inside a batch, waiting for its flush
+        self.deleting = {}               # (origin, SalesDeltas, orders) of the delete in progress
+
+
+_registry = _Registry()
+
+
+def sales_day(timestamp):
+    return timezone.localdate(timestamp)
+
+
+class SalesDeltas:
+    """Signed rollup changes, applied together with `apply()`."""
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: [0, 0, ZERO])   # (day, status) -> [orders, units, revenue]
+        self.items = defaultdict(lambda: [0, ZERO])      # (item_id, status) -> [units, revenue]
+        self.lines = defaultdict(lambda: [0, ZERO])      # (order_id, item_id) -> [units, revenue], order not resolved yet
+
+    def add_order(self, timestamp, status, sign=1):
+        self.daily[sales_day(timestamp), status][0] += sign
+
+    def add_line(self, order_id, item_id, quantity, price, sign=1):
+        line = self.lines[order_id, item_id]
+        line[0] += sign * quantity
+        line[1] += sign * quantity * price
+
+    def _add(self, day, status, item_id, units, revenue):
+        daily = self.daily[day, status]
+        daily[1] += units
+        daily[2] += revenue
+        item = self.items[item_id, status]
+        item[0] += units
+        item[1] += revenue
+
+    def move_order(self, order_id, old, new):
+        """Moves an order and its lines from (timestamp, status) `old` to `new`. One query."""
+        self.add_order(*old, sign=-1)
+        self.add_order(*new)
+        lines = (
+            OrderItem.objects.filter(order_id=order_id).values('item_id')
+            .annotate(units=Sum('quantity'), revenue=Sum(F('quantity') * F('price_at_order'), output_field=MONEY))
+        )
+        for line in lines:
+            self._add(sales_day(old[0]), old[1], line['item_id'], -line['units'], -line['revenue'])
+            self._add(sales_day(new[0]), new[1], line['item_id'], line['units'], line['revenue'])
+
+    def add_lines(self, lines, sign=1):
+        """Adds (or with sign=-1 removes) an OrderItem queryset, aggregated in SQL. Two queries."""
+        money = Sum(F('quantity') * F('price_at_order'), output_field=MONEY)
+        by_day = (
+            lines.annotate(day=TruncDate('order__timestamp')).values('day', 'order__status')
+            .annotate(units=Sum('quantity'), revenue=money).order_by()
+        )
+        for row in by_day:
+            daily = self.daily[row['day'], row['order__status']]
+            daily[1] += sign * row['units']
+            daily[2] += sign * row['revenue']
+        by_item = lines.values('item_id', 'order__status').annotate(units=Sum('quantity'), revenue=money).order_by()
+        for row in by_item:
+            item = self.items[row['item_id'], row['order__status']]
+            item[0] += sign * row['units']
+            item[1] += sign * row['revenue']
+
+    def add_orders(self, orders, sign=1):
+        """Adds (or removes) an Order queryset with all its lines. Three queries."""
+        counts = orders.annotate(day=TruncDate('timestamp')).values('day', 'status').annotate(count=Count('pk')).order_by()
+        for row in counts:
+            self.daily[row['day'], row['status']][0] += sign * row['count']
+        self.add_lines(OrderItem.objects.filter(order__in=orders.values('pk')), sign)
+
+    def _resolve_lines(self, known_orders):
+        """Turns the per-order line changes into day/status and item/status changes."""
+        pending = {key: change for key, change in self.lines.items() if any(change)}
+        self.lines.clear()
+        if not pending:
+            return
+        keys = {order.pk: order._sales_key() for order in known_orders if order is not None and order.pk}
+        missing = sorted({order_id for order_id, _ in pending} - keys.keys())
+        for start in range(0, len(missing), TOTALS_BATCH_SIZE):
+            rows = Order.objects.filter(pk__in=missing[start:start + TOTALS_BATCH_SIZE]).values_list('pk', 'timestamp', 'status')
+            keys.update((pk, (timestamp, status)) for pk, timestamp, status in rows)
+        for (order_id, item_id), (units, revenue) in pending.items():
+            if order_id in keys:
+                timestamp, status = keys[order_id]
+                self._add(sales_day(timestamp), status, item_id, units, revenue)
+
+    def apply(self, known_orders=(), using=None):
+        """
+        Resolves the line changes now and writes everything when the
+        current transaction commits (immediately outside one); at most one
+        statement per table for every TOTALS_BATCH_SIZE rows.
+        `known_orders` are Order instances whose stored day and status can
+        be used without a lookup.
+        """
+        self._resolve_lines(known_orders)
+        using = using or router.db_for_write(DailySales)
+        changes = SalesDeltas()
+        changes.merge(self)
+        if _registry.batches[using]:
+            transaction.on_commit(partial(_collect, using, changes), using=using)
+        else:
+            transaction.on_commit(partial(changes.write_committed, using), using=using)
+
+    def merge(self, other):
+        for key, change in other.daily.items():
+            self.daily[key] = [mine + theirs for mine, theirs in zip(self.daily[key], change)]
+        for key, change in other.items.items():
+            self.items[key] = [mine + theirs for mine, theirs in zip(self.items[key], change)]
+        other.daily.clear()
+        other.items.clear()
+
+    def write(self, using=None):
+        """Writes the resolved changes now."""
+        using = using or router.db_for_write(DailySales)
+        daily = [(day, status, *change) for (day, status), change in self.daily.items() if any(change)]
+        items = [(item_id, status, *change) for (item_id, status), change in self.items.items() if any(change)]
+        increment(DailySales, ('day', 'status'), ('orders', 'units', 'revenue'), daily, using)
+        increment(ItemSales, ('item', 'status'), ('units', 'revenue'), items, using)
+
+    def write_committed(self, using):
+        """
+        Writes the changes in a transaction of their own, for an on_commit
+        callback. Retries OperationalError (deadlocks, serialization
+        failures); the last one propagates.
+        """
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                # Runs after the commit, so this is the outermost block
+                with transaction.atomic(using=using, savepoint=False):
+                    self.write(using)
+                return
+            except OperationalError:
+                if attempt == WRITE_ATTEMPTS:
+                    raise
+
+
+@contextmanager
+def batch(using=None):
+    """
+    Merges the rollup changes applied inside the block that commit, and
+    writes them once when the transaction around the block commits.
+    Blocks nest; only the outermost one writes.
+    """
+    using = using or router.db_for_write(DailySales)
+    _registry.batches[using] += 1
+    try:
+        yield
+    finally:
+        _registry.batches[using] -= 1
+        if not _registry.batches[using]:
+            transaction.on_commit(partial(_flush, using), using=using)
+
+
+def _collect(using, changes):
+    _registry.committed.setdefault(using, SalesDeltas()).merge(changes)
+
+
+def _flush(using):
+    changes = _registry.committed.pop(using, None)
+    if changes is not None:
+        changes.write_committed(using)
+
+
+def _deleting(using, origin):
+    """The changes of the delete started by `origin`; a left over one (its delete failed) is dropped."""
+    deleting = _registry.deleting.get(using)
+    if deleting is None or deleting[0] is not origin:
+        deleting = _registry.deleting[using] = (origin, SalesDeltas(), [])
+    return deleting
+
+
+# The deletion Collector sends pre_delete for every instance before deleting
+# any, lines before their orders; the first post_delete applies them all.
+@receiver(pre_delete, sender=Order)
+def _order_deleting(sender, instance, using, origin=None, **kwargs):
+    _, sales, orders = _deleting(using, origin)
+    sales.add_order(*instance._sales_key(), sign=-1)
+    orders.append(instance)
+
+
+@receiver(pre_delete, sender=OrderItem)
+def _line_deleting(sender, instance, using, origin=None, **kwargs):
+    line = instance._stored_line()
+    if line is not None:
+        _, sales, _ = _deleting(using, origin)
+        sales.add_line(line['order_id'], line['item_id'], line['quantity'], line['price_at_order'], sign=-1)
+
+
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=OrderItem)
+def _deleted(sender, using, origin=None, **kwargs):
+    deleting = _registry.deleting.pop(using, None)
+    if deleting is not None and deleting[0] is origin:
+        _, sales, orders = deleting
+        sales.apply(known_orders=orders, using=using)
+
+
+def increment(model, key_fields, counter_fields, rows, using):
+    """
+    Upserts `rows` of (*keys, *counters), adding the counters to an existing
+    row with the same keys:
+
+        INSERT ... ON CONFLICT (keys) DO UPDATE SET n = table.n + EXCLUDED.n
+    """
+    if not rows:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    table = quote(meta.db_table)
+    fields = [meta.get_field(name) for name in (*key_fields, *counter_fields)]
+    keys = ", ".join(quote(meta.get_field(name).column) for name in key_fields)
+    updates = ", ".join(
+        f"{quote(field.column)} = {table}.{quote(field.column)} + EXCLUDED.{quote(field.column)}"
+        for field in fields[len(key_fields):]
+    )
+    row_sql = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), TOTALS_BATCH_SIZE):
+            batch = rows[start:start + TOTALS_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+                f"VALUES {', '.join([row_sql] * len(batch))} "
+                f"ON CONFLICT ({keys}) DO UPDATE SET {updates}",
+                [field.get_db_prep_save(value, connection) for row in batch for field, value in zip(fields, row)],
+            )
+
+
+def rebuild():
+    """
+    Recomputes both rollup tables from all orders: three aggregate queries
+    plus the inserts. Run inside a transaction.
+    """
+    DailySales.objects.all().delete()
+    ItemSales.objects.all().delete()
+    sales = SalesDeltas()
+    sales.add_orders(Order.objects.all())
+    sales.write()  # in this transaction, not after it
+
+
+def drift():
+    """
+    (day/status rows, item/status rows) whose stored values differ from a
+    fresh computation. Read only.
+    """
+    fresh = SalesDeltas()
+    fresh.add_orders(Order.objects.all())
+    stored_daily = {(row.day, row.status): [row.orders, row.units, row.revenue] for row in DailySales.objects.all()}
+    stored_items = {(row.item_id, row.status): [row.units, row.revenue] for row in ItemSales.objects.all()}
+
+    def differing(fresh_rows, stored_rows, zero):
+        return sum(
+            1 for key in fresh_rows.keys() | stored_rows.keys()
+            if list(fresh_rows.get(key, zero)) != list(stored_rows.get(key, zero))
+        )
+
+    return differing(fresh.daily, stored_daily, [0, 0, ZERO]), differing(fresh.items, stored_items, [0, ZERO])
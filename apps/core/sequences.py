@@ -0,0 +1,129 @@
+"""
+Allocation of sequential codes (customer codes) from a counter row.
+
+Values are reserved with a single `UPDATE ... RETURNING` on CodeSequence,
+so concurrent registrations never get the same code and no SELECT on
+Customer is needed. Each process reserves a block of codes at a time and
+hands them out from memory; bulk imports reserve all their codes in one
+statement with `allocate_customer_codes`.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.functions import Greatest
+
+from .models import CodeSequence
+
+CUSTOMER_CODE = "customer_code"
+CUSTOMER_CODE_WIDTH = 6
+
+
+def reserve(name, count):
+    """
+    Reserves `count` consecutive values of sequence `name` and returns them
+    as a range. The counter row is created on first use.
+    """
+    table = connection.ops.quote_name(CodeSequence._meta.db_table)
+    sql = (
+        f"UPDATE {table} SET next_value = next_value + %s "
+        f"WHERE name = %s RETURNING next_value"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [count, name])
+        row = cursor.fetchone()
+        if row is None:
+            CodeSequence.objects.bulk_create([CodeSequence(name=name)], ignore_conflicts=True)
+            cursor.execute(sql, [count, name])
+            row = cursor.fetchone()
+    end = row[0]
+    return range(end - count, end)
+
+
+def advance(name, value):
+    """
+    Moves sequence `name` past `value` if it has not got there yet. One
+    UPDATE once the counter row exists.
+    """
+    if not CodeSequence.objects.filter(name=name).update(next_value=Greatest('next_value', value + 1)):
+        CodeSequence.objects.bulk_create([CodeSequence(name=name)], ignore_conflicts=True)
+        CodeSequence.objects.filter(name=name).update(next_value=Greatest('next_value', value + 1))
+
+
+class BlockAllocator:
+    """
+    Hands out values of one sequence from a block reserved per process.
+
+    Inside a transaction a block could be rolled back after other values
+    from it were handed out, so there values are reserved one at a time
+    and roll back together with whatever used them.
+    """
+
+    def __init__(self, name, block_size):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._next = self._end = 0  # the block still to hand out is [_next, _end)
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self.reset()  # forked: the parent's block is not ours
+
+    def next(self):
+        if connection.in_atomic_block:
+            return reserve(self.name, 1)[0]
+        with self._lock:
+            self._check_fork()
+            if self._next >= self._end:
+                block = reserve(self.name, self.block_size)
+                self._next, self._end = block.start, block.stop
+            value = self._next
+            self._next += 1
+            return value
+
+    def skip(self, value):
+        """
+        Makes sure `value` is never handed out later. Below the block it
+        was allocated already and inside it is skipped in memory; only a
+        value above the block moves the sequence (see `advance`).
+        """
+        with self._lock:
+            self._check_fork()
+            if value < self._next:
+                return
+            if value < self._end:
+                self._next = value + 1
+                return
+        advance(self.name, value)
+
+
+customer_codes = BlockAllocator(CUSTOMER_CODE, getattr(settings, "CUSTOMER_CODE_BLOCK_SIZE", 20))
+
+
+def format_customer_code(value):
+    return f"{value:0{CUSTOMER_CODE_WIDTH}d}"
+
+
+def next_customer_code():
+    return format_customer_code(customer_codes.next())
+
+
+def allocate_customer_codes(count):
+    """
+    Reserves `count` customer codes with one statement, for bulk creates.
+    """
+    return [format_customer_code(value) for value in reserve(CUSTOMER_CODE, count)]
+
+
+def advance_customer_codes(code):
+    """
+    Makes sure an explicitly assigned code is never allocated later.
+    """
+    if code.isdigit():
+        customer_codes.skip(int(code))
@@ -0,0 +1,134 @@
+"""
+Order placement logic shared by the checkout views
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+
+from apps.inventory.models import InventoryItem
+from common.metrics import ORDER_PLACEMENT_SECONDS, ORDERS_PLACED, STOCK_DECREMENT_CONFLICTS
+from . import rollups
+from .models import Order, OrderItem
+
+
+@dataclass
+class OrderPlacement:
+    """
+    Outcome of a checkout: the created order (None if nothing could be
+    placed) plus the cart lines that were skipped and the items that are
+    now at or below their warn limit.
+    """
+    order: Order = None
+    lines: list = field(default_factory=list)
+    missing_ids: list = field(default_factory=list)
+    invalid_ids: list = field(default_factory=list)
+    short_items: list = field(default_factory=list)
+    low_stock: list = field(default_factory=list)
+
+    @property
+    def total(self):
+        return sum((line.total_price for line in self.lines), Decimal("0.00"))
+
+    @property
+    def summary(self):
+        return [f"{line.item.name} x{line.quantity}" for line in self.lines]
+
+
+def parse_cart(cart):
+    """
+    Turns the checkout cart ([{"id": .., "qty": ..}, ...]) into a list of
+    (item_id, qty) pairs. Lines with a non-numeric id or quantity, or a
+    quantity below one, are returned separately.
+    """
+    lines, invalid = [], []
+    for entry in cart:
+        try:
+            item_id = int(entry['id'])
+            qty = int(entry['qty'])
+        except (KeyError, TypeError, ValueError):
+            invalid.append(entry.get('id') if isinstance(entry, dict) else entry)
+            continue
+        if qty < 1:
+            invalid.append(item_id)
+            continue
+        lines.append((item_id, qty))
+    return lines, invalid
+
+
+@ORDER_PLACEMENT_SECONDS.time()
+def place_order(customer, cart):
+    """
+    Places an order for `customer` from a checkout cart in one transaction.
+
+    All inventory rows are loaded with a single `in_bulk` query, stock is
+    checked for the whole cart, and the stock changes, the order and its
+    items are written with one statement each. Lines that refer to unknown
+    items or exceed the available stock are skipped, matching the checkout
+    form's behaviour. No SMS is sent from here; the
+    caller decides what to notify once the transaction has committed.
+    """
+    lines, invalid_ids = parse_cart(cart)
+    placement = OrderPlacement(invalid_ids=invalid_ids)
+    if not lines:
+        return placement
+
+    inventory = InventoryItem.objects.in_bulk({item_id for item_id, _ in lines})
+
+    # First pass against the snapshot we just read, so repeated lines for the
+    # same item are checked against what earlier lines already took.
+    wanted = {}
+    accepted = []
+    for item_id, qty in lines:
+        inventory_item = inventory.get(item_id)
+        if inventory_item is None:
+            placement.missing_ids.append(item_id)
+            continue
+
+        if inventory_item.on_hand - wanted.get(item_id, 0) < qty:
+            placement.short_items.append(inventory_item)
+            continue
+
+        wanted[item_id] = wanted.get(item_id, 0) + qty
+        accepted.append((inventory_item, qty))
+
+    if not accepted:
+        return placement
+
+    # One rollup upsert per table for the order and its lines, after commit
+    with transaction.atomic(), rollups.batch():
+        # The database has the final say: anything sold by a concurrent
+        # checkout since the read above fails the conditional UPDATE here.
+        taken = InventoryItem.objects.decrement_stock(wanted)
+
+        for inventory_item, qty in accepted:
+            result = taken[inventory_item.id]
+            if not result.ok:
+                STOCK_DECREMENT_CONFLICTS.inc()
+                if inventory_item not in placement.short_items:
+                    placement.short_items.append(inventory_item)
+                continue
+
+            inventory_item.on_hand = result.on_hand
+            placement.lines.append(OrderItem(
+                item=inventory_item,
+                quantity=qty,
+                price_at_order=inventory_item.price,
+            ))
+
+        if not placement.lines:
+            return placement
+
+        # The total is known up front; amount is the deprecated copy (for compatibility)
+        order = Order.objects.create(customer=customer, total=placement.total, amount=placement.total)
+        for line in placement.lines:
+            line.order = order
+        OrderItem.objects.bulk_create(placement.lines, update_totals=False)
+
+    placement.order = order
+    ORDERS_PLACED.labels(source="checkout").inc()
+    # Every sale of a low item is reported; the stock alert coalescing
+    # (SMS_STOCK_ALERT_WINDOW) decides how many messages that becomes
+    placement.low_stock = [inventory[pk] for pk, result in taken.items() if result.below_warn_limit]
+    return placement
@@ -1,13 +1,15 @@
 from django.urls import path
 from .views import order_receipt_pdf, inventory_summary_view, order_summary_view, manual_login_view, admin_dashboard_view
-from .views import run_migrations_view, home_view, CustomerListCreateAPIView, OrderListCreateAPIView 
-from .views import  register_customer_view, order_form_view, logout_view, login_redirect_view
+from .views import run_migrations_view, home_view, CustomerListCreateAPIView, OrderListCreateAPIView, OrderRetrieveAPIView
+from .views import  register_customer_view, order_form_view, logout_view, login_redirect_view, export_view
+from .views import customer_statement_pdf
 
 urlpatterns = [
     path('', home_view, name='home'),
     path('register/', register_customer_view, name='register_customer'),
     path('customers/', CustomerListCreateAPIView.as_view(), name='customer-list-create'),
     path('orders/', OrderListCreateAPIView.as_view(), name='order-list-create'),
+    path('orders/<int:pk>/', OrderRetrieveAPIView.as_view(), name='order-detail'),
     path('create-order/', order_form_view, name='order_form'),
     path('login-redirect/', login_redirect_view, name='login_redirect'),
     path("run-migrations/", run_migrations_view, name="run_migrations"),
@@ -17,4 +19,6 @@ urlpatterns = [
     path('dashboard/inventory/', inventory_summary_view, name='inventory_summary'),
     path('dashboard/orders/', order_summary_view, name='order_summary'),
     path('orders/<int:order_id>/receipt/', order_receipt_pdf, name='order_receipt_pdf'),
+    path('exports/<str:dataset>/', export_view, name='export'),
+    path('customers/<int:customer_id>/statement/', customer_statement_pdf, name='customer_statement_pdf'),
 ]
\ No newline at end of file
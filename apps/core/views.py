@@ -2,38 +2,82 @@
 Views for the API methods and user interface
 """
 
-from django.http import HttpResponseForbidden, HttpResponse
+from django.http import HttpResponseForbidden, HttpResponse, HttpResponseBadRequest, Http404, FileResponse
 from django.contrib.auth import logout, authenticate, login, get_backends
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from rest_framework import generics
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
 from django.conf import settings
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 # from django.core.management import call_command
-from .models import Customer, Order, OrderItem
-from .forms import CustomerRegistrationForm # OrderForm, ITEM_CHOICES
+from .models import MONEY, Customer, DailySales, ItemSales, Order, OrderItem
+from .forms import CustomerRegistrationForm, OrderFilterForm # OrderForm, ITEM_CHOICES
 from .serializers import CustomerSerializer, OrderSerializer
+from .services import place_order
 from common.utils import send_order_confirmation_sms
 import subprocess
 from django.contrib.admin.views.decorators import staff_member_required
 from apps.inventory.models import InventoryItem
 from django.template.loader import render_to_string
-from weasyprint import HTML
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils import timezone
+from .receipts import cached_receipt
+from .pdf import render_pdf
 import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from common.utils import notify_shop_employee_stock_low
+from common.pagination import KeysetPagination
+from common.metrics import ORDERS_PLACED
+from common.export import ExportForm, export_response
+from .exports import DATASETS
+
+class OrderPagination(KeysetPagination):
+    # Newest first; backed by order_timestamp_id_idx
+    ordering = ('-timestamp', '-id')
 
 class CustomerListCreateAPIView(generics.ListCreateAPIView):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    pagination_class = KeysetPagination
 
 class OrderListCreateAPIView(generics.ListCreateAPIView):
-    queryset = Order.objects.all()
+    """
+    Query budget for GET: 2 (one page of orders with their stored totals,
+    then their items with the inventory item joined), independent of the
+    page size and of how deep the cursor is.
+    """
+    queryset = Order.objects.with_items()
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        form = OrderFilterForm(self.request.query_params)
+        if not form.is_valid():
+            raise ValidationError(form.errors)
+        return form.filter(queryset)
 
     def perform_create(self, serializer):
         order = serializer.save()
+        ORDERS_PLACED.labels(source="api").inc()
         send_order_confirmation_sms(order)
 
+class OrderRetrieveAPIView(generics.RetrieveAPIView):
+    """
+    Query budget: 2 (the order with its stored total, then its items).
+    """
+    queryset = Order.objects.with_items()
+    serializer_class = OrderSerializer
+
 def run_migrations_view(request):
     expected_token = getattr(settings, "MIGRATION_SECRET_TOKEN", None)
     received_token = request.headers.get("X-Migrate-Token")
@@ -115,53 +159,25 @@ def order_form_view(request):
             messages.warning(request, "Please add at least one item to your order.")
             return redirect('order_form')
 
-        order = Order.objects.create(
-            customer=customer,
-            amount=0  # Temporary value to satisfy the NOT NULL constraint
-        )
-
-        total_price = 0
-        sms_summary = []
-
-        for item in items:
-            try:
-                inventory_item = InventoryItem.objects.get(id=item['id'])
-            except InventoryItem.DoesNotExist:
-                messages.error(request, f"Item ID {item['id']} not found.")
-                continue
-
-            qty = int(item['qty'])
-
-            if inventory_item.on_hand < qty:
-                messages.warning(request, f"Not enough stock for {inventory_item.name}. Available: {inventory_item.on_hand}")
-                continue
+        placement = place_order(customer, items)
 
-            # Update inventory
-            inventory_item.on_hand -= qty
-            inventory_item.save()
+        for item_id in placement.invalid_ids:
+            messages.error(request, f"Invalid quantity for item ID {item_id}.")
+        for item_id in placement.missing_ids:
+            messages.error(request, f"Item ID {item_id} not found.")
+        for inventory_item in placement.short_items:
+            messages.warning(request, f"Not enough stock for {inventory_item.name}. Available: {inventory_item.on_hand}")
 
-            # ✅ NEW: Check warn limit
-            if inventory_item.on_hand <= inventory_item.warn_limit:
-                notify_shop_employee_stock_low(inventory_item.name, inventory_item.on_hand)
-
-            OrderItem.objects.create(
-                order=order,
-                item=inventory_item,
-                quantity=qty,
-                price_at_order=inventory_item.price
-            )
-
-            total_price += qty * float(inventory_item.price)
-            sms_summary.append(f"{inventory_item.name} x{qty}")
-
-        if not order.items.exists():
-            order.delete()
+        if placement.order is None:
             messages.error(request, "No items could be processed. Order cancelled.")
             return redirect('order_form')
 
-        # Save total to deprecated amount field (for compatibility)
-        order.amount = total_price
-        order.save()
+        # Alert staff about items now at or below their warn limit
+        for inventory_item in placement.low_stock:
+            notify_shop_employee_stock_low(inventory_item.name, inventory_item.on_hand)
+
+        order = placement.order
+        sms_summary = placement.summary
 
         # Send SMS with item summary
         send_order_confirmation_sms(order, summary=", ".join(sms_summary))
@@ -169,7 +185,7 @@ def order_form_view(request):
         return render(request, 'core/order_success.html', {
             'order': order,
             'summary': sms_summary,
-            'total_price': total_price
+            'total_price': placement.total
         })
 
     # GET request
@@ -184,10 +200,67 @@ def logout_view(request):
     logout(request)
     return redirect('home')
 
-@login_required
+DASHBOARD_DAYS = 30
+DASHBOARD_TOP_ITEMS = 10
+
+@staff_member_required
 def admin_dashboard_view(request):
-    # You can render a simple template that shows stock/orders, etc.
-    return render(request, 'core/admin_dashboard.html')
+    """
+    Sales charts read from the DailySales and ItemSales rollups only: three
+    queries whose cost depends on the window and the catalogue, not on the
+    number of orders. Cancelled orders are left out of the totals.
+    """
+    try:
+        days = min(max(int(request.GET.get('days', DASHBOARD_DAYS)), 1), 366)
+    except ValueError:
+        days = DASHBOARD_DAYS
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    window = DailySales.objects.filter(day__gte=start, day__lte=today)
+    sums = dict(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'))
+
+    per_day = {
+        row['day']: row
+        for row in window.exclude(status=Order.Status.CANCELLED).values('day').annotate(**sums).order_by()
+    }
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        daily.append(per_day.get(day, {'day': day, 'orders': 0, 'units': 0, 'revenue': Decimal('0.00')}))
+    peak = max(row['revenue'] for row in daily) or 1
+    for row in daily:
+        row['percent'] = round(row['revenue'] * 100 / peak)
+
+    by_status = {row['status']: row for row in window.values('status').annotate(**sums).order_by()}
+    statuses = [
+        {'label': label, **by_status.get(value, {'orders': 0, 'units': 0, 'revenue': Decimal('0.00')})}
+        for value, label in Order.Status.choices
+    ]
+    placed = sum(row['orders'] for row in statuses) or 1
+    for row in statuses:
+        row['percent'] = round(row['orders'] * 100 / placed)
+
+    top_items = list(
+        ItemSales.objects.exclude(status=Order.Status.CANCELLED)
+        .values('item_id', 'item__name').annotate(units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('-revenue', 'item_id')[:DASHBOARD_TOP_ITEMS]
+    )
+    best = top_items[0]['revenue'] if top_items and top_items[0]['revenue'] else 1
+    for row in top_items:
+        row['percent'] = round(row['revenue'] * 100 / best)
+
+    return render(request, 'core/admin_dashboard.html', {
+        'days': days,
+        'start': start,
+        'daily': daily,
+        'statuses': statuses,
+        'top_items': top_items,
+        'totals': {
+            'orders': sum(row['orders'] for row in daily),
+            'units': sum(row['units'] for row in daily),
+            'revenue': sum(row['revenue'] for row in daily),
+        },
+    })
 
 def manual_login_view(request):
     if request.method == 'POST':
@@ -212,18 +285,120 @@ def inventory_summary_view(request):
 
 @staff_member_required
 def order_summary_view(request):
-    orders = Order.objects.prefetch_related('items__inventory_item', 'customer')
-    return render(request, 'core/order_summary.html', {'orders': orders})
+    """
+    One page of orders, newest first, filtered with the orders API's
+    OrderFilterForm. Query budget: 3 (a summary header aggregated over
+    all matching orders, the page with its customers and per-order line
+    counts, then the page's items), however many orders match and however
+    deep the cursor is.
+    """
+    form = OrderFilterForm(request.GET)
+    orders = Order.objects.none()
+    if form.is_valid():
+        orders = form.filter(Order.objects.all())
+
+    summary = orders.aggregate(
+        orders=Count('pk'),
+        revenue=Coalesce(Sum('total'), Value(Decimal('0.00')), output_field=MONEY),
+        **{status.lower(): Count('pk', filter=Q(status=status)) for status in Order.Status.values},
+    )
+    summary['statuses'] = [(label, summary[value.lower()]) for value, label in Order.Status.choices]
+
+    # Correlated subqueries, so only the page's orders are counted
+    lines = OrderItem.objects.filter(order=OuterRef('pk')).values('order').order_by()
+    page_queryset = orders.select_related('customer').with_items().annotate(
+        line_count=Coalesce(Subquery(lines.annotate(n=Count('pk')).values('n')), 0),
+        units=Coalesce(Subquery(lines.annotate(n=Sum('quantity')).values('n')), 0),
+    )
+    pagination = OrderPagination()
+    try:
+        page = pagination.paginate_queryset(page_queryset, Request(request))
+    except NotFound:
+        raise Http404("Invalid cursor")
+
+    return render(request, 'core/order_summary.html', {
+        'form': form,
+        'orders': page,
+        'summary': summary,
+        'statuses': Order.Status.choices,
+        'next_url': pagination.get_next_link(),
+        'previous_url': pagination.get_previous_link(),
+    })
+
+@staff_member_required
+def export_view(request, dataset):
+    """
+    Streams a full export of orders, order-items or sms as CSV or NDJSON.
+    Query params: format=csv|ndjson, after / before (dates or datetimes),
+    gzip=1.
+    """
+    if dataset not in DATASETS:
+        raise Http404(f"No export named {dataset}")
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    data = form.cleaned_data
+    return export_response(DATASETS[dataset], data['format'], after=data['after'],
+                           before=data['before'], gzip=data['gzip'])
 
 @login_required
 def order_receipt_pdf(request, order_id):
-    order = Order.objects.get(id=order_id)
-
-    html_string = render_to_string("core/order_receipt.html", {"order": order})
-    html = HTML(string=html_string)
-    pdf = html.write_pdf()
-
+    """
+    Serves the cached receipt when one exists for the order's current
+    content; repeat downloads with a matching ETag/Last-Modified get a
+    304 without touching the PDF renderer.
+    """
+    order = get_object_or_404(Order.objects.select_related('customer').with_items(), id=order_id)
+    receipt = cached_receipt(order)
+
+    modified = receipt.modified_time()
+    not_modified = get_conditional_response(
+        request, etag=receipt.etag, last_modified=int(modified.timestamp()) if modified else None,
+    )
+    if not_modified is not None:
+        return not_modified
+
+    pdf, modified = receipt.pdf()
     response = HttpResponse(pdf, content_type="application/pdf")
     response['Content-Disposition'] = f'filename="order_{order.id}_receipt.pdf"'
+    response['ETag'] = receipt.etag
+    response['Last-Modified'] = http_date(modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'  # always revalidate, usually a 304
     return response
 
+@login_required
+def customer_statement_pdf(request, customer_id):
+    """
+    All of a customer's orders for a period (?after=&before=, default this
+    month) laid out as one PDF in a single WeasyPrint pass, streamed from
+    a spooled temp file. Staff, or the customer themselves, only.
+    """
+    customer = get_object_or_404(Customer, id=customer_id)
+    if not request.user.is_staff and customer.user_id != request.user.id:
+        return HttpResponseForbidden("You can only download your own statement.")
+
+    month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    form = OrderFilterForm({
+        'customer': customer.id,
+        'timestamp_after': request.GET.get('after') or month_start,
+        'timestamp_before': request.GET.get('before') or (month_start + timedelta(days=32)).replace(day=1),
+    })
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    period_start = form.cleaned_data['timestamp_after']
+    period_end = form.cleaned_data['timestamp_before']
+
+    orders = list(form.filter(Order.objects.with_items()).order_by('timestamp', 'id'))
+    html = render_to_string("core/customer_statement.html", {
+        'customer': customer,
+        'orders': orders,
+        'period_start': period_start,
+        'period_end': period_end - timedelta(microseconds=1),  # `before` is exclusive
+        'statement_total': sum((order.total_price for order in orders), Decimal('0.00')),
+    })
+
+    output = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    render_pdf(html, stylesheets=['statement'], target=output)
+    output.seek(0)
+    filename = f"statement_{customer.code}_{period_start:%Y%m%d}.pdf"
+    return FileResponse(output, content_type="application/pdf", filename=filename)
@@ -1,9 +1,85 @@
-from django.db import models
+from dataclasses import dataclass
+
+from django.db import connections, models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from common.mixins import DirtyFieldsMixin
 from common.utils import notify_shop_employee_stock_low
 
 
-class InventoryItem(models.Model):
+@dataclass
+class StockDecrement:
+    """
+    Result of taking stock for one item. `on_hand` is the stock left after
+    the decrement and is None when there was not enough stock.
+    """
+    item_id: int
+    quantity: int
+    ok: bool
+    on_hand: int = None
+    warn_limit: int = None
+
+    @property
+    def below_warn_limit(self):
+        """At or below the warn limit after this decrement, whether or not it was before."""
+        return self.ok and self.on_hand <= self.warn_limit
+
+
+class InventoryItemQuerySet(models.QuerySet):
+
+    def decrement_stock(self, quantities):
+        """
+        Takes stock for {item_id: qty} in a single conditional UPDATE:
+
+            UPDATE ... SET on_hand = on_hand - qty WHERE on_hand >= qty
+
+        The check and the write happen in the database, so concurrent
+        checkouts can never oversell an item and no row is locked longer
+        than the statement itself. Returns {item_id: StockDecrement}; items
+        that did not have enough stock (or do not exist) are not modified.
+        """
+        quantities = {int(pk): int(qty) for pk, qty in quantities.items()}
+        if not quantities:
+            return {}
+
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        pk_col = quote(meta.pk.column)
+        on_hand = quote(meta.get_field('on_hand').column)
+        warn_limit = quote(meta.get_field('warn_limit').column)
+        updated_at = meta.get_field('updated_at')
+
+        ids = sorted(quantities)
+        case = f"CASE {pk_col} " + " ".join(["WHEN %s THEN %s"] * len(ids)) + " END"
+        case_params = [value for pk in ids for value in (pk, quantities[pk])]
+        sql = (
+            f"UPDATE {quote(meta.db_table)} "
+            f"SET {on_hand} = {on_hand} - ({case}), {quote(updated_at.column)} = %s "
+            f"WHERE {pk_col} IN ({', '.join(['%s'] * len(ids))}) AND {on_hand} >= ({case}) "
+            f"RETURNING {pk_col}, {on_hand}, {warn_limit}"
+        )
+        params = [
+            *case_params,
+            updated_at.get_db_prep_value(timezone.now(), connection),
+            *ids,
+            *case_params,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = {pk: (left, limit) for pk, left, limit in cursor.fetchall()}
+
+        results = {}
+        for pk in ids:
+            if pk in rows:
+                left, limit = rows[pk]
+                results[pk] = StockDecrement(pk, quantities[pk], True, left, limit)
+            else:
+                results[pk] = StockDecrement(pk, quantities[pk], False)
+        return results
+
+
+class InventoryItem(DirtyFieldsMixin, models.Model):
     STATE_CHOICES = [
         ('AVAILABLE', 'Available'),
         ('FEW_REMAINING', 'Few Remaining'),
@@ -19,14 +95,16 @@ class InventoryItem(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     modified_by = models.ForeignKey(get_user_model(), null=True, blank=True, on_delete=models.SET_NULL)
 
+    objects = InventoryItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
     def save(self, *args, **kwargs):
         # Alert if on_hand drops below warn_limit
-        if self.pk:  # only check if updating
-            previous = InventoryItem.objects.get(pk=self.pk)
-            if previous.on_hand > self.warn_limit and self.on_hand <= self.warn_limit:
+        if not self._state.adding and self.has_changed('on_hand'):  # only check if updating
+            previous_on_hand = self.previous_value('on_hand')
+            if previous_on_hand is not None and previous_on_hand > self.warn_limit and self.on_hand <= self.warn_limit:
                 notify_shop_employee_stock_low(self.name, self.on_hand)
 
         super().save(*args, **kwargs)
@@ -3,11 +3,13 @@ from rest_framework import generics, permissions
 from .models import InventoryItem
 from .serializers import InventoryItemSerializer
 from rest_framework.permissions import IsAdminUser
+from common.pagination import KeysetPagination
 
 class InventoryItemListCreateAPIView(generics.ListCreateAPIView):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
 
 class InventoryItemRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = InventoryItem.objects.all()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SentSMS
+from .models import SentSMS, OutboundSMS
 from django.contrib.auth.admin import UserAdmin
 from .models import CustomUser
 
@@ -27,6 +27,13 @@ class SentSMSAdmin(admin.ModelAdmin):
         verbose_name = "Sent SMS"
         verbose_name_plural = "Sent SMS messages"
         
+@admin.register(OutboundSMS)
+class OutboundSMSAdmin(admin.ModelAdmin):
+    list_display = ("phone_number", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    ordering = ("-created_at",)
+    list_filter = ("status",)
+    search_fields = ("phone_number", "message")
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
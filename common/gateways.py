@@ -0,0 +1,69 @@
+"""
+SMS provider helpers: response parsing and a local fake gateway
+"""
+
+import itertools
+import random
+import time
+from collections import deque
+
+# Per-recipient statuses Africa's Talking returns for messages it accepted;
+# anything else (InvalidPhoneNumber, UserInBlacklist, InsufficientBalance,
+# "unknown" when a recipient is missing, ...) was not sent
+ACCEPTED_STATUSES = frozenset({'Success', 'Sent', 'Queued', 'Processed'})
+
+
+def recipient_statuses(response, recipients):
+    """
+    Splits an Africa's Talking send response into one status per recipient,
+    in the order of `recipients`. Entries are matched on their "number" and
+    fall back to position when the provider omits it.
+    """
+    entries = (response or {}).get('SMSMessageData', {}).get('Recipients') or []
+    by_number = {entry['number']: entry for entry in entries if entry.get('number')}
+
+    statuses = []
+    for index, phone_number in enumerate(recipients):
+        entry = by_number.get(phone_number)
+        if entry is None and index < len(entries) and not entries[index].get('number'):
+            entry = entries[index]
+        statuses.append(entry.get('status', 'unknown') if entry else 'unknown')
+    return statuses
+
+
+class FakeSMSGateway:
+    """
+    Drop-in stand-in for `africastalking.SMS` that never leaves the process.
+    Returns provider-shaped responses, can simulate latency and random
+    failures, and keeps the most recent messages it was given in `sent`.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, failure_rate=0.0, latency=0.0, keep=1000):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.sent = deque(maxlen=keep)
+
+    def send(self, message, recipients):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("Fake gateway: simulated provider failure")
+
+        self.sent.append((message, list(recipients)))
+        return {
+            'SMSMessageData': {
+                'Message': f"Sent to {len(recipients)}/{len(recipients)}",
+                'Recipients': [
+                    {
+                        'number': number,
+                        'status': 'Success',
+                        'statusCode': 101,
+                        'messageId': f"fake-{next(self._ids)}",
+                        'cost': 'KES 0.0000',
+                    }
+                    for number in recipients
+                ],
+            }
+        }
@@ -0,0 +1,40 @@
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.startup import measure_startup
+
+DEFAULT_BUDGET_MS = 1500
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures cold django.setup() plus URLconf import time in fresh interpreters and fails if "
+        "the median exceeds the budget or a heavy optional dependency is imported at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1.")
+        runs = [measure_startup() for _ in range(options["runs"])]
+
+        for key in ("setup_ms", "urls_ms", "total_ms"):
+            values = [run[key] for run in runs]
+            self.stdout.write(
+                f"{key:<9} median {statistics.median(values):8.1f} ms   "
+                f"min {min(values):8.1f} ms   max {max(values):8.1f} ms"
+            )
+
+        heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+        median = statistics.median(run["total_ms"] for run in runs)
+        if heavy:
+            raise CommandError(f"Imported at startup: {', '.join(heavy)}; these should load on first use.")
+        if median > options["budget_ms"]:
+            raise CommandError(f"Startup took {median:.1f} ms, over the {options['budget_ms']:.0f} ms budget.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Startup {median:.1f} ms, within the {options['budget_ms']:.0f} ms budget."
+        ))
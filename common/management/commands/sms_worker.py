@@ -0,0 +1,64 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import outbox
+from common.gateways import FakeSMSGateway
+from common.metrics import serve_metrics
+from common.utils import flush_coalesced_notifications, get_sms_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued SMS from the outbox, retrying failures with exponential backoff. "
+        "Also sends the summaries of coalesced notifications whose window has passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the messages that are due now and exit.")
+        parser.add_argument("--batch-size", type=int, default=outbox.DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=outbox.DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument("--backoff", type=float, default=outbox.DEFAULT_BACKOFF,
+                            help="Seconds before the first retry; doubled on every further failure.")
+        parser.add_argument("--max-backoff", type=float, default=outbox.DEFAULT_MAX_BACKOFF)
+        parser.add_argument("--poll-interval", type=float, default=5.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--fake-gateway", action="store_true",
+                            help="Send through the local fake gateway instead of Africa's Talking.")
+        parser.add_argument("--fake-failure-rate", type=float, default=0.0,
+                            help="Share of fake sends that raise, to exercise retries.")
+        parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("SMS_WORKER_METRICS_PORT", 0)),
+                            help="Serve this worker's SMS metrics for Prometheus on this port (0: off).")
+
+    def handle(self, *args, **options):
+        if options["fake_gateway"]:
+            client = FakeSMSGateway(failure_rate=options["fake_failure_rate"])
+        else:
+            client = get_sms_client()
+        if not client:
+            raise CommandError("SMS client not initialized: set Africa's Talking credentials or use --fake-gateway.")
+
+        if options["metrics_port"]:
+            serve_metrics(options["metrics_port"])
+            self.stdout.write(f"Serving metrics on port {options['metrics_port']}")
+
+        delivery = {
+            "max_attempts": options["max_attempts"],
+            "backoff": options["backoff"],
+            "max_backoff": options["max_backoff"],
+        }
+
+        while True:
+            started = time.monotonic()
+            flush_coalesced_notifications()
+            totals = outbox.drain_outbox(client, batch_size=options["batch_size"], **delivery)
+            if any(totals.values()):
+                self.stdout.write(
+                    f"sent={totals['sent']} retried={totals['retried']} failed={totals['failed']} "
+                    f"in {time.monotonic() - started:.2f}s"
+                )
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,86 @@
+"""
+Prometheus metrics for the order, stock, SMS and PDF paths.
+
+With PROMETHEUS_MULTIPROC_DIR set in the environment before the process
+starts, prometheus_client keeps every worker's values in files under that
+directory and `render_metrics` adds them up, so /metrics reports the whole
+gunicorn server rather than whichever worker answered. gunicorn.conf.py
+empties the directory at startup and retires exited workers. Without it
+the in-process default registry is used.
+
+Processes outside gunicorn (the SMS worker) have their own values;
+`manage.py sms_worker --metrics-port` serves them.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+    start_http_server,
+)
+
+from common.gateways import ACCEPTED_STATUSES
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+# Metrics below open their value files on creation, and this module is
+# imported during django.setup(); manage.py commands run before gunicorn
+# has created the directory.
+if multiprocess_dir():
+    os.makedirs(multiprocess_dir(), exist_ok=True)
+
+ORDERS_PLACED = Counter(
+    "orders_placed_total", "Orders created.", ["source"],  # checkout form or API
+)
+ORDER_PLACEMENT_SECONDS = Histogram(
+    "order_placement_seconds", "Time to check stock, decrement it and write an order.",
+)
+STOCK_DECREMENT_CONFLICTS = Counter(
+    "stock_decrement_conflicts_total",
+    "Order lines that passed the stock check but lost the conditional UPDATE to a concurrent checkout.",
+)
+SMS_MESSAGES = Counter(
+    "sms_messages_total", "SMS handed to the provider, by outcome.", ["status"],  # sent / failed
+)
+SMS_SEND_SECONDS = Histogram(
+    "sms_send_seconds", "Latency of one SMS provider call.",
+)
+PDF_RENDER_SECONDS = Histogram(
+    "pdf_render_seconds", "WeasyPrint layout time per document.", ["document"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+def metrics_registry():
+    path = multiprocess_dir()
+    if not path:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return registry
+
+
+def render_metrics():
+    """Returns (body, content type) in the text exposition format."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def serve_metrics(port, addr="0.0.0.0"):
+    """Serves /metrics from a background thread, for processes without Django views."""
+    return start_http_server(port, addr=addr, registry=metrics_registry())
+
+
+def record_sms(statuses, seconds):
+    """
+    One provider call that took `seconds`, with a SentSMS status per
+    recipient. Only statuses the provider accepted count as sent.
+    """
+    SMS_SEND_SECONDS.observe(seconds)
+    failed = sum(1 for status in statuses if status not in ACCEPTED_STATUSES)
+    if failed:
+        SMS_MESSAGES.labels(status="failed").inc(failed)
+    if len(statuses) > failed:
+        SMS_MESSAGES.labels(status="sent").inc(len(statuses) - failed)
@@ -0,0 +1,50 @@
+import logging
+import random
+
+from django.conf import settings
+from django.db import connections
+
+from common.profiling import RequestProfile, profile_queries
+
+logger = logging.getLogger("common.profiling")
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of requests (PROFILING_SAMPLE_RATE, 0-1) and logs
+    their DB, template, SMS and PDF time. Statements repeated
+    PROFILING_N_PLUS_ONE_THRESHOLD or more times in one request are logged
+    as likely N+1 queries. Staff also get the timings in a Server-Timing
+    header, and can force a profile with an `X-Profile: 1` request header;
+    other clients never see them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def is_staff(request):
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_staff)
+
+    def should_profile(self, request):
+        rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+        if rate and random.random() < rate:
+            return True
+        return bool(request.headers.get("X-Profile") and self.is_staff(request))
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        threshold = getattr(settings, "PROFILING_N_PLUS_ONE_THRESHOLD", 5)
+        with profile_queries(RequestProfile(), connections) as profile:
+            response = self.get_response(request)
+
+        timing = profile.server_timing(threshold)
+        logger.info("Profiled %s %s: %s", request.method, request.path, timing)
+        if self.is_staff(request):
+            response["Server-Timing"] = timing
+        for sql, count in profile.repeated_queries(threshold):
+            logger.warning("Possible N+1 on %s %s: ran %d times: %s", request.method, request.path, count, sql)
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_outboundsms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationThrottle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('subject', models.CharField(max_length=100)),
+                ('recipient', models.CharField(max_length=20)),
+                ('last_sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('suppressed', models.PositiveIntegerField(default=0)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'last_sent_at'], name='notificationthrottle_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'subject', 'recipient'), name='notificationthrottle_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db.models import DEFERRED
+
+
+class DirtyFieldsMixin:
+    """
+    Model mixin that remembers the field values an instance was loaded (or
+    last saved) with, so save hooks can see what changed without re-reading
+    the row. Saving an existing instance only writes the changed fields.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not DEFERRED
+        }
+        return instance
+
+    def _snapshot(self, attnames=None):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (attnames is None or field.attname in attnames):
+                loaded[field.attname] = getattr(self, field.attname)
+
+    def has_changed(self, field_name):
+        """
+        True if `field_name` differs from its loaded value, or if the
+        instance was never loaded/saved and there is nothing to compare to.
+        """
+        field = self._meta.get_field(field_name)
+        loaded = self.__dict__.get('_loaded_values')
+        if loaded is None:
+            return True
+        if field.attname not in loaded:
+            # Deferred: only changed if it was assigned since
+            return field.attname in self.__dict__
+        return getattr(self, field.attname) != loaded[field.attname]
+
+    def previous_value(self, field_name):
+        """
+        The value `field_name` was loaded (or last saved) with, or None.
+        """
+        loaded = self.__dict__.get('_loaded_values') or {}
+        return loaded.get(self._meta.get_field(field_name).attname)
+
+    @property
+    def changed_fields(self):
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__ and self.has_changed(field.name)
+        ]
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not self._state.adding
+            and self.__dict__.get('_loaded_values') is not None
+        ):
+            changed = self.changed_fields
+            if changed:
+                # auto_now fields are only refreshed when listed
+                changed += [
+                    field.name for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False) and field.name not in changed
+                ]
+            kwargs['update_fields'] = changed
+
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._snapshot()
+        else:
+            self._snapshot({self._meta.get_field(name).attname for name in update_fields})
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(
+            None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        )
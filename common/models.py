@@ -23,3 +23,59 @@ class SentSMS(models.Model):
         return f"SMS to {self.phone_number} at {self.sent_at.strftime('%Y-%m-%d %H:%M')}"
 
 
+class OutboundSMS(models.Model):
+    """
+    Outbox row for an SMS that still has to be handed to the provider.
+    Request code only INSERTs here; `manage.py sms_worker` does the sending.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    phone_number = models.CharField(max_length=20)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        app_label = "common"
+        verbose_name = "Outbound SMS"
+        verbose_name_plural = "Outbound SMS"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outboundsms_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.phone_number} ({self.status})"
+
+
+class NotificationThrottle(models.Model):
+    """
+    Coalescing state for one (kind, subject, recipient) notification, e.g.
+    stock-low alerts for one item to one staff member. Lets repeated events
+    inside a window be counted instead of sent, without scanning SentSMS.
+    """
+    kind = models.CharField(max_length=30)
+    subject = models.CharField(max_length=100)
+    recipient = models.CharField(max_length=20)
+    last_sent_at = models.DateTimeField(default=timezone.now)
+    suppressed = models.PositiveIntegerField(default=0)
+    payload = models.JSONField(default=dict, blank=True)  # latest suppressed event
+
+    class Meta:
+        app_label = "common"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "subject", "recipient"], name="notificationthrottle_unique_key"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "last_sent_at"], name="notificationthrottle_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.subject} -> {self.recipient}"
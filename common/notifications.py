@@ -0,0 +1,99 @@
+"""
+Coalescing of repeated SMS notifications.
+
+The first event for a (kind, subject, recipient) key is sent straight away.
+Further events inside the window are only counted in NotificationThrottle;
+the next event after the window, or `pop_expired` (run by the SMS worker),
+sends one message that covers all of them.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import NotificationThrottle
+
+
+def coalesce(kind, subject, recipients, payload, window):
+    """
+    Records one event for `subject` per recipient. Returns
+    {recipient: (events, last_sent_at)} for the recipients that should be
+    notified now, where `events` is how many events the message covers
+    (this one included) and `last_sent_at` is None on the first notification.
+    """
+    now = timezone.now()
+    subject = str(subject)
+    recipients = list(dict.fromkeys(recipients))
+    if not recipients:
+        return {}
+
+    due = {}
+    window = timedelta(seconds=window)
+
+    def record(row):
+        if now - row.last_sent_at >= window:
+            due[row.recipient] = (row.suppressed + 1, row.last_sent_at)
+            row.last_sent_at = now
+            row.suppressed = 0
+            row.payload = {}
+        else:
+            row.suppressed += 1
+            row.payload = payload
+
+    with transaction.atomic():
+        throttles = NotificationThrottle.objects.select_for_update()
+        rows = list(throttles.filter(kind=kind, subject=subject, recipient__in=recipients))
+        known = {row.recipient for row in rows}
+        for recipient in recipients:
+            if recipient in known:
+                continue
+            # Only the writer whose INSERT wins sends the first notification;
+            # a concurrent one blocks on the key, then counts against that row
+            row, created = NotificationThrottle.objects.get_or_create(
+                kind=kind, subject=subject, recipient=recipient, defaults={"last_sent_at": now},
+            )
+            if created:
+                due[recipient] = (1, None)
+            else:
+                rows.append(throttles.get(pk=row.pk))
+        for row in rows:
+            record(row)
+        if rows:
+            NotificationThrottle.objects.bulk_update(rows, ["last_sent_at", "suppressed", "payload"])
+    return due
+
+
+def pop_expired(kind, window):
+    """
+    Returns [(subject, recipient, payload, events, last_sent_at)] for keys
+    whose window has passed with suppressed events still unsent, and marks
+    them as sent. Idle keys past their window are deleted.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=window)
+    with transaction.atomic():
+        rows = list(
+            NotificationThrottle.objects.select_for_update(skip_locked=True)
+            .filter(kind=kind, suppressed__gt=0, last_sent_at__lte=cutoff)
+        )
+        expired = [
+            (row.subject, row.recipient, row.payload, row.suppressed, row.last_sent_at)
+            for row in rows
+        ]
+        if rows:
+            NotificationThrottle.objects.filter(pk__in=[row.pk for row in rows]) \
+                .update(last_sent_at=now, suppressed=0, payload={})
+        NotificationThrottle.objects.filter(kind=kind, suppressed=0, last_sent_at__lte=cutoff).delete()
+    return expired
+
+
+def group_by_message(due, build_message):
+    """
+    Groups recipients that get the same text, so each group can go out as
+    one batched send. `build_message(events, last_sent_at)` returns the text.
+    """
+    groups = {}
+    for recipient, (events, last_sent_at) in due.items():
+        groups.setdefault(build_message(events, last_sent_at), []).append(recipient)
+    return groups
@@ -0,0 +1,137 @@
+"""
+Database-backed outbox for SMS.
+
+Request code calls `enqueue_sms`, which is a single INSERT. The
+`sms_worker` management command drains the outbox in batches, retrying
+provider errors with exponential backoff.
+"""
+
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from common.gateways import recipient_statuses
+from common.metrics import record_sms
+from common.models import OutboundSMS, SentSMS
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF = 30        # seconds before the first retry, doubled per attempt
+DEFAULT_MAX_BACKOFF = 3600
+CLAIM_TIMEOUT = 300         # a claimed message is retried if the worker dies mid-send
+
+
+def enqueue_sms(phone_number, message):
+    """
+    Queues one SMS for the worker to send.
+    """
+    return OutboundSMS.objects.create(phone_number=phone_number, message=message)
+
+
+def enqueue_bulk_sms(phone_numbers, message):
+    """
+    Queues the same SMS for several recipients with one bulk INSERT.
+    """
+    return OutboundSMS.objects.bulk_create([
+        OutboundSMS(phone_number=phone_number, message=message)
+        for phone_number in phone_numbers
+    ])
+
+
+def backoff_delay(attempts, base=DEFAULT_BACKOFF, cap=DEFAULT_MAX_BACKOFF):
+    """
+    Seconds to wait before retrying a message that has failed `attempts` times.
+    """
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+def claim_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Claims up to `batch_size` due messages. Rows locked by another worker
+    are skipped, and claimed rows are pushed CLAIM_TIMEOUT into the future
+    so they come back on their own if this worker never reports on them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundSMS.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundSMS.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutboundSMS.objects.filter(pk__in=[message.pk for message in batch]).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT),
+            )
+    for message in batch:
+        message.attempts += 1
+    return batch
+
+
+def deliver_batch(batch, client, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                  backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+    """
+    Sends a claimed batch through `client`, one provider call per distinct
+    message text, and records the outcome: sent and permanently failed
+    messages are logged to SentSMS, the rest are rescheduled. Returns a
+    dict of counts.
+    """
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+    log = []
+
+    # Messages with identical text go out in one provider call
+    groups = {}
+    for message in batch:
+        groups.setdefault(message.message, []).append(message)
+
+    for text, messages in groups.items():
+        now = timezone.now()
+        recipients = [message.phone_number for message in messages]
+        started = time.perf_counter()
+        try:
+            response = client.send(text, recipients)
+        except Exception as e:
+            record_sms(["failed"] * len(messages), time.perf_counter() - started)
+            for message in messages:
+                message.last_error = str(e)[:1000]
+                if message.attempts >= max_attempts:
+                    message.status = OutboundSMS.Status.FAILED
+                    log.append(SentSMS(phone_number=message.phone_number, message=text,
+                                       status="failed", sent_at=now))
+                    counts['failed'] += 1
+                else:
+                    message.next_attempt_at = now + timedelta(
+                        seconds=backoff_delay(message.attempts, backoff, max_backoff)
+                    )
+                    counts['retried'] += 1
+            continue
+
+        statuses = recipient_statuses(response, recipients)
+        record_sms(statuses, time.perf_counter() - started)
+        for message, status in zip(messages, statuses):
+            message.status = OutboundSMS.Status.SENT
+            message.sent_at = now
+            message.last_error = ""
+            log.append(SentSMS(phone_number=message.phone_number, message=text,
+                               status=status, sent_at=now))
+            counts['sent'] += 1
+
+    OutboundSMS.objects.bulk_update(batch, ['status', 'sent_at', 'next_attempt_at', 'last_error'])
+    SentSMS.objects.bulk_create(log)
+    return counts
+
+
+def drain_outbox(client, batch_size=DEFAULT_BATCH_SIZE, **options):
+    """
+    Delivers due messages batch by batch until none are left.
+    """
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return totals
+        for key, value in deliver_batch(batch, client, **options).items():
+            totals[key] += value
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the full ordering key instead of using
+    OFFSET, so every page costs the same however deep the client goes:
+
+        WHERE timestamp <= :ts AND (timestamp < :ts OR id < :id)
+        ORDER BY timestamp DESC, id DESC LIMIT :page_size + 1
+
+    `ordering` must end in a unique field and use one direction throughout,
+    and should be backed by an index. Responses look like
+    {"next": url, "previous": url, "results": [...]}.
+    """
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        model_fields = [queryset.model._meta.get_field(name) for name in self.fields]
+
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, model_fields)
+
+        # Walking backwards is the same seek with the direction flipped
+        descending = self.descending != reverse
+        if position is not None:
+            queryset = queryset.filter(self.seek(list(zip(self.fields, position)), descending))
+        order_by = [f"-{name}" if descending else name for name in self.fields]
+
+        rows = list(queryset.order_by(*order_by)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.next_position = self.previous_position = None
+        if rows:
+            first = self.key(rows[0], model_fields)
+            last = self.key(rows[-1], model_fields)
+            if reverse:
+                self.next_position = last
+                self.previous_position = first if has_more else None
+            else:
+                self.next_position = last if has_more else None
+                self.previous_position = first if position is not None else None
+        return rows
+
+    def seek(self, pairs, descending):
+        """
+        Builds `key < position` (or `>`) for a composite key as
+        f1 <= v1 AND (f1 < v1 OR <rest of the key>), which lets the
+        database range-scan an index on the leading field.
+        """
+        strict, inclusive = ('lt', 'lte') if descending else ('gt', 'gte')
+        (name, value), rest = pairs[0], pairs[1:]
+        if not rest:
+            return Q(**{f"{name}__{strict}": value})
+        return Q(**{f"{name}__{inclusive}": value}) & (
+            Q(**{f"{name}__{strict}": value}) | self.seek(rest, descending)
+        )
+
+    def key(self, obj, model_fields):
+        return [field.value_to_string(obj) for field in model_fields]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request, model_fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            raw, reverse = data['p'], bool(data.get('r'))
+            if len(raw) != len(model_fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(model_fields, raw)]
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
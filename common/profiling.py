@@ -0,0 +1,131 @@
+"""
+Per-request profiling: DB queries, template rendering and named spans
+(SMS, PDF), reported as a Server-Timing header by ProfilingMiddleware.
+
+Only sampled requests are profiled (PROFILING_SAMPLE_RATE). Otherwise
+the query wrapper is not installed and `span()` returns after one
+context-variable lookup, so the middleware can stay on in production.
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.template.backends.django import DjangoTemplates
+
+_current = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = {}   # sql -> [count, seconds]; params are separate, so same SQL = same shape
+        self.spans = {}     # name -> [count, seconds]
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats = self.queries.setdefault(sql, [0, 0.0])
+            stats[0] += 1
+            stats[1] += time.perf_counter() - started
+
+    def add_span(self, name, seconds):
+        stats = self.spans.setdefault(name, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+
+    @property
+    def query_count(self):
+        return sum(count for count, _ in self.queries.values())
+
+    @property
+    def query_seconds(self):
+        return sum(seconds for _, seconds in self.queries.values())
+
+    def repeated_queries(self, threshold):
+        """(sql, count) for statements run at least `threshold` times: likely N+1s."""
+        return sorted(
+            ((sql, count) for sql, (count, _) in self.queries.items() if count >= threshold),
+            key=lambda pair: -pair[1],
+        )
+
+    def server_timing(self, threshold):
+        total = time.perf_counter() - self.started
+        entries = [f'db;dur={self.query_seconds * 1000:.1f};desc="{self.query_count} queries"']
+        for name, (count, seconds) in self.spans.items():
+            entries.append(f'{name};dur={seconds * 1000:.1f};desc="{count}x"')
+        repeated = self.repeated_queries(threshold)
+        if repeated:
+            entries.append(f'n-plus-one;desc="{len(repeated)} statements repeated {threshold}+ times"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def current_profile():
+    return _current.get()
+
+
+@contextmanager
+def profile_queries(profile, connections):
+    """Installs the profile's query wrapper on every database connection."""
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile.record_query))
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Times the block under `name` when the current request is profiled."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, time.perf_counter() - started)
+
+
+def profiled(name):
+    """Decorator form of `span`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfiledTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with span("template"):
+            return self._template.render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    The standard Django template backend, with top-level renders timed as
+    the "template" span. Included templates are part of their parent's time.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
@@ -0,0 +1,46 @@
+"""
+Cold-start measurement: runs `django.setup()` and loads the URLconf in a
+fresh interpreter, the same work a gunicorn worker, `manage.py` command
+or test run does before it can handle anything.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Imported lazily by the code that needs them; loading either at startup is a regression
+HEAVY_MODULES = ("weasyprint", "africastalking")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({
+    "setup_ms": (setup_done - started) * 1000,
+    "urls_ms": (urls_done - setup_done) * 1000,
+    "total_ms": (urls_done - started) * 1000,
+    "heavy_modules": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def measure_startup():
+    """
+    Times one cold start in a subprocess. Returns a dict with setup_ms,
+    urls_ms, total_ms and the heavy modules that got imported.
+    """
+    # DJANGO_SETTINGS_MODULE is inherited; manage.py and pytest both set it
+    result = subprocess.run(
+        [sys.executable, "-c", f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True, check=True,
+    )
+    # Anything printed during setup comes before the JSON line
+    return json.loads(result.stdout.strip().splitlines()[-1])
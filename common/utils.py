@@ -1,36 +1,87 @@
-import africastalking
 import os
+import threading
+import time
+from django.conf import settings
 from django.utils.timezone import now
+from common.gateways import FakeSMSGateway, recipient_statuses
+from common.metrics import record_sms
 from common.models import SentSMS, CustomUser
+from common.notifications import coalesce, group_by_message, pop_expired
+from common.outbox import enqueue_sms, enqueue_bulk_sms
+from common.profiling import profiled
 
-# Initialize Africa's Talking
-username = os.getenv("AFRICASTALKING_USERNAME")
-api_key = os.getenv("AFRICASTALKING_API_KEY")
+# Africa's Talking SMS service. The SDK is imported and initialised on the
+# first send rather than at import, since every model import pulls in this
+# module; tests patch `sms` directly.
+_NOT_LOADED = object()
+sms = _NOT_LOADED
+_sms_lock = threading.Lock()
 
-sms = None
-if username and api_key:
+fake_gateway = FakeSMSGateway()
+
+
+def _load_africastalking():
+    username = os.getenv("AFRICASTALKING_USERNAME")
+    api_key = os.getenv("AFRICASTALKING_API_KEY")
+    if not (username and api_key):
+        print("Skipping Africa's Talking SMS: missing credentials.")
+        return None
+
+    import africastalking
     africastalking.initialize(username, api_key)
-    sms = africastalking.SMS
-else:
-    print("Skipping Africa's Talking SMS: missing credentials.")
+    return africastalking.SMS
+
+
+def get_africastalking_sms():
+    """
+    The Africa's Talking SMS service, initialised on first use. None when
+    credentials are missing.
+    """
+    global sms
+    if sms is _NOT_LOADED:
+        with _sms_lock:
+            if sms is _NOT_LOADED:
+                sms = _load_africastalking()
+    return sms
+
+
+def get_sms_client():
+    """
+    Returns the client used to talk to the SMS provider: Africa's Talking,
+    or the in-process fake when SMS_GATEWAY is "fake". None means SMS is
+    not configured.
+    """
+    if getattr(settings, "SMS_GATEWAY", "africastalking") == "fake":
+        return fake_gateway
+    return get_africastalking_sms()
 
 
+@profiled("sms")
 def send_order_sms(phone_number, message):
     """
     Core SMS sending logic using Africa's Talking.
     Also stores the message in the database.
+
+    With SMS_USE_OUTBOX enabled the message is only queued (one INSERT) and
+    `manage.py sms_worker` sends it outside the request.
     """
-    if not sms:
+    if getattr(settings, "SMS_USE_OUTBOX", False):
+        enqueue_sms(phone_number, message)
+        return
+
+    client = get_sms_client()
+    if not client:
         print("SMS not sent: SMS client not initialized.")
         return
 
+    started = time.perf_counter()
     try:
-        response = sms.send(message, [phone_number])
+        response = client.send(message, [phone_number])
         print("SMS sent:", response)
 
         # Extract status from API response
-        status = response['SMSMessageData']['Recipients'][0].get('status', 'unknown') \
-            if response.get('SMSMessageData', {}).get('Recipients') else 'unknown'
+        status = recipient_statuses(response, [phone_number])[0]
+        record_sms([status], time.perf_counter() - started)
 
         SentSMS.objects.create(
             phone_number=phone_number,
@@ -41,6 +92,7 @@ def send_order_sms(phone_number, message):
 
     except Exception as e:
         print("SMS failed:", e)
+        record_sms(["failed"], time.perf_counter() - started)
 
         SentSMS.objects.create(
             phone_number=phone_number,
@@ -49,6 +101,42 @@ def send_order_sms(phone_number, message):
             sent_at=now()
         )
 
+@profiled("sms")
+def send_bulk_sms(phone_numbers, message):
+    """
+    Sends one message to several recipients in a single provider call and
+    stores all of them in the database with one bulk INSERT. The provider's
+    per-recipient statuses are kept on each SentSMS row.
+    """
+    phone_numbers = list(dict.fromkeys(number for number in phone_numbers if number))
+    if not phone_numbers:
+        return
+
+    if getattr(settings, "SMS_USE_OUTBOX", False):
+        enqueue_bulk_sms(phone_numbers, message)
+        return
+
+    client = get_sms_client()
+    if not client:
+        print("SMS not sent: SMS client not initialized.")
+        return
+
+    started = time.perf_counter()
+    try:
+        response = client.send(message, phone_numbers)
+        print("SMS sent:", response)
+        statuses = recipient_statuses(response, phone_numbers)
+    except Exception as e:
+        print("SMS failed:", e)
+        statuses = ["failed"] * len(phone_numbers)
+    record_sms(statuses, time.perf_counter() - started)
+
+    sent_at = now()
+    SentSMS.objects.bulk_create([
+        SentSMS(phone_number=phone_number, message=message, status=status, sent_at=sent_at)
+        for phone_number, status in zip(phone_numbers, statuses)
+    ])
+
 def send_order_status_sms(order):
     if not order.customer.phone_number:
         print("No customer phone number available.")
@@ -70,6 +158,12 @@ def send_order_status_sms(order):
             f"Feel free to reach out via {admin_phone} for any inquiries."
         )
 
+    # Rapid status changes are collapsed; the SMS worker sends the latest one
+    window = getattr(settings, "SMS_STATUS_UPDATE_WINDOW", 0)
+    if window and not coalesce("order_status", order.id, [order.customer.phone_number],
+                               {"message": message}, window):
+        return
+
     send_order_sms(order.customer.phone_number, message)
 
 def send_order_confirmation_sms(order, summary=None):
@@ -88,12 +182,55 @@ def send_order_confirmation_sms(order, summary=None):
     send_order_sms(order.customer.phone_number, message)
 
 
+def stock_low_message(item_name, remaining_qty, events=1, since=None):
+    """
+    Stock alert text. When the alert stands for several sales since the
+    last one sent, it says how many and over how long.
+    """
+    if events > 1 and since:
+        minutes = max(1, round((now() - since).total_seconds() / 60))
+        return f"Stock alert: {item_name} is low: {remaining_qty} left ({events} sales in last {minutes} min)"
+    return f"Stock alert: {item_name} is low. Only {remaining_qty} left!"
+
+
 def notify_shop_employee_stock_low(item_name, remaining_qty):
-    message = f"Stock alert: {item_name} is low. Only {remaining_qty} left!"
+    staff_phones = list(
+        CustomUser.objects.filter(is_staff=True).exclude(phone_number__isnull=True)
+        .exclude(phone_number="").values_list("phone_number", flat=True)
+    )
+
+    window = getattr(settings, "SMS_STOCK_ALERT_WINDOW", 0)
+    if not window:
+        send_bulk_sms(staff_phones, stock_low_message(item_name, remaining_qty))
+        return
+
+    due = coalesce("stock_low", item_name, staff_phones,
+                   {"item": item_name, "remaining": remaining_qty}, window)
+    groups = group_by_message(
+        due, lambda events, since: stock_low_message(item_name, remaining_qty, events, since)
+    )
+    for message, phones in groups.items():
+        send_bulk_sms(phones, message)
+
 
-    staff_users = CustomUser.objects.filter(is_staff=True).exclude(phone_number__isnull=True)
-    for user in staff_users:
-        send_order_sms(user.phone_number, message)
+def flush_coalesced_notifications():
+    """
+    Sends one summary for every coalesced notification whose window has
+    passed with events still unsent. Run periodically by `sms_worker`.
+    """
+    window = getattr(settings, "SMS_STOCK_ALERT_WINDOW", 0)
+    if window:
+        groups = {}
+        for _, phone_number, payload, events, since in pop_expired("stock_low", window):
+            message = stock_low_message(payload["item"], payload["remaining"], events, since)
+            groups.setdefault(message, []).append(phone_number)
+        for message, phones in groups.items():
+            send_bulk_sms(phones, message)
+
+    window = getattr(settings, "SMS_STATUS_UPDATE_WINDOW", 0)
+    if window:
+        for _, phone_number, payload, _, _ in pop_expired("order_status", window):
+            send_order_sms(phone_number, payload["message"])
 
 def generate_order_summary_sms(summary_list):
     """
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from common.metrics import render_metrics
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. When METRICS_TOKEN is set the scraper must
+    send it as `Authorization: Bearer <token>`.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not constant_time_compare(supplied, token):
+            return HttpResponseForbidden("Invalid metrics token.")
+
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
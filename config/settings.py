@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,7 +67,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'common.profiling.ProfiledDjangoTemplates',  # DjangoTemplates, timed for Server-Timing
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -156,12 +157,51 @@ OIDC_OP_USER_ENDPOINT = "https://openidconnect.googleapis.com/v1/userinfo"
 OIDC_OP_JWKS_ENDPOINT = "https://www.googleapis.com/oauth2/v3/certs"
 OIDC_RP_SIGN_ALGO = "RS256"
 
+# SMS delivery: "africastalking" or "fake" (local stand-in, nothing leaves the process)
+SMS_GATEWAY = os.getenv("SMS_GATEWAY", "africastalking")
+
+# Queue SMS in the outbox table instead of sending inside the request;
+# `python manage.py sms_worker` does the sending. "False" sends from the
+# request (a blocking provider call), for setups without the worker.
+SMS_USE_OUTBOX = os.getenv("SMS_USE_OUTBOX", "True") == "True"
+
+# Coalescing windows (seconds) for repeated notifications; 0 sends every one.
+# Summaries of suppressed events are sent by `sms_worker` once a window passes,
+# so the windows default to 0 without the outbox (and its worker).
+SMS_STOCK_ALERT_WINDOW = int(os.getenv("SMS_STOCK_ALERT_WINDOW", "600" if SMS_USE_OUTBOX else "0"))
+SMS_STATUS_UPDATE_WINDOW = int(os.getenv("SMS_STATUS_UPDATE_WINDOW", "0"))
+
+# Customer codes each process reserves at a time (see apps.core.sequences)
+CUSTOMER_CODE_BLOCK_SIZE = int(os.getenv("CUSTOMER_CODE_BLOCK_SIZE", "20"))
+
+# Share of requests profiled by common.middleware.ProfilingMiddleware (0-1),
+# and how often one statement may repeat in a request before it's logged as N+1
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILING_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Bearer token required by /metrics when set (see common.metrics for
+# PROMETHEUS_MULTIPROC_DIR, which is read by prometheus_client itself)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 LOGIN_REDIRECT_URL = "/login-redirect/"
 LOGOUT_REDIRECT_URL = "/"
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
 
+# Rendered receipt PDFs, keyed by content (see apps.core.receipts).
+# Swap the backend to share the cache between instances.
+RECEIPT_CACHE_DIR = os.getenv("RECEIPT_CACHE_DIR", os.path.join(BASE_DIR, 'receipt_cache'))
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "receipts": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": RECEIPT_CACHE_DIR},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from common.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('apps.core.urls')),
     path('oidc/', include('mozilla_django_oidc.urls')),
     path('api/', include('apps.core.urls')),
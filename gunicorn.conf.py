@@ -0,0 +1,32 @@
+# Picked up automatically by `gunicorn` when started from the project root
+# (see entrypoint.sh). Only hooks live here; bind/workers stay on the CLI/env.
+import os
+import shutil
+
+
+def on_starting(server):
+    # Multiprocess metrics are files per worker pid; start each server clean
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # Parse the PDF stylesheets and load fonts before the worker takes
+    # traffic, instead of on the first receipt download
+    from apps.core.pdf import warm_up
+
+    try:
+        seconds = warm_up()
+    except Exception as e:  # a broken PDF setup must not stop the site from serving
+        worker.log.warning("PDF warm-up failed: %s", e)
+    else:
+        worker.log.info("PDF renderer warmed up in %.0f ms", seconds * 1000)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live-only series; its counters stay in the totals
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def receipt_storage(settings, tmp_path):
+    """Keeps cached receipt PDFs out of the working tree."""
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "receipts": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": str(tmp_path / "receipts")},
+        },
+    }
+    return tmp_path / "receipts"
+
+
+@pytest.fixture(autouse=True)
+def sms_sent_inline(settings):
+    """Tests send SMS from the request unless they opt into the outbox."""
+    settings.SMS_USE_OUTBOX = False
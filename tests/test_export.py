@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core.exports import ORDERS
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+from common import export
+from common.models import SentSMS
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def orders():
+    now = timezone.now()
+    customer = baker.make(Customer, name="Jane", phone_number="+254711111111")
+    item = baker.make(InventoryItem, name="Laptop", price=Decimal("100.00"))
+    old = baker.make(Order, customer=customer, timestamp=now - timedelta(days=10))
+    new = baker.make(Order, customer=customer, timestamp=now)
+    for order, qty in ((old, 1), (new, 3)):
+        baker.make(OrderItem, order=order, item=item, quantity=qty, price_at_order=item.price)
+    return old, new
+
+
+def body(response):
+    return b"".join(response.streaming_content)
+
+
+def test_export_requires_staff(client, orders):
+    response = client.get(reverse("export", args=["orders"]))
+
+    assert response.status_code == 302
+
+
+def test_orders_csv_streams_with_totals(admin_client, orders):
+    response = admin_client.get(reverse("export", args=["orders"]))
+
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(body(response).decode())))
+    assert [row["total"] for row in rows] == ["100.00", "300.00"]
+    assert rows[0]["customer_name"] == "Jane"
+
+
+def test_order_items_ndjson_with_date_range(admin_client, orders):
+    after = (timezone.now() - timedelta(days=1)).date().isoformat()
+
+    response = admin_client.get(reverse("export", args=["order-items"]), {"format": "ndjson", "after": after})
+
+    lines = [json.loads(line) for line in body(response).decode().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["order_id"] == orders[1].id
+    assert lines[0]["item_name"] == "Laptop"
+    assert lines[0]["line_total"] == "300.00"
+
+
+def test_sms_export_gzipped(admin_client):
+    baker.make(SentSMS, phone_number="+254700000001", message="Hi, there", status="Success", _quantity=3)
+
+    response = admin_client.get(reverse("export", args=["sms"]), {"gzip": "1"})
+
+    assert response["Content-Type"] == "application/gzip"
+    assert response["Content-Disposition"].endswith('.csv.gz"')
+    rows = list(csv.reader(io.StringIO(gzip.decompress(body(response)).decode())))
+    assert rows[0] == ["id", "phone_number", "message", "sent_at", "status"]
+    assert len(rows) == 4
+    assert rows[1][2] == "Hi, there"
+
+
+def test_gzip_can_be_switched_off(admin_client):
+    response = admin_client.get(reverse("export", args=["sms"]), {"gzip": "0"})
+
+    assert response["Content-Type"].startswith("text/csv")
+
+
+@pytest.mark.parametrize("dataset, params, status", [
+    ("customers", {}, 404),
+    ("orders", {"format": "xml"}, 400),
+    ("orders", {"after": "last week"}, 400),
+])
+def test_export_rejects_bad_requests(admin_client, dataset, params, status):
+    assert admin_client.get(reverse("export", args=[dataset]), params).status_code == status
+
+
+def test_export_reads_in_chunks_and_yields_buffered_bytes(orders, django_assert_num_queries):
+    baker.make(Order, customer=orders[0].customer, _quantity=20)
+
+    with django_assert_num_queries(1):
+        chunks = list(export.stream_export(ORDERS, chunk_size=5))
+
+    # 22 short rows fit in one flush
+    assert len(chunks) == 1
+    assert chunks[0].count(b"\n") == 23
+
+
+def test_export_data_command_writes_gzip(tmp_path, orders):
+    path = tmp_path / "orders.ndjson.gz"
+
+    call_command("export_data", "orders", "--format", "ndjson", "--gzip", "-o", str(path), stdout=io.StringIO())
+
+    lines = gzip.decompress(path.read_bytes()).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [order.id for order in orders]
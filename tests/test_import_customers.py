@@ -0,0 +1,95 @@
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from model_bakery import baker
+
+from apps.core.models import Customer
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+CSV = """username,first_name,last_name,phone_number,password
+alice,Alice,Wanjiru,0712345678,secret123
+bob,Bob,Otieno,+254722222222,secret456
+carol,Carol,Njeri,12345,secret789
+,No,Name,0733333333,x
+alice,Alice,Again,0744444444,x
+dave,Dave,Kamau,0755555555,
+"""
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "customers.csv"
+    path.write_text(CSV)
+    return path
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_import_customers_creates_users_and_customers(csv_file, workers):
+    out = StringIO()
+    call_command("import_customers", str(csv_file), "--chunk-size", "2", "--workers", workers, stdout=out)
+
+    assert set(User.objects.values_list("username", flat=True)) == {"alice", "bob", "dave"}
+    alice = User.objects.get(username="alice")
+    assert alice.check_password("secret123")
+    assert alice.phone_number == "+254712345678"
+    assert not User.objects.get(username="dave").has_usable_password()
+
+    customers = Customer.objects.order_by("code")
+    assert [c.phone_number for c in customers] == ["+254712345678", "+254722222222", "+254755555555"]
+    assert len({c.code for c in customers}) == 3
+    assert customers[0].name == "Alice Wanjiru"
+    assert customers[0].user == alice
+
+    output = out.getvalue()
+    assert "Imported 3 of 6 rows" in output
+    assert "1 invalid phone, 1 missing username, 1 duplicate" in output
+
+
+def test_import_customers_rejects_malformed_and_over_long_phones(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text(
+        "username,first_name,last_name,phone_number,password\n"
+        "erin,Erin,A,07abcdefgh,x\n"
+        "fred,Fred,B,07 12 34,x\n"
+        "gina,Gina,C,0712345678901234,x\n"
+        "hugo,Hugo,D,+2547123456,x\n"
+        "ivy,Ivy,E,0766666666,x\n"
+    )
+    out = StringIO()
+
+    call_command("import_customers", str(path), "--workers", "1", stdout=out)
+
+    assert list(Customer.objects.values_list("phone_number", flat=True)) == ["+254766666666"]
+    assert "4 invalid phone" in out.getvalue()
+
+
+def test_import_customers_skips_existing_records(csv_file):
+    baker.make(User, username="bob")
+    baker.make(Customer, phone_number="+254712345678")
+
+    call_command("import_customers", str(csv_file), "--workers", "1", stdout=StringIO())
+
+    assert not User.objects.filter(username="alice").exists()
+    assert User.objects.filter(username="bob").count() == 1
+    assert User.objects.filter(username="dave").exists()
+
+
+def test_import_customers_queries_per_chunk_not_per_row(tmp_path, django_assert_max_num_queries):
+    rows = "\n".join(f"user{n},First,Last,07{n:08d},pw" for n in range(50))
+    path = tmp_path / "bulk.csv"
+    path.write_text("username,first_name,last_name,phone_number,password\n" + rows + "\n")
+
+    # existence checks + users + code reservation + customers, plus savepoints
+    with django_assert_max_num_queries(8):
+        call_command("import_customers", str(path), "--workers", "1", "--chunk-size", "100", stdout=StringIO())
+
+    assert Customer.objects.count() == 50
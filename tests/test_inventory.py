@@ -66,3 +66,61 @@ def test_no_notify_if_stock_still_above_warn_limit(mock_notify):
     item.save()
 
     mock_notify.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_decrement_stock_reports_per_item_success():
+    plenty = InventoryItem.objects.create(name="Rice", price=10, on_hand=10, warn_limit=5)
+    scarce = InventoryItem.objects.create(name="Salt", price=10, on_hand=1, warn_limit=0)
+
+    results = InventoryItem.objects.decrement_stock({plenty.id: 4, scarce.id: 2, 9999: 1})
+
+    assert results[plenty.id].ok and results[plenty.id].on_hand == 6
+    assert not results[scarce.id].ok and results[scarce.id].on_hand is None
+    assert not results[9999].ok
+    plenty.refresh_from_db()
+    scarce.refresh_from_db()
+    assert plenty.on_hand == 6
+    assert scarce.on_hand == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "on_hand, qty, low",
+    [
+        (8, 3, True),   # 8 -> 5 with warn_limit 5
+        (5, 1, True),   # already at the limit, still reported
+        (10, 2, False), # still above the limit
+    ],
+)
+def test_decrement_stock_reports_warn_limit(on_hand, qty, low):
+    item = InventoryItem.objects.create(name="Oil", price=10, on_hand=on_hand, warn_limit=5)
+    result = InventoryItem.objects.decrement_stock({item.id: qty})[item.id]
+    assert result.below_warn_limit is low
+
+
+@pytest.mark.django_db(transaction=True)
+def test_decrement_stock_never_oversells_under_concurrency():
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import connection, OperationalError
+
+    item = InventoryItem.objects.create(name="Flash Deal", price=10, on_hand=50, warn_limit=5)
+    attempts = 200
+
+    def buy(_):
+        try:
+            while True:
+                try:
+                    return InventoryItem.objects.decrement_stock({item.id: 1})[item.id].ok
+                except OperationalError:
+                    # SQLite reports "database is locked" instead of waiting
+                    continue
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(buy, range(attempts)))
+
+    item.refresh_from_db()
+    assert outcomes.count(True) == 50
+    assert item.on_hand == 0
@@ -0,0 +1,73 @@
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from apps.core.loadtest import Recorder, percentile, seed_dataset, summarize
+from apps.core.models import Customer, Order
+from apps.inventory.models import InventoryItem
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_summarize_reports_rates_percentiles_and_failures():
+    recorder = Recorder()
+    for ms in range(1, 101):
+        recorder.record("GET /create-order/", ms / 1000)
+    recorder.record("POST /create-order/", 0.2, error=302)
+
+    summary = summarize(recorder, wall_seconds=2.0)
+
+    browse = summary["routes"]["GET /create-order/"]
+    assert (browse["requests"], browse["errors"], browse["rps"]) == (100, 0, 50.0)
+    assert (browse["p50_ms"], browse["p95_ms"], browse["p99_ms"], browse["max_ms"]) == (50.0, 95.0, 99.0, 100.0)
+    assert summary["routes"]["POST /create-order/"]["error_kinds"] == {"302": 1}
+    assert (summary["requests"], summary["errors"]) == (101, 1)
+
+
+@pytest.mark.django_db
+def test_seed_dataset_tops_up_to_the_requested_counts():
+    created = seed_dataset(items=5, customers=10, orders=30, rng=random.Random(1))
+
+    assert created["items"] == 5 and created["customers"] == 10 and created["orders"] == 30
+    assert created["order_items"] >= 30
+
+    again = seed_dataset(items=6, customers=10, orders=30, rng=random.Random(2))
+
+    assert again == {"items": 1, "customers": 0, "orders": 0, "order_items": 0}
+    assert InventoryItem.objects.filter(on_hand=10 ** 6, warn_limit=0).count() == 6
+    assert len(set(Customer.objects.values_list("code", flat=True))) == 10
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("apps.core.receipts.render_pdf", return_value=b"%PDF-1.7")
+def test_load_test_runs_every_step_against_a_live_server(render_pdf, live_server, settings, tmp_path):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.SMS_GATEWAY = "fake"
+    settings.SMS_USE_OUTBOX = False
+    output = tmp_path / "results.json"
+
+    # One user: the SQLite test database does not take concurrent writers from live_server's threads
+    call_command(
+        "load_test", url=live_server.url, users=1, iterations=3, items=5, customers=5, orders=20,
+        output=str(output),
+    )
+
+    results = json.loads(output.read_text())
+    assert results["errors"] == 0
+    assert results["routes"]["POST /register/"]["requests"] == 1
+    for route in ("GET /create-order/", "POST /create-order/", "GET /api/orders/",
+                  "GET /orders/<id>/receipt/", "GET /orders/<id>/receipt/ (revalidate)"):
+        assert results["routes"][route]["requests"] == 3
+        assert results["routes"][route]["p99_ms"] >= results["routes"][route]["p50_ms"]
+    assert Order.objects.filter(customer__phone_number__startswith="+25478").count() == 3
@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+import pytest
+from decimal import Decimal
+from django.conf import settings as django_settings
+from django.urls import reverse
+from model_bakery import baker
+from prometheus_client import REGISTRY
+from unittest.mock import patch
+
+from apps.core.models import Customer
+from apps.core.services import place_order
+from apps.inventory.models import InventoryItem
+from common.metrics import record_sms, render_metrics
+from common.utils import send_bulk_sms, send_order_sms
+
+pytestmark = pytest.mark.django_db
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def customer():
+    return baker.make(Customer, phone_number="+254711000000")
+
+
+def test_place_order_counts_orders_and_latency(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=5, warn_limit=0)
+    orders_before = sample("orders_placed_total", source="checkout")
+    timed_before = sample("order_placement_seconds_count")
+
+    place_order(customer, [{"id": item.id, "qty": 1}])
+
+    assert sample("orders_placed_total", source="checkout") == orders_before + 1
+    assert sample("order_placement_seconds_count") == timed_before + 1
+
+
+def test_lost_stock_race_counts_a_conflict(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=5, warn_limit=0)
+    read = InventoryItem.objects.in_bulk
+
+    def read_then_sell_out(*args, **kwargs):
+        snapshot = read(*args, **kwargs)
+        InventoryItem.objects.filter(pk=item.pk).update(on_hand=0)  # another checkout wins
+        return snapshot
+
+    before = sample("stock_decrement_conflicts_total")
+    with patch.object(InventoryItem.objects, "in_bulk", side_effect=read_then_sell_out):
+        placement = place_order(customer, [{"id": item.id, "qty": 2}])
+
+    assert placement.order is None
+    assert sample("stock_decrement_conflicts_total") == before + 1
+
+
+@patch("common.utils.sms")
+def test_sms_outcomes_and_latency(mock_sms):
+    mock_sms.send.return_value = {"SMSMessageData": {"Recipients": [{"status": "Success"}]}}
+    sent, failed = sample("sms_messages_total", status="sent"), sample("sms_messages_total", status="failed")
+    calls = sample("sms_send_seconds_count")
+
+    send_order_sms("+254700000001", "Hello")
+    mock_sms.send.side_effect = ConnectionError("down")
+    send_bulk_sms(["+254700000002", "+254700000003"], "Hello all")
+
+    assert sample("sms_messages_total", status="sent") == sent + 1
+    assert sample("sms_messages_total", status="failed") == failed + 2
+    assert sample("sms_send_seconds_count") == calls + 2
+
+
+def test_only_statuses_the_provider_accepted_count_as_sent():
+    sent, failed = sample("sms_messages_total", status="sent"), sample("sms_messages_total", status="failed")
+
+    record_sms(["Success", "Queued", "InvalidPhoneNumber", "UserInBlacklist", "InsufficientBalance", "unknown"], 0.1)
+
+    assert sample("sms_messages_total", status="sent") == sent + 2
+    assert sample("sms_messages_total", status="failed") == failed + 4
+
+
+def test_metrics_endpoint_serves_exposition_format(client, settings):
+    settings.METRICS_TOKEN = ""
+
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert b"# TYPE orders_placed_total counter" in response.content
+    assert b"pdf_render_seconds" in response.content
+
+
+def test_metrics_endpoint_checks_token(client, settings):
+    settings.METRICS_TOKEN = "s3cret"
+
+    assert client.get(reverse("metrics")).status_code == 403
+    assert client.get(reverse("metrics"), headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_multiprocess_mode_sums_across_workers(tmp_path, monkeypatch):
+    # Two "workers" in separate processes increment the same counter
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c",
+             "from common.metrics import ORDERS_PLACED; ORDERS_PLACED.labels(source='api').inc()"],
+            cwd=django_settings.BASE_DIR, env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}, check=True,
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    body, _ = render_metrics()
+
+    assert 'orders_placed_total{source="api"} 2.0' in body.decode()
+
+
+def test_missing_multiprocess_dir_is_created_on_import(tmp_path):
+    path = tmp_path / "not-created-yet"
+
+    subprocess.run(
+        [sys.executable, "manage.py", "check"],
+        cwd=django_settings.BASE_DIR, env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(path)}, check=True,
+        capture_output=True,
+    )
+
+    assert path.is_dir()
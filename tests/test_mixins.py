@@ -0,0 +1,104 @@
+import pytest
+from decimal import Decimal
+from model_bakery import baker
+from unittest.mock import patch
+
+from apps.core.models import Customer, Order
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def order():
+    customer = baker.make(Customer, phone_number="+254711111111")
+    return baker.make(Order, customer=customer, status=Order.Status.CREATED, amount=Decimal("10.00"))
+
+
+def test_loaded_instance_tracks_changed_fields(order):
+    loaded = Order.objects.get(pk=order.pk)
+    assert loaded.changed_fields == []
+    assert not loaded.has_changed("status")
+
+    loaded.status = Order.Status.APPROVED
+    loaded.amount = Decimal("10.00")  # same value
+    assert loaded.changed_fields == ["status"]
+    assert loaded.previous_value("status") == Order.Status.CREATED
+
+
+def test_new_instance_counts_as_changed():
+    item = InventoryItem(name="Fresh", price=1)
+    assert item.has_changed("on_hand")
+
+
+@patch("common.utils.send_order_status_sms")
+def test_order_status_save_is_a_single_update(mock_sms, order, django_assert_num_queries):
+    loaded = Order.objects.get(pk=order.pk)
+    loaded.status = Order.Status.APPROVED
+
+    # UPDATE, then the order's lines for the sales rollups (written on commit)
+    with django_assert_num_queries(2):
+        loaded.save()
+
+    mock_sms.assert_called_once_with(loaded)
+    assert Order.objects.get(pk=order.pk).status == Order.Status.APPROVED
+    assert not loaded.has_changed("status")
+
+
+def test_unchanged_save_writes_nothing(order, django_assert_num_queries):
+    loaded = Order.objects.get(pk=order.pk)
+    with django_assert_num_queries(0):
+        loaded.save()
+
+
+def test_save_only_writes_changed_columns(order, django_assert_num_queries):
+    loaded = Order.objects.get(pk=order.pk)
+    Order.objects.filter(pk=order.pk).update(amount=Decimal("99.00"))
+    loaded.item = "Legacy"
+
+    with django_assert_num_queries(1):
+        loaded.save()
+
+    order.refresh_from_db()
+    assert order.item == "Legacy"
+    assert order.amount == Decimal("99.00")  # concurrent write survived
+
+
+def test_explicit_update_fields_are_respected(order):
+    loaded = Order.objects.get(pk=order.pk)
+    loaded.item = "Ignored"
+    loaded.amount = Decimal("1.00")
+    loaded.save(update_fields=["amount"])
+
+    order.refresh_from_db()
+    assert order.amount == Decimal("1.00")
+    assert order.item != "Ignored"
+    assert loaded.has_changed("item")
+    assert not loaded.has_changed("amount")
+
+
+def test_refresh_from_db_resets_snapshot(order):
+    loaded = Order.objects.get(pk=order.pk)
+    Order.objects.filter(pk=order.pk).update(status=Order.Status.PENDING)
+    loaded.refresh_from_db()
+    assert loaded.status == Order.Status.PENDING
+    assert not loaded.has_changed("status")
+
+
+def test_deferred_fields_are_not_loaded_to_compare(order, django_assert_num_queries):
+    loaded = Order.objects.only("id", "status").get(pk=order.pk)
+    with django_assert_num_queries(0):
+        assert loaded.changed_fields == []
+
+
+@patch("apps.inventory.models.notify_shop_employee_stock_low")
+def test_inventory_save_detects_crossing_without_select(mock_notify, django_assert_num_queries):
+    item = InventoryItem.objects.create(name="Sugar", price=50, on_hand=10, warn_limit=5)
+    loaded = InventoryItem.objects.get(pk=item.pk)
+    loaded.on_hand = 4
+
+    with django_assert_num_queries(1):
+        loaded.save()
+
+    mock_notify.assert_called_once_with("Sugar", 4)
+    assert loaded.updated_at > item.updated_at
@@ -0,0 +1,176 @@
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.test.utils import override_settings
+from django.utils import timezone
+from model_bakery import baker
+from unittest.mock import patch
+
+from common.models import CustomUser, NotificationThrottle, SentSMS
+from common.notifications import coalesce, pop_expired
+from common.utils import (
+    flush_coalesced_notifications,
+    notify_shop_employee_stock_low,
+    send_order_status_sms,
+)
+from apps.core.models import Customer, Order
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+SUCCESS = {"SMSMessageData": {"Recipients": []}}
+
+
+def age_throttles(seconds):
+    NotificationThrottle.objects.update(last_sent_at=timezone.now() - timedelta(seconds=seconds))
+
+
+def test_coalesce_sends_first_event_and_counts_the_rest():
+    assert coalesce("stock_low", "Rice", ["+254700000001"], {}, window=600) == {"+254700000001": (1, None)}
+    assert coalesce("stock_low", "Rice", ["+254700000001"], {"remaining": 2}, window=600) == {}
+    assert coalesce("stock_low", "Rice", ["+254700000001"], {"remaining": 1}, window=600) == {}
+
+    throttle = NotificationThrottle.objects.get()
+    assert throttle.suppressed == 2
+    assert throttle.payload == {"remaining": 1}
+
+    age_throttles(601)
+    events, since = coalesce("stock_low", "Rice", ["+254700000001"], {}, window=600)["+254700000001"]
+    assert events == 3
+    assert since is not None
+    assert NotificationThrottle.objects.get().suppressed == 0
+
+
+def test_coalesce_keys_are_per_subject_and_recipient():
+    coalesce("stock_low", "Rice", ["+254700000001"], {}, window=600)
+    assert coalesce("stock_low", "Salt", ["+254700000001"], {}, window=600)
+    assert coalesce("stock_low", "Rice", ["+254700000002"], {}, window=600)
+    assert NotificationThrottle.objects.count() == 3
+
+
+def test_coalesce_steady_state_query_count(django_assert_max_num_queries):
+    phones = [f"+25470000000{n}" for n in range(5)]
+    coalesce("stock_low", "Rice", phones, {}, window=600)
+
+    # savepoint + locked SELECT + bulk UPDATE, independent of recipient count
+    with django_assert_max_num_queries(4):
+        coalesce("stock_low", "Rice", phones, {}, window=600)
+
+
+def test_coalesce_sends_once_when_a_concurrent_writer_inserts_first():
+    real_get_or_create = NotificationThrottle.objects.get_or_create
+
+    def lose_the_race(**kwargs):
+        # Another request inserted the key after our SELECT
+        NotificationThrottle.objects.create(kind="stock_low", subject="Rice", recipient="+254700000001")
+        return real_get_or_create(**kwargs)
+
+    with patch.object(NotificationThrottle.objects, "get_or_create", side_effect=lose_the_race):
+        assert coalesce("stock_low", "Rice", ["+254700000001"], {"remaining": 2}, window=600) == {}
+
+    assert NotificationThrottle.objects.get().suppressed == 1
+
+
+@override_settings(SMS_STOCK_ALERT_WINDOW=600)
+@patch("common.utils.sms")
+def test_every_checkout_of_a_low_item_counts_as_one_sale(mock_sms, client):
+    mock_sms.send.return_value = SUCCESS
+    baker.make(CustomUser, is_staff=True, phone_number="+254701111111")
+    buyer = baker.make(CustomUser, phone_number="+254703333333")
+    baker.make(Customer, user=buyer, phone_number="+254703333333")
+    item = baker.make(InventoryItem, name="Laptop", price=Decimal("10.00"), on_hand=4, warn_limit=3)
+    client.force_login(buyer)
+
+    for _ in range(3):
+        client.post(reverse("order_form"), {"cart_data": json.dumps([{"id": item.id, "qty": 1}])})
+
+    assert NotificationThrottle.objects.get(recipient="+254701111111").suppressed == 2
+    age_throttles(600)
+    flush_coalesced_notifications()
+    assert any("(2 sales in last 10 min)" in call[0][0] for call in mock_sms.send.call_args_list)
+
+
+@override_settings(SMS_STOCK_ALERT_WINDOW=600)
+@patch("common.utils.sms")
+def test_stock_alert_burst_collapses_into_one_summary(mock_sms):
+    mock_sms.send.return_value = SUCCESS
+    baker.make(CustomUser, is_staff=True, phone_number="+254701111111")
+    baker.make(CustomUser, is_staff=True, phone_number="+254702222222")
+
+    for remaining in (5, 4, 3):
+        notify_shop_employee_stock_low("Laptop", remaining)
+    assert mock_sms.send.call_count == 1
+
+    age_throttles(600)
+    notify_shop_employee_stock_low("Laptop", 2)
+
+    assert mock_sms.send.call_count == 2
+    message, recipients = mock_sms.send.call_args[0]
+    assert message == "Stock alert: Laptop is low: 2 left (3 sales in last 10 min)"
+    assert sorted(recipients) == ["+254701111111", "+254702222222"]
+
+
+@override_settings(SMS_STOCK_ALERT_WINDOW=600)
+@patch("common.utils.sms")
+def test_flush_sends_trailing_summary_once(mock_sms):
+    mock_sms.send.return_value = SUCCESS
+    baker.make(CustomUser, is_staff=True, phone_number="+254701111111")
+
+    notify_shop_employee_stock_low("Laptop", 4)
+    notify_shop_employee_stock_low("Laptop", 3)
+    notify_shop_employee_stock_low("Laptop", 2)
+
+    flush_coalesced_notifications()
+    assert mock_sms.send.call_count == 1  # window still open
+
+    age_throttles(600)
+    flush_coalesced_notifications()
+    assert mock_sms.send.call_count == 2
+    assert "2 left (2 sales in last 10 min)" in mock_sms.send.call_args[0][0]
+
+    flush_coalesced_notifications()
+    assert mock_sms.send.call_count == 2
+
+
+@override_settings(SMS_STOCK_ALERT_WINDOW=0)
+@patch("common.utils.sms")
+def test_zero_window_sends_every_alert(mock_sms):
+    mock_sms.send.return_value = SUCCESS
+    baker.make(CustomUser, is_staff=True, phone_number="+254701111111")
+
+    notify_shop_employee_stock_low("Laptop", 4)
+    notify_shop_employee_stock_low("Laptop", 3)
+
+    assert mock_sms.send.call_count == 2
+    assert NotificationThrottle.objects.count() == 0
+
+
+@override_settings(SMS_STATUS_UPDATE_WINDOW=300)
+@patch("common.utils.sms")
+def test_status_changes_are_coalesced_to_latest(mock_sms):
+    mock_sms.send.return_value = SUCCESS
+    customer = baker.make("core.Customer", name="Jane", phone_number="+254712345678")
+    order = baker.make(Order, customer=customer, status="PENDING")
+
+    send_order_status_sms(order)
+    order.status = "APPROVED"
+    send_order_status_sms(order)
+    order.status = "DELIVERED"
+    send_order_status_sms(order)
+    assert SentSMS.objects.count() == 1
+
+    age_throttles(300)
+    flush_coalesced_notifications()
+
+    assert SentSMS.objects.count() == 2
+    assert "delivered" in SentSMS.objects.latest("id").message
+
+
+def test_pop_expired_removes_idle_keys():
+    coalesce("stock_low", "Rice", ["+254700000001"], {}, window=600)
+    age_throttles(601)
+
+    assert pop_expired("stock_low", 600) == []
+    assert NotificationThrottle.objects.count() == 0
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("order_summary")
+
+
+@pytest.fixture
+def item():
+    return baker.make(InventoryItem, name="Widget", price=Decimal("5.00"), on_hand=1000)
+
+
+def make_orders(count, item, status=Order.Status.CREATED, days_ago=0):
+    customer = baker.make(Customer, phone_number=f"+2547110{count:02d}{days_ago:03d}")
+    now = timezone.now() - timedelta(days=days_ago)
+    orders = Order.objects.bulk_create([
+        Order(customer=customer, status=status, timestamp=now - timedelta(minutes=n)) for n in range(count)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, item=item, quantity=qty, price_at_order=item.price)
+        for order in orders for qty in (1, 2)
+    ])
+    return orders
+
+
+def test_lists_a_page_with_line_counts_items_and_totals(admin_client, item):
+    orders = make_orders(3, item)
+
+    response = admin_client.get(URL)
+
+    assert response.status_code == 200
+    page = response.context["orders"]
+    assert [order.id for order in page] == [order.id for order in orders]
+    assert (page[0].line_count, page[0].units, page[0].total_price) == (2, 3, Decimal("15.00"))
+    assert b"Widget x 2" in response.content
+
+
+@pytest.mark.parametrize("count", [5, 60])
+def test_query_count_does_not_grow_with_orders(admin_client, item, count, django_assert_num_queries):
+    make_orders(count, item)
+
+    with django_assert_num_queries(5):  # session, user, summary, page, page items
+        response = admin_client.get(URL)
+
+    assert len(response.context["orders"]) == min(count, 50)
+
+
+def test_filters_apply_to_the_page_and_the_summary(admin_client, item):
+    make_orders(2, item, status=Order.Status.APPROVED)
+    make_orders(3, item, status=Order.Status.CANCELLED)
+    make_orders(4, item, status=Order.Status.APPROVED, days_ago=10)
+    since = (timezone.localdate() - timedelta(days=2)).isoformat()
+
+    response = admin_client.get(URL, {"status": "APPROVED", "timestamp_after": since})
+
+    summary = response.context["summary"]
+    assert (summary["orders"], summary["revenue"]) == (2, Decimal("30.00"))
+    assert len(response.context["orders"]) == 2
+    assert ("Cancelled", 0) in summary["statuses"]
+
+    unfiltered = admin_client.get(URL).context["summary"]
+    assert (unfiltered["orders"], unfiltered["approved"], unfiltered["cancelled"]) == (9, 6, 3)
+
+
+def test_cursor_walks_older_orders_and_bad_input_is_handled(admin_client, item):
+    orders = make_orders(60, item)
+
+    first = admin_client.get(URL)
+    second = admin_client.get(first.context["next_url"])
+
+    assert [order.id for order in second.context["orders"]] == [order.id for order in orders[50:]]
+    assert second.context["next_url"] is None
+    assert admin_client.get(URL, {"cursor": "garbage"}).status_code == 404
+    bad = admin_client.get(URL, {"status": "LOST"})
+    assert bad.status_code == 200 and bad.context["summary"]["orders"] == 0
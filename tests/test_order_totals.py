@@ -0,0 +1,127 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.core.services import place_order
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def order():
+    return baker.make(Order, customer=baker.make(Customer, phone_number="+254711000001"))
+
+
+@pytest.fixture
+def item():
+    return baker.make(InventoryItem, price=Decimal("12.50"), on_hand=100)
+
+
+def stored_total(order):
+    return Order.objects.values_list("total", flat=True).get(pk=order.pk)
+
+
+def test_saving_lines_shifts_the_stored_and_in_memory_total(order, item, django_assert_num_queries):
+    line = OrderItem(order=order, item=item, quantity=2, price_at_order=Decimal("12.50"))
+
+    with django_assert_num_queries(2):  # INSERT, then UPDATE total = total + 25.00
+        line.save()
+
+    assert order.total == Decimal("25.00")
+    assert stored_total(order) == Decimal("25.00")
+
+    line.quantity = 3
+    line.save()
+    assert order.total == stored_total(order) == Decimal("37.50")
+    assert not order.has_changed("total")
+
+
+def test_moving_a_line_updates_both_orders(order, item):
+    other = baker.make(Order, customer=order.customer)
+    line = baker.make(OrderItem, order=order, item=item, quantity=2, price_at_order=Decimal("12.50"))
+
+    line = OrderItem.objects.get(pk=line.pk)
+    line.order = other
+    line.save()
+
+    assert stored_total(order) == Decimal("0.00")
+    assert stored_total(other) == Decimal("25.00")
+
+
+def test_deleting_a_line_subtracts_it(order, item):
+    keep = baker.make(OrderItem, order=order, item=item, quantity=1, price_at_order=Decimal("12.50"))
+    drop = baker.make(OrderItem, order=order, item=item, quantity=4, price_at_order=Decimal("1.25"))
+
+    drop.delete()
+
+    assert keep.order.total == stored_total(order) == Decimal("12.50")
+
+
+def test_bulk_create_shifts_every_order_in_one_update(order, item, django_assert_num_queries):
+    other = baker.make(Order, customer=order.customer)
+    lines = [
+        OrderItem(order=order, item=item, quantity=1, price_at_order=Decimal("10.00")),
+        OrderItem(order=order, item=item, quantity=2, price_at_order=Decimal("0.25")),
+        OrderItem(order=other, item=item, quantity=3, price_at_order=Decimal("1.10")),
+    ]
+
+    with django_assert_num_queries(2):
+        OrderItem.objects.bulk_create(lines)
+
+    assert stored_total(order) == order.total == Decimal("10.50")
+    assert stored_total(other) == other.total == Decimal("3.30")
+
+
+def test_queryset_update_bulk_update_and_delete_recalculate(order, item):
+    lines = baker.make(OrderItem, order=order, item=item, quantity=1, price_at_order=Decimal("2.00"), _quantity=3)
+
+    OrderItem.objects.filter(order=order).update(quantity=5)
+    assert stored_total(order) == Decimal("30.00")
+
+    for line in lines:
+        line.price_at_order = Decimal("1.00")
+    OrderItem.objects.bulk_update(lines, ["price_at_order"])
+    assert stored_total(order) == Decimal("15.00")
+
+    order.items.filter(pk=lines[0].pk).delete()
+    assert stored_total(order) == Decimal("10.00")
+
+
+def test_saving_a_stale_order_keeps_the_stored_total(order, item):
+    stale = Order.objects.get(pk=order.pk)
+    baker.make(OrderItem, order=order, item=item, quantity=2, price_at_order=Decimal("12.50"))
+
+    stale.status = Order.Status.CANCELLED
+    stale.save()
+
+    assert stored_total(order) == Decimal("25.00")
+
+
+def test_place_order_writes_the_total_with_the_order(order, item):
+    placement = place_order(order.customer, [{"id": item.id, "qty": 3}])
+
+    assert placement.order.total == placement.order.total_price == Decimal("37.50")
+    assert stored_total(placement.order) == Decimal("37.50")
+
+
+def test_backfill_recalculates_in_chunks_and_check_reports_drift(order, item):
+    orders = [order] + baker.make(Order, customer=order.customer, _quantity=4)
+    for n, each in enumerate(orders, start=1):
+        baker.make(OrderItem, order=each, item=item, quantity=n, price_at_order=Decimal("2.00"))
+    Order.objects.update(total=Decimal("0.00"))
+
+    out = StringIO()
+    call_command("backfill_order_totals", check=True, chunk_size=2, stdout=out)
+    assert "5 orders have a stored total" in out.getvalue()
+
+    call_command("backfill_order_totals", chunk_size=2, stdout=StringIO())
+
+    assert [stored_total(each) for each in orders] == [Decimal(2 * n) for n in range(1, 6)]
+    out = StringIO()
+    call_command("backfill_order_totals", check=True, stdout=out)
+    assert "0 orders have a stored total" in out.getvalue()
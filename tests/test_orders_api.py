@@ -0,0 +1,132 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+# Documented query budgets (see the view docstrings)
+ORDER_LIST_QUERIES = 2
+ORDER_DETAIL_QUERIES = 2
+
+
+def make_orders(count, lines=3):
+    customer = baker.make(Customer, phone_number="+254711111111")
+    items = baker.make(InventoryItem, price=Decimal("10.50"), _quantity=lines)
+    orders = baker.make(Order, customer=customer, _quantity=count)
+    for order in orders:
+        for qty, item in enumerate(items, start=1):
+            baker.make(OrderItem, order=order, item=item, quantity=qty, price_at_order=item.price)
+    return orders
+
+
+def test_with_totals_computes_totals_in_sql():
+    order = make_orders(1, lines=2)[0]
+    empty = baker.make(Order, customer=order.customer)
+
+    totals = dict(Order.objects.with_totals().values_list("id", "items_total"))
+
+    assert totals[order.id] == Decimal("31.50")
+    assert totals[empty.id] == Decimal("0.00")
+
+
+@pytest.mark.parametrize("count", [1, 25])
+def test_order_list_query_budget(client, count, django_assert_num_queries):
+    make_orders(count)
+
+    with django_assert_num_queries(ORDER_LIST_QUERIES):
+        response = client.get(reverse("order-list-create"))
+
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == count
+
+
+def test_order_list_payload(client):
+    make_orders(1, lines=2)
+    data = client.get(reverse("order-list-create")).json()["results"][0]
+
+    assert Decimal(data["total_price"]) == Decimal("31.50")
+    assert [line["quantity"] for line in data["items"]] == [1, 2]
+    assert all(line["item_name"] for line in data["items"])
+
+
+def test_order_detail_query_budget(client, django_assert_num_queries):
+    order = make_orders(1, lines=5)[0]
+
+    with django_assert_num_queries(ORDER_DETAIL_QUERIES):
+        response = client.get(reverse("order-detail", args=[order.id]))
+
+    assert response.status_code == 200
+    assert response.json()["id"] == order.id
+    assert Decimal(response.json()["total_price"]) == Decimal("157.50")
+
+
+def test_order_detail_missing_returns_404(client):
+    assert client.get(reverse("order-detail", args=[999])).status_code == 404
+
+
+def filtered_ids(client, **params):
+    response = client.get(reverse("order-list-create"), params)
+    assert response.status_code == 200, response.json()
+    return {row["id"] for row in response.json()["results"]}
+
+
+def test_order_list_filters(client):
+    now = timezone.now()
+    alice = baker.make(Customer, phone_number="+254711111111")
+    bob = baker.make(Customer, phone_number="+254722222222")
+    old = baker.make(Order, customer=alice, status=Order.Status.DELIVERED, timestamp=now - timedelta(days=40))
+    pending = baker.make(Order, customer=alice, status=Order.Status.PENDING, timestamp=now - timedelta(days=2))
+    approved = baker.make(Order, customer=bob, status=Order.Status.APPROVED, timestamp=now - timedelta(hours=1))
+
+    assert filtered_ids(client, status="PENDING") == {pending.id}
+    assert filtered_ids(client, status="pending,approved") == {pending.id, approved.id}
+    assert filtered_ids(client, timestamp_after=(now - timedelta(days=7)).isoformat()) == {pending.id, approved.id}
+    assert filtered_ids(client, timestamp_before=(now - timedelta(days=7)).isoformat()) == {old.id}
+    assert filtered_ids(client, customer=alice.id) == {old.id, pending.id}
+    assert filtered_ids(client, customer_code=bob.code) == {approved.id}
+    assert filtered_ids(client, phone="0722222222") == {approved.id}
+    assert filtered_ids(client, customer=alice.id, status="DELIVERED") == {old.id}
+
+
+@pytest.mark.parametrize("params", [
+    {"status": "SHIPPED"},
+    {"timestamp_after": "yesterday"},
+    {"phone": "12345"},
+    {"timestamp_after": "2025-02-01", "timestamp_before": "2025-01-01"},
+])
+def test_order_list_rejects_bad_filters(client, params):
+    response = client.get(reverse("order-list-create"), params)
+
+    assert response.status_code == 400
+
+
+def test_filtered_list_keeps_query_budget(client, django_assert_num_queries):
+    orders = make_orders(3)
+
+    with django_assert_num_queries(ORDER_LIST_QUERIES):
+        response = client.get(reverse("order-list-create"), {"customer_code": orders[0].customer.code})
+
+    assert len(response.json()["results"]) == 3
+
+
+def test_filter_benchmark_rolls_back_seeded_rows():
+    out = StringIO()
+    call_command("benchmark_order_filters", "--rows", "200", "--customers", "5", "--repeat", "1", stdout=out)
+
+    assert "customer + range" in out.getvalue()
+    assert Order.objects.count() == 0
+    assert Customer.objects.count() == 0
+
+
+def test_filter_benchmark_rejects_seeding_without_customers():
+    with pytest.raises(CommandError, match="--customers"):
+        call_command("benchmark_order_filters", "--rows", "10", "--customers", "0", stdout=StringIO())
@@ -0,0 +1,152 @@
+import io
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.utils import timezone
+from model_bakery import baker
+from unittest.mock import patch
+
+from common import outbox
+from common.gateways import FakeSMSGateway, recipient_statuses
+from common.models import OutboundSMS, SentSMS
+from common.utils import send_order_sms, send_order_confirmation_sms
+from apps.core.models import Order
+
+pytestmark = pytest.mark.django_db
+
+
+class FlakyGateway(FakeSMSGateway):
+    """Fails the first `failures` sends, then behaves like the fake gateway."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def send(self, message, recipients):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("provider timeout")
+        return super().send(message, recipients)
+
+
+def test_recipient_statuses_matches_numbers_and_positions():
+    response = {"SMSMessageData": {"Recipients": [
+        {"number": "+254700000002", "status": "InvalidPhoneNumber"},
+        {"number": "+254700000001", "status": "Success"},
+    ]}}
+    assert recipient_statuses(response, ["+254700000001", "+254700000002", "+254700000003"]) == [
+        "Success", "InvalidPhoneNumber", "unknown",
+    ]
+    assert recipient_statuses({"SMSMessageData": {"Recipients": [{"status": "Success"}]}}, ["+254700000001"]) == ["Success"]
+    assert recipient_statuses({}, ["+254700000001"]) == ["unknown"]
+
+
+@override_settings(SMS_USE_OUTBOX=True)
+@patch("common.utils.sms")
+def test_send_order_sms_only_enqueues_when_outbox_enabled(mock_sms, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        send_order_sms("+254712345678", "Queued message")
+
+    mock_sms.send.assert_not_called()
+    queued = OutboundSMS.objects.get()
+    assert queued.status == OutboundSMS.Status.PENDING
+    assert queued.message == "Queued message"
+    assert SentSMS.objects.count() == 0
+
+
+@override_settings(SMS_USE_OUTBOX=True)
+def test_order_confirmation_goes_through_outbox():
+    customer = baker.make("core.Customer", phone_number="+254712345678")
+    order = baker.make(Order, customer=customer, amount=1500)
+
+    send_order_confirmation_sms(order, summary="Phone x1")
+
+    assert OutboundSMS.objects.filter(phone_number="+254712345678").count() == 1
+
+
+def test_drain_outbox_sends_and_logs_batch():
+    for n in range(5):
+        outbox.enqueue_sms(f"+25470000000{n}", f"Message {n}")
+    gateway = FakeSMSGateway()
+
+    totals = outbox.drain_outbox(gateway, batch_size=2)
+
+    assert totals == {"sent": 5, "retried": 0, "failed": 0}
+    assert len(gateway.sent) == 5
+    assert OutboundSMS.objects.filter(status=OutboundSMS.Status.SENT).count() == 5
+    assert set(SentSMS.objects.values_list("status", flat=True)) == {"Success"}
+
+
+def test_failed_send_is_retried_with_exponential_backoff():
+    message = outbox.enqueue_sms("+254700000001", "Retry me")
+    gateway = FlakyGateway(failures=2)
+
+    before = timezone.now()
+    assert outbox.drain_outbox(gateway, backoff=10) == {"sent": 0, "retried": 1, "failed": 0}
+    message.refresh_from_db()
+    assert message.attempts == 1
+    assert message.last_error == "provider timeout"
+    assert message.next_attempt_at >= before + timedelta(seconds=10)
+
+    # Not due yet: nothing is claimed
+    assert outbox.drain_outbox(gateway) == {"sent": 0, "retried": 0, "failed": 0}
+
+    OutboundSMS.objects.update(next_attempt_at=timezone.now())
+    outbox.drain_outbox(gateway, backoff=10)
+    message.refresh_from_db()
+    assert message.attempts == 2
+    assert message.next_attempt_at >= timezone.now() + timedelta(seconds=19)
+
+    OutboundSMS.objects.update(next_attempt_at=timezone.now())
+    assert outbox.drain_outbox(gateway)["sent"] == 1
+    message.refresh_from_db()
+    assert message.status == OutboundSMS.Status.SENT
+    assert message.attempts == 3
+
+
+def test_message_fails_permanently_after_max_attempts():
+    message = outbox.enqueue_sms("+254700000001", "Never delivered")
+    gateway = FlakyGateway(failures=10)
+
+    for _ in range(3):
+        OutboundSMS.objects.update(next_attempt_at=timezone.now())
+        outbox.drain_outbox(gateway, max_attempts=3)
+
+    message.refresh_from_db()
+    assert message.status == OutboundSMS.Status.FAILED
+    assert SentSMS.objects.get().status == "failed"
+
+
+def test_backoff_delay_is_capped():
+    assert outbox.backoff_delay(1, base=30) == 30
+    assert outbox.backoff_delay(3, base=30) == 120
+    assert outbox.backoff_delay(20, base=30, cap=3600) == 3600
+
+
+def test_sms_worker_command_drains_once_with_fake_gateway():
+    outbox.enqueue_sms("+254700000001", "Hello")
+    outbox.enqueue_sms("+254700000002", "Hello again")
+
+    call_command("sms_worker", "--once", "--fake-gateway")
+
+    assert OutboundSMS.objects.filter(status=OutboundSMS.Status.SENT).count() == 2
+    assert SentSMS.objects.count() == 2
+
+
+@patch("common.management.commands.sms_worker.serve_metrics")
+def test_sms_worker_serves_its_metrics_when_given_a_port(serve_metrics):
+    call_command("sms_worker", "--once", "--fake-gateway", "--metrics-port", "9109", stdout=io.StringIO())
+
+    serve_metrics.assert_called_once_with(9109)
+
+
+def test_worker_groups_identical_messages_into_one_call():
+    outbox.enqueue_bulk_sms(["+254700000001", "+254700000002", "+254700000003"], "Stock alert")
+    outbox.enqueue_sms("+254700000004", "Something else")
+    gateway = FakeSMSGateway()
+
+    outbox.drain_outbox(gateway)
+
+    assert sorted(len(recipients) for _, recipients in gateway.sent) == [1, 3]
+    assert SentSMS.objects.count() == 4
@@ -0,0 +1,88 @@
+import base64
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core.models import Customer, Order
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+def make_customers(count):
+    return [baker.make(Customer, phone_number=f"+2547000000{n:02d}") for n in range(count)]
+
+
+def walk(client, url):
+    pages = []
+    while url:
+        data = client.get(url).json()
+        pages.append(data)
+        url = data["next"]
+    return pages
+
+
+def test_orders_are_paged_newest_first_without_gaps(client):
+    customer = make_customers(1)[0]
+    now = timezone.now()
+    # Shared timestamps force the id tie-breaker across page boundaries
+    orders = [
+        baker.make(Order, customer=customer, timestamp=now - timedelta(minutes=n // 3))
+        for n in range(10)
+    ]
+
+    pages = walk(client, reverse("order-list-create") + "?page_size=4")
+
+    assert [len(page["results"]) for page in pages] == [4, 4, 2]
+    seen = [row["id"] for page in pages for row in page["results"]]
+    expected = sorted(orders, key=lambda o: (o.timestamp, o.id), reverse=True)
+    assert seen == [order.id for order in expected]
+    assert pages[0]["previous"] is None
+    assert pages[-1]["next"] is None
+
+
+def test_previous_link_returns_the_same_page(client):
+    make_customers(7)
+    url = reverse("customer-list-create") + "?page_size=3"
+
+    first = client.get(url).json()
+    second = client.get(first["next"]).json()
+    back = client.get(second["previous"]).json()
+
+    assert [row["id"] for row in back["results"]] == [row["id"] for row in first["results"]]
+    assert back["previous"] is None
+    assert back["next"] == first["next"]
+
+
+def test_deep_page_costs_the_same_queries(client, django_assert_num_queries):
+    customer = make_customers(1)[0]
+    baker.make(Order, customer=customer, _quantity=30)
+    pages = walk(client, reverse("order-list-create") + "?page_size=5")
+
+    with django_assert_num_queries(2):
+        client.get(pages[-2]["next"])
+
+
+def test_inventory_is_paged_by_id(admin_client):
+    items = baker.make(InventoryItem, _quantity=5)
+
+    pages = walk(admin_client, reverse("inventory-list-create") + "?page_size=2")
+
+    assert [row["id"] for page in pages for row in page["results"]] == [item.id for item in items]
+
+
+def test_page_size_is_capped(client):
+    make_customers(3)
+
+    data = client.get(reverse("customer-list-create") + "?page_size=0").json()
+
+    assert len(data["results"]) == 1
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", base64.urlsafe_b64encode(b'{"p": []}').decode()])
+def test_invalid_cursor_is_404(client, cursor):
+    response = client.get(reverse("order-list-create"), {"cursor": cursor})
+
+    assert response.status_code == 404
@@ -0,0 +1,97 @@
+import logging
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import reverse
+from model_bakery import baker
+from unittest.mock import patch
+
+from apps.core.models import Customer
+from apps.inventory.models import InventoryItem
+from common.middleware import ProfilingMiddleware
+from common.profiling import RequestProfile, profile_queries, span
+from common.utils import send_order_sms
+
+pytestmark = pytest.mark.django_db
+
+
+def timings(response):
+    return {entry.split(";")[0]: entry for entry in response["Server-Timing"].split(", ")}
+
+
+def test_unsampled_requests_get_no_header(admin_client, settings):
+    settings.PROFILING_SAMPLE_RATE = 0
+
+    response = admin_client.get(reverse("inventory_summary"))
+
+    assert "Server-Timing" not in response
+
+
+def test_sampled_request_reports_db_and_template_time(admin_client, settings):
+    settings.PROFILING_SAMPLE_RATE = 1
+    baker.make(InventoryItem, _quantity=3)
+
+    response = admin_client.get(reverse("inventory_summary"))
+
+    entries = timings(response)
+    assert {"db", "template", "total"} <= set(entries)
+    assert "queries" in entries["db"]
+
+
+def test_sampled_requests_only_show_timings_to_staff(client, settings, caplog):
+    settings.PROFILING_SAMPLE_RATE = 1
+
+    with caplog.at_level(logging.INFO, logger="common.profiling"):
+        response = client.get(reverse("home"))
+
+    assert "Server-Timing" not in response
+    assert any("Profiled GET /" in record.getMessage() for record in caplog.records)
+
+
+def test_staff_can_force_a_profile(admin_client, client, settings):
+    settings.PROFILING_SAMPLE_RATE = 0
+
+    assert "Server-Timing" in admin_client.get(reverse("inventory_summary"), headers={"X-Profile": "1"})
+    assert "Server-Timing" not in client.get(reverse("home"), headers={"X-Profile": "1"})
+
+
+def test_repeated_queries_are_flagged_and_logged(rf, settings, caplog):
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_N_PLUS_ONE_THRESHOLD = 3
+    customers = [baker.make(Customer, phone_number=f"+25470000000{n}") for n in range(4)]
+
+    def n_plus_one_view(request):
+        for customer in customers:
+            Customer.objects.get(pk=customer.pk)
+        return HttpResponse("ok")
+
+    request = rf.get("/customers/")
+    request.user = baker.make(get_user_model(), is_staff=True)
+    with caplog.at_level(logging.WARNING, logger="common.profiling"):
+        response = ProfilingMiddleware(n_plus_one_view)(request)
+
+    assert 'n-plus-one;desc="1 statements repeated 3+ times"' in response["Server-Timing"]
+    assert 'db;' in response["Server-Timing"] and '4 queries' in response["Server-Timing"]
+    [record] = caplog.records
+    assert "ran 4 times" in record.getMessage()
+    assert "core_customer" in record.getMessage()
+
+
+@patch("common.utils.sms")
+def test_sms_and_pdf_paths_are_spans(mock_sms):
+    profile = RequestProfile()
+
+    with profile_queries(profile, connections):
+        send_order_sms("+254700000001", "Hello")
+        with span("pdf"):
+            pass
+
+    assert profile.spans["sms"][0] == 1
+    assert profile.spans["pdf"][0] == 1
+    assert profile.query_count == 1  # the SentSMS insert
+
+
+def test_spans_are_free_outside_a_profile():
+    with span("sms"):
+        pass  # no profile active: nothing recorded, nothing raised
@@ -0,0 +1,216 @@
+"""
+Query-count and response-time budgets for every route in apps/core/urls.py
+and apps/inventory/urls.py, measured against a realistically seeded
+database. A route that goes over budget fails with the queries it ran,
+repeated statements first. New routes must be added to ROUTES.
+"""
+
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from model_bakery import baker
+from model_bakery.recipe import seq
+
+from apps.core import urls as core_urls
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory import urls as inventory_urls
+from apps.inventory.models import InventoryItem
+from common.models import SentSMS
+
+pytestmark = pytest.mark.django_db
+
+CUSTOMERS = 40
+ITEMS = 50
+ORDERS = 120
+LINES_PER_ORDER = 3
+
+DEFAULT_MS = 750    # generous for shared CI runners; query counts are the tight check
+PDF_MS = 3000
+
+
+@dataclass
+class Route:
+    name: str
+    queries: int
+    method: str = "get"
+    args: object = None          # callable(seed) -> list of URL args
+    data: object = None          # callable(seed) -> request payload
+    params: dict = field(default_factory=dict)
+    status: int = 200
+    ms: int = DEFAULT_MS
+    client: str = "staff"        # "staff", "anonymous"
+    json: bool = False
+    label: str = ""
+
+    @property
+    def id(self):
+        return self.label or f"{self.method.upper()} {self.name}"
+
+
+def first_order(seed):
+    return [seed["orders"][0].id]
+
+
+def free_item(seed):
+    # Not referenced by any order line, so it can be deleted
+    return [seed["spare_item"].id]
+
+
+ROUTES = [
+    Route("home", 0, client="anonymous"),
+    Route("register_customer", 0, client="anonymous"),
+    Route("register_customer", 16, method="post", status=302, client="anonymous", data=lambda seed: {
+        "first_name": "New", "last_name": "Customer", "username": "newcustomer",
+        "phone_number": "0799000111", "password1": "S3cure-pass", "password2": "S3cure-pass",
+    }),
+    Route("customer-list-create", 3),
+    Route("customer-list-create", 7, method="post", status=201, json=True, data=lambda seed: {
+        "name": "API Customer", "phone_number": "+254799000222",
+    }),
+    Route("order-list-create", 4),
+    Route("order-list-create", 4, params={"status": "DELIVERED", "page_size": "100"}, label="GET order-list-create filtered"),
+    Route("order-list-create", 6, method="post", status=201, json=True, data=lambda seed: {
+        "customer": seed["customers"][1].id, "status": "CREATED",
+    }),
+    Route("order-detail", 4, args=first_order),
+    Route("order_form", 4),
+    Route("order_form", 14, method="post", data=lambda seed: {
+        "cart_data": json.dumps([{"id": item.id, "qty": 1} for item in seed["items"][:3]]),
+    }),
+    Route("login_redirect", 3, status=302),
+    Route("run_migrations", 0, status=403, client="anonymous"),  # with a token it runs migrate
+    Route("manual_login", 0, client="anonymous"),
+    Route("manual_login", 9, method="post", status=302, client="anonymous", data=lambda seed: {
+        "username": seed["staff"].username, "password": "password",
+    }),
+    Route("admin_dashboard", 5),  # was 2 for a static page; + per-day, per-status and top-item rollup reads
+    Route("logout", 4, status=302),
+    Route("inventory_summary", 3),
+    Route("order_summary", 5),
+    Route("order_receipt_pdf", 4, args=first_order, ms=PDF_MS),
+    Route("export", 3, args=lambda seed: ["orders"]),
+    Route("export", 3, args=lambda seed: ["order-items"], params={"format": "ndjson"}, label="GET export order-items"),
+    Route("export", 3, args=lambda seed: ["sms"], params={"gzip": "1"}, label="GET export sms"),
+    Route("customer_statement_pdf", 5, args=lambda seed: [seed["staff_customer"].id], ms=PDF_MS),
+    Route("inventory-list-create", 3),
+    Route("inventory-list-create", 3, method="post", status=201, json=True, data=lambda seed: {
+        "name": "New item", "price": "99.00", "on_hand": 10, "warn_limit": 2,
+    }),
+    Route("inventory-detail", 3, args=free_item),
+    Route("inventory-detail", 4, method="patch", json=True, args=free_item, data=lambda seed: {"on_hand": 7}),
+    Route("inventory-detail", 5, method="put", json=True, args=free_item, data=lambda seed: {
+        "name": "Renamed", "price": "12.00", "on_hand": 3, "warn_limit": 1,
+    }),
+    Route("inventory-detail", 6, method="delete", status=204, args=free_item),  # was 5; + ItemSales cascade
+]
+
+# Known regressions, tracked here so they stay visible; strict so a fix must remove them
+XFAIL = {
+    "POST inventory-list-create": "InventoryItemSerializer does not accept the required price",
+}
+
+
+@pytest.fixture
+def seed(admin_user, settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.SMS_STOCK_ALERT_WINDOW = 0
+    admin_user.set_password("password")
+    admin_user.save()
+
+    customers = baker.make(
+        Customer, _quantity=CUSTOMERS, name=seq("Customer "), phone_number=iter(f"+2547{n:08d}" for n in range(CUSTOMERS)),
+    )
+    staff_customer = baker.make(Customer, user=admin_user, name="Staff Buyer", phone_number="+254799999999")
+    items = baker.make(
+        InventoryItem, _quantity=ITEMS, _bulk_create=True, name=seq("Item "),
+        price=iter(Decimal("100.00") + n for n in range(ITEMS)), on_hand=1000, warn_limit=5,
+    )
+    spare_item = baker.make(InventoryItem, name="Spare", price=Decimal("1.00"), on_hand=1, warn_limit=0)
+    owners = customers + [staff_customer] * 10
+    # Saved one by one, not _bulk_create: baker's bulk path skips the
+    # order and line hooks that keep totals and rollups in step
+    orders = baker.make(
+        Order, _quantity=ORDERS, customer=iter(owners[n % len(owners)] for n in range(ORDERS)),
+        status=iter(Order.Status.DELIVERED if n % 3 else Order.Status.PENDING for n in range(ORDERS)),
+    )
+    lines = [(order, items[(n + line) % ITEMS], line + 1) for n, order in enumerate(orders) for line in range(LINES_PER_ORDER)]
+    baker.make(
+        OrderItem, _quantity=len(lines), order=iter(order for order, _, _ in lines),
+        item=iter(item for _, item, _ in lines), quantity=iter(quantity for _, _, quantity in lines),
+        price_at_order=iter(item.price for _, item, _ in lines),
+    )
+    baker.make(
+        SentSMS, _quantity=CUSTOMERS, _bulk_create=True, phone_number=iter(c.phone_number for c in customers),
+        message="Order received", status="Success",
+    )
+    return {
+        "customers": customers, "items": items, "orders": orders, "staff": admin_user,
+        "staff_customer": staff_customer, "spare_item": spare_item,
+    }
+
+
+def describe(captured, elapsed_ms, route):
+    statements = [query["sql"] for query in captured.captured_queries]
+    repeats = Counter(statements)
+    lines = [f"{route.id}: {len(statements)} queries (budget {route.queries}), {elapsed_ms:.0f} ms (budget {route.ms} ms)"]
+    repeated = [(sql, count) for sql, count in repeats.most_common() if count > 1]
+    if repeated:
+        lines.append("Repeated statements (likely N+1):")
+        lines += [f"  x{count}  {sql}" for sql, count in repeated]
+    lines.append("All queries:")
+    lines += [
+        f"  {n:>3}. [{query['time']}s] {query['sql']}"
+        for n, query in enumerate(captured.captured_queries, start=1)
+    ]
+    return "\n".join(lines)
+
+
+def call(route, client, seed):
+    url = reverse(route.name, args=route.args(seed) if route.args else None)
+    kwargs = {}
+    if route.data:
+        payload = route.data(seed)
+        if route.json:
+            kwargs = {"data": json.dumps(payload), "content_type": "application/json"}
+        else:
+            kwargs = {"data": payload}
+    elif route.params:
+        kwargs = {"data": route.params}
+    response = getattr(client, route.method)(url, **kwargs)
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)  # the queries run while streaming
+    return response
+
+
+@pytest.mark.parametrize("route", [
+    pytest.param(route, id=route.id, marks=[pytest.mark.xfail(reason=XFAIL[route.id], strict=True)] if route.id in XFAIL else [])
+    for route in ROUTES
+])
+@patch("common.utils.sms", None)
+def test_route_budget(route, seed, client):
+    if route.client == "staff":
+        client.force_login(seed["staff"])
+
+    with patch("apps.core.receipts.render_pdf", return_value=b"%PDF-1.7"):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = call(route, client, seed)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+    assert response.status_code == route.status, describe(captured, elapsed_ms, route)
+    if len(captured) > route.queries or elapsed_ms > route.ms:
+        pytest.fail(describe(captured, elapsed_ms, route), pytrace=False)
+
+
+def test_every_route_has_a_budget():
+    names = {pattern.name for pattern in core_urls.urlpatterns + inventory_urls.urlpatterns}
+
+    assert names - {route.name for route in ROUTES} == set()
@@ -0,0 +1,90 @@
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from model_bakery import baker
+from unittest.mock import patch
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def order(client, admin_user):
+    client.force_login(admin_user)
+    customer = baker.make(Customer, phone_number="+254712345678")
+    order = baker.make(Order, customer=customer)
+    item = baker.make(InventoryItem, name="Laptop", price=Decimal("100.00"), on_hand=10)
+    baker.make(OrderItem, order=order, item=item, quantity=2, price_at_order=item.price)
+    return order
+
+
+@pytest.fixture
+def render_pdf():
+    with patch("apps.core.receipts.render_pdf", return_value=b"%PDF-1.7 receipt") as render:
+        yield render
+
+
+def get_receipt(client, order, **headers):
+    return client.get(reverse("order_receipt_pdf", args=[order.id]), headers=headers)
+
+
+def test_receipt_is_rendered_once_then_served_from_cache(client, order, render_pdf, receipt_storage):
+    first = get_receipt(client, order)
+    second = get_receipt(client, order)
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == b"%PDF-1.7 receipt"
+    assert first["ETag"] == second["ETag"]
+    assert "Last-Modified" in first
+    assert render_pdf.call_count == 1
+    assert len(list((receipt_storage / f"order_{order.id}").iterdir())) == 1
+
+
+def test_matching_etag_returns_304_without_render(client, order, render_pdf):
+    etag = get_receipt(client, order)["ETag"]
+    render_pdf.reset_mock()
+
+    response = get_receipt(client, order, if_none_match=etag)
+
+    assert response.status_code == 304
+    render_pdf.assert_not_called()
+
+
+def test_if_modified_since_returns_304(client, order, render_pdf):
+    last_modified = get_receipt(client, order)["Last-Modified"]
+
+    response = get_receipt(client, order, if_modified_since=last_modified)
+
+    assert response.status_code == 304
+    assert render_pdf.call_count == 1
+
+
+def test_changed_items_give_a_new_receipt(client, order, render_pdf, receipt_storage):
+    etag = get_receipt(client, order)["ETag"]
+    OrderItem.objects.filter(order=order).update(quantity=3)
+
+    response = get_receipt(client, order, if_none_match=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert render_pdf.call_count == 2
+    # The previous receipt is deleted once the new one is stored
+    key = response["ETag"].strip('"')
+    assert [path.name for path in (receipt_storage / f"order_{order.id}").iterdir()] == [f"{key}.pdf"]
+
+
+def test_status_change_invalidates_cached_receipts(client, order, render_pdf, receipt_storage):
+    etag = get_receipt(client, order)["ETag"]
+
+    with patch("common.utils.send_order_status_sms"):
+        order.status = Order.Status.APPROVED
+        order.save()
+
+    assert list((receipt_storage / f"order_{order.id}").iterdir()) == []
+    assert get_receipt(client, order)["ETag"] != etag
+
+
+def test_missing_order_receipt_is_404(client, order):
+    assert client.get(reverse("order_receipt_pdf", args=[999])).status_code == 404
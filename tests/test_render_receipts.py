@@ -0,0 +1,79 @@
+import io
+import zipfile
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from model_bakery import baker
+from unittest.mock import patch
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def orders():
+    customer = baker.make(Customer, phone_number="+254712345678")
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=100)
+    now = timezone.now()
+    orders = [
+        baker.make(Order, customer=customer, status=Order.Status.DELIVERED, timestamp=now - timedelta(days=n))
+        for n in range(4)
+    ]
+    orders[3].status = Order.Status.CANCELLED
+    Order.objects.filter(pk=orders[3].pk).update(status=Order.Status.CANCELLED)
+    for order in orders:
+        baker.make(OrderItem, order=order, item=item, quantity=2, price_at_order=item.price)
+    return orders
+
+
+def run(*args):
+    out = io.StringIO()
+    call_command("render_receipts", *args, stdout=out)
+    return out.getvalue()
+
+
+@patch("apps.core.management.commands.render_receipts.render_pdf", return_value=b"%PDF-1.7")
+def test_renders_selected_orders_into_directory(render_pdf, orders, tmp_path, django_assert_max_num_queries):
+    out_dir = tmp_path / "out"
+    with django_assert_max_num_queries(4):
+        output = run("--dir", str(out_dir), "--workers", "1", "--status", "DELIVERED")
+
+    assert sorted(path.name for path in out_dir.iterdir()) == sorted(
+        f"order_{order.id}_receipt.pdf" for order in orders[:3]
+    )
+    assert render_pdf.call_count == 3
+    assert "3 rendered, 0 from cache" in output
+    assert "worker" in output
+
+
+@patch("apps.core.management.commands.render_receipts.render_pdf", return_value=b"%PDF-1.7")
+def test_second_run_reuses_receipt_cache(render_pdf, orders, tmp_path):
+    run("--dir", str(tmp_path / "first"), "--workers", "1")
+    output = run("--zip", str(tmp_path / "receipts.zip"), "--workers", "1")
+
+    assert render_pdf.call_count == 4
+    assert "0 rendered, 4 from cache" in output
+    with zipfile.ZipFile(tmp_path / "receipts.zip") as archive:
+        assert len(archive.namelist()) == 4
+        assert archive.read(f"order_{orders[0].id}_receipt.pdf") == b"%PDF-1.7"
+
+
+def test_renders_in_process_pool_to_zip(orders, tmp_path):
+    after = (timezone.now() - timedelta(days=1, hours=12)).isoformat()
+
+    output = run("--zip", str(tmp_path / "receipts.zip"), "--workers", "2", "--after", after)
+
+    with zipfile.ZipFile(tmp_path / "receipts.zip") as archive:
+        assert sorted(archive.namelist()) == sorted(f"order_{order.id}_receipt.pdf" for order in orders[:2])
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    assert "2 rendered" in output
+
+
+def test_rejects_bad_filters(tmp_path):
+    with pytest.raises(CommandError):
+        run("--dir", str(tmp_path), "--status", "LOST")
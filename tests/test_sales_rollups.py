@@ -0,0 +1,216 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core import rollups
+from apps.core.models import Customer, DailySales, ItemSales, Order, OrderItem
+from apps.core.services import place_order
+from apps.inventory.models import InventoryItem
+
+# Rollups are written when transactions commit
+pytestmark = pytest.mark.django_db(transaction=True)
+
+CREATED, APPROVED, CANCELLED = Order.Status.CREATED, Order.Status.APPROVED, Order.Status.CANCELLED
+
+
+@pytest.fixture(autouse=True)
+def no_sms():
+    with patch("common.utils.send_order_status_sms"):
+        yield
+
+
+@pytest.fixture
+def customer():
+    return baker.make(Customer, phone_number="+254711000001")
+
+
+@pytest.fixture
+def items():
+    return baker.make(InventoryItem, price=Decimal("10.00"), on_hand=1000, _quantity=3)
+
+
+def daily():
+    return {
+        (row.day, row.status): (row.orders, row.units, row.revenue)
+        for row in DailySales.objects.all() if row.orders or row.units or row.revenue
+    }
+
+
+def item_sales():
+    return {
+        (row.item_id, row.status): (row.units, row.revenue)
+        for row in ItemSales.objects.all() if row.units or row.revenue
+    }
+
+
+def assert_no_drift():
+    assert rollups.drift() == (0, 0)
+
+
+def test_checkout_adds_the_order_and_its_lines(customer, items):
+    placement = place_order(customer, [{"id": items[0].id, "qty": 2}, {"id": items[1].id, "qty": 1}])
+
+    today = timezone.localdate(placement.order.timestamp)
+    assert daily() == {(today, CREATED): (1, 3, Decimal("30.00"))}
+    assert item_sales() == {(items[0].id, CREATED): (2, Decimal("20.00")), (items[1].id, CREATED): (1, Decimal("10.00"))}
+    assert_no_drift()
+
+
+def test_checkout_writes_one_upsert_per_table_after_commit(customer, items):
+    with CaptureQueriesContext(connection) as queries:
+        place_order(customer, [{"id": item.id, "qty": 1} for item in items])
+
+    statements = [query["sql"] for query in queries.captured_queries]
+    upserts = [n for n, sql in enumerate(statements) if "core_dailysales" in sql or "core_itemsales" in sql]
+    assert len(upserts) == 2
+    # After the checkout's last write, so its transaction never locks a rollup row
+    assert upserts[0] > max(n for n, sql in enumerate(statements) if "core_orderitem" in sql)
+
+
+def test_rolled_back_writes_leave_the_rollups_alone(customer, items):
+    with transaction.atomic():
+        place_order(customer, [{"id": items[0].id, "qty": 1}])
+        with pytest.raises(RuntimeError), transaction.atomic():
+            place_order(customer, [{"id": items[1].id, "qty": 1}])
+            raise RuntimeError
+
+    assert item_sales() == {(items[0].id, CREATED): (1, Decimal("10.00"))}
+    assert daily() == {(timezone.localdate(), CREATED): (1, 1, Decimal("10.00"))}
+
+
+def test_a_batch_writes_only_what_commits(customer, items):
+    with transaction.atomic(), rollups.batch():
+        baker.make(Order, customer=customer, status=CREATED)
+        with pytest.raises(RuntimeError), transaction.atomic():
+            baker.make(Order, customer=customer, status=APPROVED)
+            raise RuntimeError
+
+    assert daily() == {(timezone.localdate(), CREATED): (1, 0, Decimal("0.00"))}
+
+
+def test_failed_writes_are_retried_and_then_raised(customer, items):
+    real, calls = rollups.increment, []
+
+    def deadlock_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OperationalError("deadlock detected")
+        real(*args)
+
+    with patch.object(rollups, "increment", side_effect=deadlock_once):
+        place_order(customer, [{"id": items[0].id, "qty": 1}])
+    assert_no_drift()
+
+    with patch.object(rollups, "increment", side_effect=OperationalError("deadlock detected")) as increment:
+        with pytest.raises(OperationalError):
+            place_order(customer, [{"id": items[0].id, "qty": 1}])
+    assert increment.call_count == rollups.WRITE_ATTEMPTS
+    assert Order.objects.count() == 2  # committed; the rebuild command fixes the drift
+
+
+def test_status_and_day_changes_move_the_order(customer, items):
+    order = place_order(customer, [{"id": items[0].id, "qty": 2}]).order
+    today = timezone.localdate(order.timestamp)
+
+    order.status = APPROVED
+    order.save()
+    assert daily() == {(today, APPROVED): (1, 2, Decimal("20.00"))}
+    assert item_sales() == {(items[0].id, APPROVED): (2, Decimal("20.00"))}
+
+    order = Order.objects.get(pk=order.pk)
+    order.timestamp -= timedelta(days=3)
+    order.save()
+    assert daily() == {(today - timedelta(days=3), APPROVED): (1, 2, Decimal("20.00"))}
+    assert_no_drift()
+
+
+def test_line_saves_and_deletes_move_units_and_revenue(customer, items):
+    order = baker.make(Order, customer=customer, status=CREATED)
+    line = OrderItem.objects.create(order=order, item=items[0], quantity=1, price_at_order=Decimal("10.00"))
+
+    line = OrderItem.objects.get(pk=line.pk)
+    line.quantity = 4
+    line.item = items[1]
+    line.save()
+    assert item_sales() == {(items[1].id, CREATED): (4, Decimal("40.00"))}
+
+    line.delete()
+    assert item_sales() == {}
+    assert daily() == {(timezone.localdate(order.timestamp), CREATED): (1, 0, Decimal("0.00"))}
+    assert_no_drift()
+
+
+def test_queryset_writes_keep_the_rollups_in_step(customer, items):
+    orders = baker.make(Order, customer=customer, status=CREATED, _quantity=3)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, item=item, quantity=2, price_at_order=item.price) for order in orders for item in items
+    ])
+    assert_no_drift()
+
+    Order.objects.filter(pk=orders[0].pk).update(status=CANCELLED)
+    OrderItem.objects.filter(order=orders[1]).update(quantity=5)
+    lines = list(OrderItem.objects.filter(order=orders[2]))
+    for line in lines:
+        line.price_at_order = Decimal("1.00")
+    OrderItem.objects.bulk_update(lines, ["price_at_order"])
+    assert_no_drift()
+
+    OrderItem.objects.filter(item=items[2]).delete()
+    Order.objects.filter(pk=orders[1].pk).delete()
+    orders[2].delete()
+    assert_no_drift()
+    assert daily() == {(timezone.localdate(orders[0].timestamp), CANCELLED): (1, 4, Decimal("40.00"))}
+
+
+def test_cascade_deletes_remove_the_orders_and_lines(customer, items):
+    other = baker.make(Customer, phone_number="+254711000002")
+    place_order(customer, [{"id": items[0].id, "qty": 2}, {"id": items[1].id, "qty": 1}])
+    place_order(customer, [{"id": items[1].id, "qty": 1}])
+    place_order(other, [{"id": items[2].id, "qty": 3}])
+
+    customer.delete()
+
+    assert_no_drift()
+    assert item_sales() == {(items[2].id, CREATED): (3, Decimal("30.00"))}
+    assert daily() == {(timezone.localdate(), CREATED): (1, 3, Decimal("30.00"))}
+
+
+def test_rebuild_matches_the_incremental_rollups_and_check_reports_drift(customer, items):
+    for n in range(4):
+        place_order(customer, [{"id": items[n % 3].id, "qty": n + 1}])
+    incremental = daily(), item_sales()
+
+    DailySales.objects.update(revenue=Decimal("0.00"))
+    out = StringIO()
+    call_command("rebuild_sales_rollups", check=True, stdout=out)
+    assert "1 daily and 0 item rollup rows differ" in out.getvalue()
+
+    call_command("rebuild_sales_rollups", stdout=StringIO())
+
+    assert (daily(), item_sales()) == incremental
+    out = StringIO()
+    call_command("rebuild_sales_rollups", check=True, stdout=out)
+    assert "0 daily and 0 item rollup rows differ" in out.getvalue()
+
+
+@pytest.mark.parametrize("orders", [1, 40])
+def test_dashboard_reads_only_the_rollups(admin_client, customer, items, orders, django_assert_num_queries):
+    for n in range(orders):
+        place_order(customer, [{"id": items[n % 3].id, "qty": 1}])
+
+    with django_assert_num_queries(5):  # session, user, per day, per status, top items
+        response = admin_client.get(reverse("admin_dashboard"), {"days": 7})
+
+    assert response.status_code == 200
+    assert len(response.context["daily"]) == 7
+    assert response.context["totals"]["orders"] == orders
+    assert response.context["top_items"][0]["revenue"] == Decimal("10.00") * ((orders + 2) // 3)
@@ -0,0 +1,66 @@
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+from common.models import OutboundSMS, SentSMS
+
+pytestmark = pytest.mark.django_db
+
+
+def seed(**options):
+    out = StringIO()
+    call_command("seed_scale", stdout=out, **{"customers": 50, "items": 20, "orders": 300, "chunk_size": 64,
+                                               "seed": 7, **options})
+    return out.getvalue()
+
+
+def test_seeds_every_table_in_chunks_and_reports_rows_per_second():
+    output = seed(sms_rate=1.0)
+
+    assert Customer.objects.count() == 50
+    assert InventoryItem.objects.count() == 20
+    assert Order.objects.count() == 300
+    assert 300 <= OrderItem.objects.count() <= 1500
+    assert SentSMS.objects.count() == 300
+    assert "rows/s" in output and "order items" in output
+
+
+def test_skips_save_side_effects_but_keeps_customer_codes_allocated():
+    seed()
+
+    codes = list(Customer.objects.values_list("code", flat=True))
+    assert len(set(codes)) == 50 and "" not in codes
+    assert not OutboundSMS.objects.exists()
+    # The allocator moved past the bulk codes
+    assert Customer.objects.create(name="Walk-in", phone_number="+254711111111").code not in codes
+
+
+def test_item_popularity_is_skewed_and_ids_follow_timestamps():
+    seed(orders=600)
+
+    per_item = Counter(OrderItem.objects.values_list("item_id", flat=True))
+    counts = sorted(per_item.values(), reverse=True)
+    assert counts[0] > 5 * counts[-1]
+
+    timestamps = list(Order.objects.order_by("id").values_list("timestamp", flat=True))
+    assert timestamps == sorted(timestamps)
+
+
+def test_reruns_do_not_collide():
+    seed()
+    seed()
+
+    assert Customer.objects.count() == 100
+    assert InventoryItem.objects.count() == 40
+
+
+def test_rejects_bad_options():
+    with pytest.raises(CommandError):
+        seed(sms_rate=1.5)
+    with pytest.raises(CommandError):
+        seed(chunk_size=0)
@@ -0,0 +1,98 @@
+import pytest
+from model_bakery import baker
+
+from apps.core import sequences
+from apps.core.models import CodeSequence, Customer
+
+
+@pytest.fixture(autouse=True)
+def fresh_allocator():
+    sequences.customer_codes.reset()
+    yield
+    sequences.customer_codes.reset()
+
+
+@pytest.mark.django_db
+def test_reserve_returns_consecutive_ranges():
+    assert list(sequences.reserve("test_seq", 3)) == [1, 2, 3]
+    assert list(sequences.reserve("test_seq", 2)) == [4, 5]
+    assert CodeSequence.objects.get(name="test_seq").next_value == 6
+
+
+@pytest.mark.django_db
+def test_bulk_allocation_is_one_statement(django_assert_num_queries):
+    sequences.reserve(sequences.CUSTOMER_CODE, 1)
+    with django_assert_num_queries(1):
+        codes = sequences.allocate_customer_codes(1000)
+    assert len(set(codes)) == 1000
+    assert codes[0] == "000002"
+    assert codes[-1] == "001001"
+
+
+@pytest.mark.django_db
+def test_customer_create_does_not_read_customers(django_assert_num_queries):
+    baker.make(Customer, phone_number="+254700000001")
+    customer = Customer(name="Next", phone_number="+254700000002")
+
+    # validation (unique checks) + code reservation + INSERT; no "latest customer" lookup
+    with django_assert_num_queries(4):
+        customer.save()
+    assert customer.code
+
+
+@pytest.mark.django_db
+def test_explicit_codes_push_the_sequence_forward():
+    baker.make(Customer, phone_number="+254700000001", code="000500")
+    customer = Customer.objects.create(name="Next", phone_number="+254700000002")
+    assert customer.code == "000501"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_blocks_are_reserved_once_per_process(django_assert_num_queries):
+    allocator = sequences.BlockAllocator("block_seq", block_size=5)
+    first = allocator.next()
+
+    with django_assert_num_queries(0):
+        rest = [allocator.next() for _ in range(4)]
+
+    assert [first, *rest] == [1, 2, 3, 4, 5]
+    assert allocator.next() == 6
+    assert CodeSequence.objects.get(name="block_seq").next_value == 11
+
+
+@pytest.mark.django_db(transaction=True)
+def test_explicit_codes_move_the_sequence_only_above_the_block(django_assert_num_queries):
+    allocator = sequences.BlockAllocator("skip_seq", block_size=5)
+    assert allocator.next() == 1
+
+    with django_assert_num_queries(0):
+        allocator.skip(1)  # handed out already
+        allocator.skip(3)  # in the block
+    assert allocator.next() == 4
+
+    with django_assert_num_queries(1):
+        allocator.skip(20)
+    assert allocator.next() == 5  # the block is kept
+    assert allocator.next() == 21
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_registrations_get_unique_codes():
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import connection, OperationalError
+
+    def register(n):
+        try:
+            while True:
+                try:
+                    return Customer.objects.create(name=f"C{n}", phone_number=f"+2547000{n:05d}").code
+                except OperationalError:
+                    # SQLite reports "database is locked" instead of waiting
+                    continue
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        codes = list(pool.map(register, range(60)))
+
+    assert len(set(codes)) == 60
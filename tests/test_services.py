@@ -0,0 +1,116 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from model_bakery import baker
+
+from apps.core.models import Customer, Order, OrderItem
+from apps.core.services import place_order, parse_cart
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return baker.make(Customer, name="Jane Doe", phone_number="+254711000000")
+
+
+def test_parse_cart_splits_invalid_lines():
+    lines, invalid = parse_cart([
+        {"id": 1, "qty": 2},
+        {"id": "2", "qty": "3"},
+        {"id": 3, "qty": 0},
+        {"id": 4, "qty": "abc"},
+    ])
+    assert lines == [(1, 2), (2, 3)]
+    assert invalid == [3, 4]
+
+
+def test_place_order_creates_order_items_and_decrements_stock(customer):
+    laptop = baker.make(InventoryItem, name="Laptop", price=Decimal("100.00"), on_hand=10, warn_limit=2)
+    mouse = baker.make(InventoryItem, name="Mouse", price=Decimal("25.50"), on_hand=5, warn_limit=2)
+
+    placement = place_order(customer, [{"id": laptop.id, "qty": 2}, {"id": mouse.id, "qty": 4}])
+
+    order = placement.order
+    assert order is not None
+    assert order.amount == Decimal("302.00")
+    assert placement.total == Decimal("302.00")
+    assert placement.summary == ["Laptop x2", "Mouse x4"]
+    assert OrderItem.objects.filter(order=order).count() == 2
+
+    laptop.refresh_from_db()
+    mouse.refresh_from_db()
+    assert laptop.on_hand == 8
+    assert mouse.on_hand == 1
+    assert placement.low_stock == [mouse]
+
+
+def test_place_order_reports_every_sale_of_a_low_item(customer):
+    mouse = baker.make(InventoryItem, price=Decimal("25.50"), on_hand=4, warn_limit=2)
+
+    assert place_order(customer, [{"id": mouse.id, "qty": 2}]).low_stock == [mouse]
+    assert place_order(customer, [{"id": mouse.id, "qty": 1}]).low_stock == [mouse]
+
+
+def test_place_order_skips_missing_and_short_lines(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=3)
+    scarce = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=1)
+
+    placement = place_order(customer, [
+        {"id": item.id, "qty": 1},
+        {"id": 9999, "qty": 1},
+        {"id": scarce.id, "qty": 5},
+    ])
+
+    assert placement.missing_ids == [9999]
+    assert placement.short_items == [scarce]
+    assert [line.item for line in placement.lines] == [item]
+    scarce.refresh_from_db()
+    assert scarce.on_hand == 1
+
+
+def test_place_order_counts_repeated_lines_against_stock(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=3)
+
+    placement = place_order(customer, [{"id": item.id, "qty": 2}, {"id": item.id, "qty": 2}])
+
+    assert len(placement.lines) == 1
+    assert placement.short_items == [item]
+    item.refresh_from_db()
+    assert item.on_hand == 1
+
+
+def test_place_order_without_valid_lines_creates_nothing(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=0)
+
+    placement = place_order(customer, [{"id": item.id, "qty": 1}])
+
+    assert placement.order is None
+    assert Order.objects.count() == 0
+
+
+def test_place_order_query_count_is_independent_of_cart_size(
+    customer, django_assert_max_num_queries, django_capture_on_commit_callbacks,
+):
+    items = baker.make(InventoryItem, price=Decimal("5.00"), on_hand=50, _quantity=20)
+    cart = [{"id": item.id, "qty": 1} for item in items]
+
+    # in_bulk + stock UPDATE + order INSERT + bulk_create (+ savepoint
+    # handling), then one upsert per sales rollup table once it commits
+    with django_assert_max_num_queries(8), django_capture_on_commit_callbacks(execute=True):
+        placement = place_order(customer, cart)
+
+    assert len(placement.lines) == 20
+
+
+def test_place_order_rolls_back_on_failure(customer):
+    item = baker.make(InventoryItem, price=Decimal("10.00"), on_hand=5)
+
+    with patch.object(OrderItem.objects, "bulk_create", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            place_order(customer, [{"id": item.id, "qty": 2}])
+
+    item.refresh_from_db()
+    assert item.on_hand == 5
+    assert Order.objects.count() == 0
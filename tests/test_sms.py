@@ -5,6 +5,7 @@ from common.utils import (
     send_order_confirmation_sms,
     send_order_status_sms,
     notify_shop_employee_stock_low,
+    send_bulk_sms,
 )
 from common.models import SentSMS, CustomUser
 from apps.core.models import Order
@@ -107,3 +108,42 @@ def test_sms_fails_gracefully_when_not_initialized():
     # Should not raise exception even if sms client is None
     send_order_confirmation_sms(order, summary="Item X x1")
     assert SentSMS.objects.count() == 0
+
+@pytest.mark.django_db
+@patch("common.utils.sms")
+def test_send_bulk_sms_uses_one_call_and_one_insert(mock_sms, django_assert_num_queries):
+    mock_sms.send.return_value = {
+        "SMSMessageData": {"Recipients": [
+            {"number": "+254701111111", "status": "Success"},
+            {"number": "+254702222222", "status": "InvalidPhoneNumber"},
+        ]}
+    }
+
+    with django_assert_num_queries(1):
+        send_bulk_sms(["+254701111111", "+254702222222", "+254701111111", None], "Hello staff")
+
+    mock_sms.send.assert_called_once_with("Hello staff", ["+254701111111", "+254702222222"])
+    statuses = dict(SentSMS.objects.values_list("phone_number", "status"))
+    assert statuses == {"+254701111111": "Success", "+254702222222": "InvalidPhoneNumber"}
+
+@pytest.mark.django_db
+@patch("common.utils.sms")
+def test_send_bulk_sms_logs_every_recipient_as_failed_on_error(mock_sms):
+    mock_sms.send.side_effect = Exception("API error")
+
+    send_bulk_sms(["+254701111111", "+254702222222"], "Hello staff")
+
+    assert list(SentSMS.objects.values_list("status", flat=True)) == ["failed", "failed"]
+
+@pytest.mark.django_db
+@patch("common.utils.sms")
+def test_notify_shop_employee_stock_low_sends_one_batch(mock_sms):
+    mock_sms.send.return_value = {"SMSMessageData": {"Recipients": []}}
+    baker.make(CustomUser, is_staff=True, phone_number="+254701111111")
+    baker.make(CustomUser, is_staff=True, phone_number="+254702222222")
+    baker.make(CustomUser, is_staff=False, phone_number="+254703333333")
+
+    notify_shop_employee_stock_low("Rice", 2)
+
+    mock_sms.send.assert_called_once()
+    assert sorted(mock_sms.send.call_args[0][1]) == ["+254701111111", "+254702222222"]
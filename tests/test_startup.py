@@ -0,0 +1,42 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from unittest.mock import patch
+
+from common import utils
+from common.startup import HEAVY_MODULES, measure_startup
+
+# Generous for shared CI runners; benchmark_startup uses a tighter default
+STARTUP_BUDGET_MS = 5000
+
+
+def test_startup_skips_heavy_imports_and_fits_budget():
+    result = measure_startup()
+
+    assert result["heavy_modules"] == []
+    assert result["total_ms"] < STARTUP_BUDGET_MS
+
+
+def test_benchmark_startup_command_reports_budget():
+    out = io.StringIO()
+
+    call_command("benchmark_startup", "--runs", "1", "--budget-ms", str(STARTUP_BUDGET_MS), stdout=out)
+
+    assert "within the" in out.getvalue()
+
+
+@patch("common.management.commands.benchmark_startup.measure_startup")
+def test_benchmark_startup_fails_on_heavy_import(measure):
+    measure.return_value = {"setup_ms": 1, "urls_ms": 1, "total_ms": 2, "heavy_modules": list(HEAVY_MODULES[:1])}
+
+    with pytest.raises(CommandError, match="weasyprint"):
+        call_command("benchmark_startup", "--runs", "1", stdout=io.StringIO())
+
+
+def test_africastalking_is_initialised_on_first_use(monkeypatch):
+    monkeypatch.setattr(utils, "sms", utils._NOT_LOADED)
+    monkeypatch.delenv("AFRICASTALKING_API_KEY", raising=False)
+
+    assert utils.get_africastalking_sms() is None
+    assert utils.sms is None
@@ -0,0 +1,98 @@
+import io
+import pytest
+import weasyprint
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from unittest.mock import patch
+
+from apps.core import pdf
+from apps.core.models import Customer, Order, OrderItem
+from apps.inventory.models import InventoryItem
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    user = baker.make(get_user_model(), phone_number="+254712345678")
+    customer = baker.make(Customer, user=user, name="Jane", phone_number="+254712345678")
+    item = baker.make(InventoryItem, name="Laptop", price=Decimal("100.00"), on_hand=10)
+    now = timezone.now()
+    for days, qty in ((0, 1), (1, 2), (60, 5)):
+        order = baker.make(Order, customer=customer, timestamp=now - timedelta(days=days))
+        baker.make(OrderItem, order=order, item=item, quantity=qty, price_at_order=item.price)
+    return customer
+
+
+def statement_url(customer):
+    return reverse("customer_statement_pdf", args=[customer.id])
+
+
+def test_statement_renders_period_in_one_pass(client, customer, django_assert_max_num_queries):
+    client.force_login(customer.user)
+    after = (timezone.now() - timedelta(days=7)).date().isoformat()
+
+    with patch("apps.core.views.render_pdf", wraps=pdf.render_pdf) as render, \
+            patch("apps.core.views.render_to_string", wraps=render_to_string) as template:
+        with django_assert_max_num_queries(6):
+            response = client.get(statement_url(customer), {"after": after})
+        content = b"".join(response.streaming_content)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/pdf"
+    assert f"statement_{customer.code}_" in response["Content-Disposition"]
+    assert content.startswith(b"%PDF")
+    render.assert_called_once()
+    context = template.call_args.args[1]
+    assert len(context["orders"]) == 2
+    assert context["statement_total"] == Decimal("300.00")
+
+
+def test_stylesheet_and_fonts_are_parsed_once(customer, client):
+    client.force_login(customer.user)
+    pdf._stylesheets.clear()
+
+    with patch("weasyprint.CSS", wraps=weasyprint.CSS) as css:
+        client.get(statement_url(customer))
+        client.get(statement_url(customer))
+
+    css.assert_called_once()
+    assert pdf.font_config() is pdf.font_config()
+
+
+def test_other_customers_cannot_download_statement(client, customer):
+    stranger = baker.make(get_user_model())
+    client.force_login(stranger)
+
+    assert client.get(statement_url(customer)).status_code == 403
+
+
+def test_staff_can_download_any_statement(admin_client, customer):
+    assert admin_client.get(statement_url(customer)).status_code == 200
+
+
+def test_bad_period_is_rejected(admin_client, customer):
+    assert admin_client.get(statement_url(customer), {"after": "soon"}).status_code == 400
+
+
+def test_receipt_render_benchmark_reports_both_variants(customer):
+    out = io.StringIO()
+
+    call_command("benchmark_receipt_render", "--repeat", "2", stdout=out)
+
+    assert "before (inline CSS)" in out.getvalue()
+    assert "after (cached CSS + fonts)" in out.getvalue()
+
+
+def test_warm_up_parses_every_stylesheet():
+    pdf._stylesheets.clear()
+
+    pdf.warm_up()
+
+    assert set(pdf._stylesheets) == set(pdf.STYLESHEETS)
@@ -121,16 +121,18 @@ def test_send_order_status_sms_other_status(mock_send):
 
 
 @pytest.mark.django_db
-@patch("common.utils.send_order_sms")
+@patch("common.utils.send_bulk_sms")
 def test_notify_shop_employee_stock_low(mock_send):
     staff1 = baker.make(get_user_model(), is_staff=True, phone_number="+254700000001")
     staff2 = baker.make(get_user_model(), is_staff=True, phone_number="+254700000002")
 
     notify_shop_employee_stock_low("Laptop", 3)
 
-    assert mock_send.call_count == 2
-    for call in mock_send.call_args_list:
-        assert "Laptop is low" in call[0][1]
+    # One batched send for all staff
+    mock_send.assert_called_once()
+    phones, message = mock_send.call_args[0]
+    assert sorted(phones) == ["+254700000001", "+254700000002"]
+    assert "Laptop is low" in message
 
 
 def test_generate_order_summary_sms():
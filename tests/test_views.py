@@ -143,6 +143,7 @@ def test_logout_view(authenticated_client):
 
 @mock.patch("weasyprint.HTML.write_pdf")
 def test_order_receipt_pdf(mock_pdf, authenticated_client, user):
+    mock_pdf.return_value = b"%PDF-1.7"
     customer = baker.make("core.Customer", user=user, phone_number="+254700000000")
     order = baker.make(Order, customer=customer)
 